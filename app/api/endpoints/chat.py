@@ -1,9 +1,22 @@
+import json
 from fastapi import APIRouter, Depends, HTTPException, Path
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from uuid import uuid4
 
-from app.models.schemas import ChatRequest, ChatResponse
-from app.services.chatbot import get_chat_response
-from app.dependencies import get_retriever, get_llm, get_conversation_memory
+from app.models.schemas import BatchChatRequest, ChatRequest, ChatResponse
+from app.services.batch import answer_batch
+from app.services.chatbot import get_chat_response, single_flight, speculation_stats, stream_chat_response
+from app.services.condense import condense_stats
+from app.services.context_packing import packing_stats
+from app.services.embedding_cache import CachedEmbeddings
+from app.services.llm_router import LLMRouter
+from app.services.rerank import rerank_stats
+from app.services.translation_cache import get_translation_cache
+from app.dependencies import (
+    get_retriever, get_llm, get_conversation_memory, get_answer_cache, get_embeddings, get_section_index,
+    get_relevance_classifier
+)
 from app.config import settings
 
 router = APIRouter()
@@ -11,8 +24,9 @@ router = APIRouter()
 @router.post("/", response_model=ChatResponse)
 async def chat(
     request: ChatRequest,
-    retriever = Depends(get_retriever),
-    llm = Depends(get_llm)
+    llm = Depends(get_llm),
+    answer_cache = Depends(get_answer_cache),
+    section_index = Depends(get_section_index)
 ):
     """
     Process a chat request and return a response.
@@ -26,15 +40,18 @@ async def chat(
     try:
         # Get or create conversation memory for this session
         memory = get_conversation_memory(request.session_id)
+        retriever = await run_in_threadpool(get_retriever, request.category)
         
         # Get response from chatbot service
-        response = get_chat_response(
+        response = await get_chat_response(
             query=request.query,
             category=request.category,
             language=request.language,
             retriever=retriever,
             llm=llm,
-            memory=memory
+            memory=memory,
+            answer_cache=answer_cache,
+            section_index=section_index
         )
         
         return response
@@ -46,8 +63,10 @@ async def chat(
 async def category_chat(
     category: str = Path(..., description="Legal category"),
     request: ChatRequest = None,
-    retriever = Depends(get_retriever),
-    llm = Depends(get_llm)
+    llm = Depends(get_llm),
+    answer_cache = Depends(get_answer_cache),
+    section_index = Depends(get_section_index),
+    relevance_classifier = Depends(get_relevance_classifier)
 ):
     """
     Process a category-specific chat request and return a response.
@@ -68,16 +87,20 @@ async def category_chat(
     try:
         # Get or create conversation memory for this session
         memory = get_conversation_memory(request.session_id)
+        retriever = await run_in_threadpool(get_retriever, request.category)
         
         # Get response from chatbot service with strict category relevance check
-        response = get_chat_response(
+        response = await get_chat_response(
             query=request.query,
             category=category,
             language=request.language,
             retriever=retriever,
             llm=llm,
             memory=memory,
-            strict_category_check=True  # Enforce strict category relevance
+            strict_category_check=True,  # Enforce strict category relevance
+            answer_cache=answer_cache,
+            section_index=section_index,
+            relevance_classifier=relevance_classifier
         )
         
         return response
@@ -85,6 +108,167 @@ async def category_chat(
         raise HTTPException(status_code=500, detail=f"Error processing chat request: {str(e)}")
 
 
+@router.post("/stream")
+async def chat_stream(
+    request: ChatRequest,
+    llm = Depends(get_llm),
+    answer_cache = Depends(get_answer_cache),
+    section_index = Depends(get_section_index)
+):
+    """
+    Process a chat request and stream the response as server-sent events.
+    
+    Events:
+    - **sources**: Source filenames, sent as soon as retrieval finishes
+    - **token**: A fragment of the (translated) answer
+    - **done**: The complete answer and sources
+    - **error**: Sent instead of the remaining events if processing fails
+    """
+    memory = get_conversation_memory(request.session_id)
+    retriever = await run_in_threadpool(get_retriever, request.category)
+    events = stream_chat_response(
+        query=request.query,
+        category=request.category,
+        language=request.language,
+        retriever=retriever,
+        llm=llm,
+        memory=memory,
+        answer_cache=answer_cache,
+        section_index=section_index
+    )
+    return _event_stream_response(events)
+
+
+@router.post("/category/{category}/stream")
+async def category_chat_stream(
+    category: str = Path(..., description="Legal category"),
+    request: ChatRequest = None,
+    llm = Depends(get_llm),
+    answer_cache = Depends(get_answer_cache),
+    section_index = Depends(get_section_index),
+    relevance_classifier = Depends(get_relevance_classifier)
+):
+    """
+    Process a category-specific chat request and stream the response as
+    server-sent events. See `/stream` for the event types.
+    """
+    if category not in settings.LEGAL_CATEGORIES:
+        raise HTTPException(status_code=400, detail=f"Invalid category. Must be one of: {', '.join(settings.LEGAL_CATEGORIES)}")
+    
+    request.category = category
+    memory = get_conversation_memory(request.session_id)
+    retriever = await run_in_threadpool(get_retriever, request.category)
+    events = stream_chat_response(
+        query=request.query,
+        category=category,
+        language=request.language,
+        retriever=retriever,
+        llm=llm,
+        memory=memory,
+        strict_category_check=True,
+        answer_cache=answer_cache,
+        section_index=section_index,
+        relevance_classifier=relevance_classifier
+    )
+    return _event_stream_response(events)
+
+
+@router.post("/batch")
+async def chat_batch(
+    request: BatchChatRequest,
+    llm = Depends(get_llm),
+    embeddings = Depends(get_embeddings),
+    answer_cache = Depends(get_answer_cache),
+    section_index = Depends(get_section_index)
+):
+    """
+    Answer many standalone questions in one request, streaming results as
+    newline-delimited JSON as soon as each one is ready.
+    
+    - **items**: Questions, each with query, category, language and an
+      optional id
+    
+    Each line is {"index", "id", "answer", "sources"} or {"index", "id",
+    "error"} for one item, in completion order; the last line is a summary
+    with "done": true. Items have no chat history and are not saved to a
+    session.
+    """
+    if len(request.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Too many items. At most {settings.BATCH_MAX_ITEMS} are allowed per batch")
+    
+    retrievers = {}
+    for item in request.items:
+        if item.category not in retrievers:
+            retrievers[item.category] = await run_in_threadpool(get_retriever, item.category)
+    results = answer_batch(
+        items=[item.model_dump() for item in request.items],
+        retrievers=retrievers,
+        llm=llm,
+        embeddings=embeddings,
+        answer_cache=answer_cache,
+        section_index=section_index
+    )
+    
+    async def body():
+        try:
+            async for result in results:
+                if "index" in result:
+                    result = {"index": result["index"], "id": request.items[result["index"]].id, **result}
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+        except Exception as e:
+            # Headers are already sent, so report the failure in-band
+            yield json.dumps({"error": f"Error processing batch request: {str(e)}"}) + "\n"
+    
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+def _format_event(event: str, data: dict) -> str:
+    """Format a single server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _event_stream_response(events) -> StreamingResponse:
+    """Wrap chatbot events in a server-sent events response."""
+    async def body():
+        try:
+            async for event in events:
+                yield _format_event(event["event"], event["data"])
+        except Exception as e:
+            # Headers are already sent, so report the failure in-band
+            yield _format_event("error", {"detail": f"Error processing chat request: {str(e)}"})
+    
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/stats")
+async def chat_stats(
+    llm = Depends(get_llm),
+    answer_cache = Depends(get_answer_cache),
+    embeddings = Depends(get_embeddings),
+    section_index = Depends(get_section_index),
+    relevance_classifier = Depends(get_relevance_classifier)
+):
+    """Get cache and LLM routing statistics for the chat pipeline."""
+    translation_cache = get_translation_cache()
+    return {
+        "answer_cache": answer_cache.stats() if answer_cache is not None else None,
+        "citations": section_index.stats() if section_index is not None else None,
+        "condense": condense_stats.stats(),
+        "relevance": relevance_classifier.stats() if relevance_classifier is not None else None,
+        "speculative_retrieval": speculation_stats.stats(),
+        "coalescing": single_flight.stats(),
+        "context_packing": packing_stats.stats(),
+        "rerank": rerank_stats.stats(),
+        "embedding_cache": embeddings.stats() if isinstance(embeddings, CachedEmbeddings) else None,
+        "translation_cache": translation_cache.stats() if translation_cache is not None else None,
+        "llm": llm.stats() if isinstance(llm, LLMRouter) else None
+    }
+
+
 @router.post("/session")
 async def create_session():
     """Create a new chat session and return a session ID."""
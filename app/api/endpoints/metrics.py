@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.services.embedding_cache import CachedEmbeddings
+from app.services.metrics import METRICS, cache_metrics, render
+from app.services.translation_cache import get_translation_cache
+from app.dependencies import get_answer_cache, get_embeddings, get_section_index
+from app.config import settings
+
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics(
+    answer_cache = Depends(get_answer_cache),
+    embeddings = Depends(get_embeddings),
+    section_index = Depends(get_section_index)
+):
+    """
+    Expose metrics in the Prometheus text format: request and per-stage
+    latency histograms, requests and upstream calls in flight, LLM token
+    counts and cache hits and misses.
+    """
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    translation_cache = get_translation_cache()
+    caches = cache_metrics({
+        "answer": answer_cache.stats() if answer_cache is not None else None,
+        "embedding": embeddings.stats() if isinstance(embeddings, CachedEmbeddings) else None,
+        "translation": translation_cache.stats() if translation_cache is not None else None,
+        "citation": section_index.stats() if section_index is not None else None,
+    })
+    return PlainTextResponse(
+        render(METRICS + caches),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
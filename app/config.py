@@ -1,5 +1,5 @@
 import os
-from typing import List
+from typing import Any, Dict, List
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
@@ -20,17 +20,62 @@ class Settings(BaseSettings):
     # GROQ API settings
     GROQ_API_KEY: str = os.getenv("GROQ_API_KEY", "")
     
+    # Database settings
+    DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./lawgpt.db")
+    
     # Vector database settings
     VECTOR_STORE_PATH: str = "my_vector_store"
     
+    # Search index type: "Flat" (exact), "IVFFlat", "HNSW" or "IVFPQ".
+    # Approximate indexes are trained during ingestion.
+    VECTOR_INDEX_TYPE: str = "Flat"
+    IVF_NLIST: int = 0  # 0 picks ~4*sqrt(number of vectors)
+    IVF_NPROBE: int = 8
+    HNSW_M: int = 32
+    HNSW_EF_CONSTRUCTION: int = 200
+    HNSW_EF_SEARCH: int = 64
+    PQ_M: int = 64
+    PQ_NBITS: int = 8
+    
+    # Memory-map the saved index read-only and read chunks from SQLite, so
+    # API workers share one copy of the store through the page cache
+    VECTOR_STORE_MMAP: bool = True
+    
+    # Hybrid retrieval: BM25 keyword search fused with vector search using
+    # reciprocal rank fusion over the top HYBRID_FETCH_K hits of each
+    HYBRID_RETRIEVAL_ENABLED: bool = True
+    HYBRID_FETCH_K: int = 20
+    RRF_K: int = 60
+    BM25_K1: float = 1.5
+    BM25_B: float = 0.75
+    
     # Embedding model settings
     EMBEDDING_MODEL: str = "models/embedding-001"
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_PATH: str = "embedding_cache.sqlite3"
+    EMBEDDING_CACHE_MEMORY_SIZE: int = 5000
     
     # LLM settings
     LLM_MODEL: str = "llama3-70b-8192"
+    LLM_FAST_MODEL: str = "llama3-8b-8192"  # relevance checks and translation
+    LLM_FALLBACK_MODEL: str = "gemini-1.5-flash"  # on Google, if GOOGLE_API_KEY is set
+    LLM_TOKENS_PER_MINUTE: int = 0  # per Groq backend; 0 means no budget
+    
+    # LLM routing. Backends are tried in order per tier, passing over ones
+    # cooling down after a failure or out of token budget; a second request
+    # is sent to the next backend if the first has not answered within the
+    # hedge delay (0 disables hedging). LLM_BACKENDS (JSON) replaces the
+    # backends derived from the models above; see build_llm_router.
+    LLM_BACKENDS: List[Dict[str, Any]] = []
+    LLM_HEDGE_DELAY_SECONDS: float = 4.0
+    LLM_BACKEND_COOLDOWN_SECONDS: float = 30.0
+    LLM_OUTPUT_TOKENS_ESTIMATE: int = 512
     
     # Translation settings
     ENABLE_TRANSLATION: bool = True
+    TRANSLATION_CACHE_ENABLED: bool = True
+    TRANSLATION_CACHE_SIZE: int = 20000
+    TRANSLATION_BATCH_MAX_CHARS: int = 8000
     
     # Supported languages
 # Supported languages
@@ -50,12 +95,118 @@ class Settings(BaseSettings):
         "Consumer Law",
     ]
     
+    # Source files (glob patterns) making up each category's corpus; a file
+    # may belong to several categories, categories without files fall back
+    # to the global index (the corpus has no IT Act or consumer statute yet)
+    CATEGORY_SOURCES: Dict[str, List[str]] = {
+        "Know Your Rights": ["COI.pdf", "know_your_rights.pdf", "Labour Act.pdf"],
+        "Criminal Law": ["ipc_act.pdf", "criminal_law.pdf", "CSdivTheCriminalLawAct*.pdf"],
+        "Cyber Law": [],
+        "Property Law": ["property_law.pdf"],
+        "Consumer Law": [],
+    }
+    CATEGORY_PARTITIONS_ENABLED: bool = True
+    
     # Chunk size for document splitting
     CHUNK_SIZE: int = 1000
     CHUNK_OVERLAP: int = 200
+    # "statute" splits acts at section/article boundaries (other PDFs fall
+    # back to fixed-size chunks); "recursive" always uses fixed-size chunks
+    CHUNKING_STRATEGY: str = "statute"
+    # Overlap when a single section is too long for one chunk
+    STATUTE_CHUNK_OVERLAP: int = 0
+    
+    # Answer "what does Section X say" queries straight from the section
+    # index, optionally with a short LLM summary of the provision
+    CITATION_FAST_PATH_ENABLED: bool = True
+    CITATION_SUMMARY_ENABLED: bool = False
+    
+    # Ingestion pipeline settings
+    INGEST_PARSE_WORKERS: int = 4
+    INGEST_EMBEDDING_BATCH_SIZE: int = 100
+    INGEST_MAX_IN_FLIGHT: int = 8
+    INGEST_MAX_RETRIES: int = 5
+    INGEST_RETRY_BACKOFF: float = 1.0
     
     # Retrieval settings
     RETRIEVAL_K: int = 4
+    
+    # Reranking: over-fetch RERANK_CANDIDATES chunks, rescore them with
+    # RERANKER ("lexical", "cross-encoder" or "none") and keep between
+    # RERANK_MIN_K and RERANK_MAX_K of them depending on the score gaps.
+    # The cross-encoder needs the sentence-transformers package.
+    RERANKER: str = "lexical"
+    RERANK_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_CANDIDATES: int = 12
+    RERANK_MIN_K: int = 2
+    RERANK_MAX_K: int = 6
+    RERANK_MIN_GAP: float = 0.15
+    RERANK_MIN_RELATIVE_SCORE: float = 0.5
+    RERANK_MAX_CHARS: int = 2000
+    RERANK_BATCH_SIZE: int = 16
+    # Past this, the first RETRIEVAL_K candidates are used unreranked
+    RERANK_TIMEOUT_SECONDS: float = 0.5
+    
+    # Packing of retrieved chunks into the prompt: overlapping chunks of the
+    # same source are merged, near-duplicates (MinHash Jaccard estimate at or
+    # above the threshold) dropped and the rest cut to the token budget
+    CONTEXT_PACKING_ENABLED: bool = True
+    CONTEXT_TOKEN_BUDGET: int = 1500
+    CONTEXT_DEDUP_THRESHOLD: float = 0.8
+    CONTEXT_MIN_OVERLAP_CHARS: int = 40
+    CONTEXT_MIN_PASSAGE_TOKENS: int = 50
+    
+    # Local category-relevance classifier; the LLM is only asked about
+    # queries scoring between the reject and accept thresholds
+    RELEVANCE_CLASSIFIER_ENABLED: bool = True
+    RELEVANCE_PROTOTYPES_PER_SOURCE: int = 32
+    RELEVANCE_NEIGHBOURS: int = 10
+    RELEVANCE_ACCEPT_THRESHOLD: float = 0.7
+    RELEVANCE_REJECT_THRESHOLD: float = 0.2
+    
+    # Share one computation among identical concurrent requests without chat
+    # history (same normalized query, category, language and strictness)
+    COALESCING_ENABLED: bool = True
+    
+    # Start retrieval while the strict category check is still running, and
+    # cancel it if the query is rejected
+    SPECULATIVE_RETRIEVAL_ENABLED: bool = True
+    
+    # Follow-up questions are only condensed against the chat history when
+    # they look like they depend on it
+    CONDENSE_HEURISTICS_ENABLED: bool = True
+    CONDENSE_MIN_WORDS: int = 4
+    
+    # Bulk question answering (/chat/batch): most items per request and
+    # answers generated at once per batch
+    BATCH_MAX_ITEMS: int = 1000
+    BATCH_CONCURRENCY: int = 8
+    
+    # Prometheus metrics on /metrics, and per-stage latencies of each
+    # request in a Server-Timing response header
+    METRICS_ENABLED: bool = True
+    SERVER_TIMING_ENABLED: bool = False
+    
+    # Concurrency limits per upstream service
+    LLM_CONCURRENCY: int = 16
+    TRANSLATION_CONCURRENCY: int = 8
+    EMBEDDING_CONCURRENCY: int = 32
+    RERANK_CONCURRENCY: int = 4
+    
+    # Pooled HTTP connections to the LLM provider, shared by all requests
+    LLM_KEEPALIVE_EXPIRY: float = 60.0
+    
+    # Conversation memory settings
+    SESSION_CACHE_SIZE: int = 10000
+    SESSION_TTL_SECONDS: int = 7 * 24 * 3600
+    SESSION_MAX_MESSAGES: int = 20
+    SESSION_MAX_TOKENS: int = 2000
+    
+    # Semantic answer cache settings
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_THRESHOLD: float = 0.95
+    ANSWER_CACHE_TTL_SECONDS: int = 24 * 3600
+    ANSWER_CACHE_MAX_ENTRIES: int = 5000
 
     class Config:
         env_file = ".env"
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Generator
-from sqlalchemy import create_engine, Column, String, Boolean, DateTime
+from sqlalchemy import create_engine, Column, String, Boolean, DateTime, Integer, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 
@@ -31,6 +31,34 @@ class User(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     last_login = Column(DateTime, nullable=True)
 
+# Chat session model
+class ChatSession(Base):
+    """SQLAlchemy chat session model."""
+    __tablename__ = "chat_sessions"
+    
+    id = Column(String, primary_key=True, index=True)
+    last_active = Column(DateTime, default=datetime.utcnow, index=True)
+
+# Chat message model
+class ChatMessage(Base):
+    """SQLAlchemy chat message model."""
+    __tablename__ = "chat_messages"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    session_id = Column(String, index=True)
+    role = Column(String)
+    content = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+# Translation cache model
+class TranslationCacheEntry(Base):
+    """SQLAlchemy translation cache entry model."""
+    __tablename__ = "translation_cache"
+    
+    key = Column(String, primary_key=True, index=True)
+    translation = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 # Create all tables
 Base.metadata.create_all(bind=engine)
 
@@ -1,51 +1,174 @@
 import os
-from typing import Generator
+from typing import Generator, Optional
 from functools import lru_cache
 
+from langchain_core.embeddings import Embeddings
 from langchain_community.vectorstores import FAISS
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_groq import ChatGroq
 from langchain.memory import ConversationBufferWindowMemory
 
 from app.config import settings
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.bm25 import BM25Index
+from app.services.embedding import category_store_path
+from app.services.embedding_cache import CachedEmbeddings
+from app.services.vector_index import load_vector_store
+from app.services.limits import LimitedEmbeddings
+from app.services.llm_router import LLMRouter, build_llm_router
+from app.services.relevance import RelevanceClassifier
+from app.services.rerank import CrossEncoderReranker, LexicalReranker
+from app.services.retrieval import HybridRetriever, RerankingRetriever
+from app.services.section_index import SectionIndex
+from app.services.session_store import SessionStore, SessionChatMessageHistory
+from app.services.timing import timed
 
 # Set environment variables
 os.environ["GOOGLE_API_KEY"] = settings.GOOGLE_API_KEY
 
 @lru_cache
-def get_embeddings() -> GoogleGenerativeAIEmbeddings:
+def get_embeddings() -> Embeddings:
     """Get Google Generative AI embeddings with caching."""
-    return GoogleGenerativeAIEmbeddings(model=settings.EMBEDDING_MODEL)
+    embeddings = LimitedEmbeddings(
+        GoogleGenerativeAIEmbeddings(model=settings.EMBEDDING_MODEL)
+    )
+    if settings.EMBEDDING_CACHE_ENABLED:
+        # Cache outside the concurrency limit so hits never wait for a slot
+        embeddings = CachedEmbeddings(embeddings)
+    return embeddings
 
 @lru_cache
 def get_vector_store() -> FAISS:
     """Load vector store from disk with caching."""
     embeddings = get_embeddings()
-    return FAISS.load_local(
-        settings.VECTOR_STORE_PATH, 
-        embeddings, 
-        allow_dangerous_deserialization=True
-    )
+    with timed("load.vector_store"):
+        return load_vector_store(settings.VECTOR_STORE_PATH, embeddings)
 
-def get_retriever():
-    """Get vector store retriever."""
-    vector_store = get_vector_store()
-    return vector_store.as_retriever(
-        search_type="similarity", 
-        search_kwargs={"k": settings.RETRIEVAL_K}
-    )
+@lru_cache
+def get_category_vector_store(category: str) -> Optional[FAISS]:
+    """Load a category's partition of the vector store, if it exists."""
+    path = category_store_path(category)
+    if not os.path.exists(os.path.join(path, "index.faiss")):
+        return None
+    with timed("load.vector_store"):
+        return load_vector_store(path, get_embeddings())
 
-def get_llm():
-    """Get LLM model."""
-    return ChatGroq(
-        groq_api_key=settings.GROQ_API_KEY, 
-        model_name=settings.LLM_MODEL
-    )
+@lru_cache
+def get_keyword_index(store_path: str) -> Optional[BM25Index]:
+    """Load the BM25 index saved with a vector store, if it exists."""
+    with timed("load.keyword_index"):
+        return BM25Index.load(store_path)
+
+@lru_cache
+def _load_cross_encoder() -> CrossEncoderReranker:
+    """Load the cross-encoder reranker model once per process."""
+    return CrossEncoderReranker()
+
+def get_reranker(keyword_index: Optional[BM25Index] = None):
+    """
+    Get the configured reranker, or None if reranking is disabled.
+    
+    The lexical reranker weighs query words by their IDF in `keyword_index`.
+    """
+    if settings.RERANKER == "cross-encoder":
+        return _load_cross_encoder()
+    if settings.RERANKER == "lexical":
+        return LexicalReranker(keyword_index)
+    return None
+
+@lru_cache
+def get_retriever(category: Optional[str] = None):
+    """
+    Get vector store retriever, built once per category.
+    
+    If a known category is given, only that category's partition is searched;
+    categories without a partition fall back to the global index. With hybrid
+    retrieval enabled, BM25 keyword search is fused with vector search. With
+    a reranker, more candidates are retrieved and reranked.
+    """
+    vector_store = None
+    store_path = settings.VECTOR_STORE_PATH
+    if (
+        category in settings.LEGAL_CATEGORIES
+        and settings.CATEGORY_PARTITIONS_ENABLED
+    ):
+        vector_store = get_category_vector_store(category)
+        if vector_store is not None:
+            store_path = category_store_path(category)
+    if vector_store is None:
+        vector_store = get_vector_store()
+    
+    keyword_index = get_keyword_index(store_path)
+    reranker = get_reranker(keyword_index)
+    k = settings.RERANK_CANDIDATES if reranker is not None else settings.RETRIEVAL_K
+    
+    retriever = None
+    if settings.HYBRID_RETRIEVAL_ENABLED and keyword_index is not None:
+        retriever = HybridRetriever(
+            vector_store=vector_store,
+            keyword_index=keyword_index,
+            k=k,
+            fetch_k=max(settings.HYBRID_FETCH_K, k)
+        )
+    if retriever is None:
+        retriever = vector_store.as_retriever(
+            search_type="similarity", 
+            search_kwargs={"k": k}
+        )
+    if reranker is not None:
+        retriever = RerankingRetriever(retriever=retriever, reranker=reranker)
+    return retriever
+
+@lru_cache
+def get_llm() -> LLMRouter:
+    """
+    Get LLM model: a router over the configured backends, with a fast tier
+    for cheap tasks.
+    
+    The router is shared by all requests so that its HTTP connections to the
+    providers are pooled and kept alive instead of being opened per request.
+    """
+    return build_llm_router()
+
+@lru_cache
+def _get_semantic_answer_cache() -> SemanticAnswerCache:
+    return SemanticAnswerCache(get_embeddings())
+
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    """Get the semantic answer cache, or None if it is disabled."""
+    if not settings.ANSWER_CACHE_ENABLED:
+        return None
+    return _get_semantic_answer_cache()
+
+@lru_cache
+def _load_section_index() -> Optional[SectionIndex]:
+    return SectionIndex.load(settings.VECTOR_STORE_PATH)
+
+def get_section_index() -> Optional[SectionIndex]:
+    """Get the section index for citation lookups, or None if unavailable."""
+    if not settings.CITATION_FAST_PATH_ENABLED:
+        return None
+    return _load_section_index()
+
+@lru_cache
+def _load_relevance_classifier() -> Optional[RelevanceClassifier]:
+    return RelevanceClassifier.load(settings.VECTOR_STORE_PATH, get_embeddings())
+
+def get_relevance_classifier() -> Optional[RelevanceClassifier]:
+    """Get the local category-relevance classifier, or None if unavailable."""
+    if not settings.RELEVANCE_CLASSIFIER_ENABLED:
+        return None
+    return _load_relevance_classifier()
+
+@lru_cache
+def get_session_store() -> SessionStore:
+    """Get the process-wide conversation history store."""
+    return SessionStore()
 
 def get_conversation_memory(session_id: str) -> ConversationBufferWindowMemory:
     """Get conversation memory for a session."""
     return ConversationBufferWindowMemory(
         k=2, 
+        chat_memory=SessionChatMessageHistory(session_id, get_session_store()),
         memory_key="chat_history", 
         return_messages=True,
         output_key="answer"
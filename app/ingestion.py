@@ -1,6 +1,7 @@
+import argparse
 import os
 from dotenv import load_dotenv
-from app.services.embedding import embed_and_save_documents
+from app.services.embedding import embed_and_save_documents, rebuild_search_indexes
 
 # Load environment variables
 load_dotenv()
@@ -8,9 +9,27 @@ os.environ['GOOGLE_API_KEY'] = os.getenv("GOOGLE_API_KEY")
 
 def main():
     """Entry point for document ingestion."""
+    parser = argparse.ArgumentParser(description="Embed legal documents into the vector store")
+    parser.add_argument("--data-dir", default="./LEGAL-DATA", help="Directory containing PDF files")
+    parser.add_argument("--dry-run", action="store_true", help="Only show what would change")
+    parser.add_argument(
+        "--rebuild-index",
+        action="store_true",
+        help="Rebuild the search index and category partitions without embedding"
+    )
+    args = parser.parse_args()
+    
+    if args.rebuild_index:
+        print("Rebuilding search indexes...")
+        rebuild_search_indexes()
+        return
+    
     print("Starting document ingestion...")
-    num_chunks = embed_and_save_documents()
-    print(f"Document ingestion complete. Created {num_chunks} document chunks.")
+    num_chunks = embed_and_save_documents(args.data_dir, dry_run=args.dry_run)
+    if args.dry_run:
+        print(f"Dry run complete. {num_chunks} document chunks would be embedded.")
+    else:
+        print(f"Document ingestion complete. Created {num_chunks} document chunks.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
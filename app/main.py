@@ -4,8 +4,10 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 import os
 
+from app.api.endpoints import metrics
 from app.api.router import api_router
 from app.config import settings
+from app.middleware import RequestMetricsMiddleware
 
 app = FastAPI(
     title="LawGPT API",
@@ -22,9 +24,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Record request metrics and stage timings
+app.add_middleware(RequestMetricsMiddleware)
+
 # Include API router
 app.include_router(api_router, prefix="/api")
 
+# Prometheus scrape endpoint, outside the API prefix
+app.include_router(metrics.router, tags=["Metrics"])
+
 # Define path to the React app build directory
 REACT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "lawgpt-frontend/dist")
 
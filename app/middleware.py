@@ -0,0 +1,68 @@
+import time
+from typing import Dict
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.services.metrics import HTTP_REQUEST_SECONDS, HTTP_REQUESTS, HTTP_REQUESTS_IN_FLIGHT
+from app.services.timing import timing_context
+
+
+def server_timing(timings: Dict[str, float]) -> str:
+    """Format stage timings (milliseconds) as a Server-Timing header value."""
+    return ", ".join(f"{stage};dur={duration}" for stage, duration in timings.items())
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Path of a request with its path parameters put back as placeholders
+    ("/api/chat/category/{category}"), which keeps metric labels few.
+    """
+    if "route" not in scope:
+        return "unmatched"
+    path = scope["path"]
+    for name, value in scope.get("path_params", {}).items():
+        head, found, tail = path.rpartition(str(value))
+        if found:
+            path = f"{head}{{{name}}}{tail}"
+    return path
+
+
+class RequestMetricsMiddleware:
+    """
+    Records request counts, latencies and the number of requests in flight,
+    and collects the stage timings of each request. With
+    SERVER_TIMING_ENABLED, the timings recorded before the response starts
+    are sent in a Server-Timing header; for streamed responses that is only
+    the work done before the first byte.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        with timing_context() as timings:
+            async def send_with_timings(message: Message) -> None:
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    if settings.SERVER_TIMING_ENABLED:
+                        MutableHeaders(scope=message).append("Server-Timing", server_timing(timings.snapshot()))
+                await send(message)
+
+            HTTP_REQUESTS_IN_FLIGHT.inc()
+            try:
+                await self.app(scope, receive, send_with_timings)
+            finally:
+                HTTP_REQUESTS_IN_FLIGHT.dec()
+                route = route_template(scope)
+                HTTP_REQUESTS.inc(route=route, method=scope["method"], status=status)
+                HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, route=route, method=scope["method"])
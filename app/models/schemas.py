@@ -21,6 +21,21 @@ class ChatResponse(BaseModel):
     """Chat response model."""
     answer: str = Field(..., description="Answer to the user's question")
     sources: Optional[List[str]] = Field(None, description="Sources of information")
+    timings: Optional[Dict[str, float]] = Field(None, description="Latency of each pipeline stage in milliseconds")
+    llm_calls: Optional[int] = Field(None, description="Number of LLM calls made to answer")
+
+
+class BatchChatItem(BaseModel):
+    """One question of a batch chat request."""
+    id: Optional[str] = Field(None, description="Caller's identifier, echoed in the result")
+    query: str = Field(..., description="User's question")
+    category: str = Field(..., description="Legal category")
+    language: str = Field("English", description="Response language")
+
+
+class BatchChatRequest(BaseModel):
+    """Batch chat request model."""
+    items: List[BatchChatItem] = Field(..., min_length=1, description="Questions to answer")
 
 
 class CategoryResponse(BaseModel):
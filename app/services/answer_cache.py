@@ -0,0 +1,183 @@
+import os
+import re
+import time
+from collections import OrderedDict
+from itertools import count
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.citations import cited_provisions
+from app.services.embedding import VERSION_FILE, read_store_version
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for cache matching (case and whitespace)."""
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+class SemanticAnswerCache:
+    """
+    Answer cache matching queries by embedding similarity.
+
+    Entries are partitioned by (category, language, strict) and the sections
+    or articles the query cites, so a query only matches earlier queries
+    answered under the same conditions about the same provisions; questions
+    differing only in a section number embed almost identically. Entries expire
+    after a TTL, the least recently used ones are evicted beyond
+    `max_entries`, and the whole cache is dropped whenever the vector store is
+    rebuilt (detected through its version file).
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        threshold: float = settings.ANSWER_CACHE_THRESHOLD,
+        ttl_seconds: int = settings.ANSWER_CACHE_TTL_SECONDS,
+        max_entries: int = settings.ANSWER_CACHE_MAX_ENTRIES,
+        store_path: str = settings.VECTOR_STORE_PATH
+    ):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.store_path = store_path
+        self._ids = count()
+        # entry_id -> (partition, vector, response, created_at), in LRU order
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        # partition -> (entry_ids, matrix, created_at), rebuilt lazily after changes
+        self._matrices: Dict[tuple, Tuple[list, np.ndarray, np.ndarray]] = {}
+        # The version file is only read again when its stat changes
+        self._version_stat = self._stat_version()
+        self._version = read_store_version(store_path)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    async def lookup(
+        self, query: str, category: str, language: str, strict: bool = False, vector=None
+    ) -> Tuple[Optional[Dict], np.ndarray]:
+        """
+        Look up a cached response for a semantically similar query.
+
+        Args:
+            query: User's question
+            category: Legal category
+            language: Response language
+            strict: Whether the strict category check applies
+            vector: Query embedding of `normalize_query(query)`, if already
+                computed (e.g. in a batch)
+
+        Returns:
+            Tuple of the cached response (or None) and the query vector, which
+            can be passed to `store` to avoid embedding the query twice
+        """
+        self._check_version()
+        if vector is None:
+            vector = await self.embeddings.aembed_query(normalize_query(query))
+        vector = np.array(vector, dtype=np.float32)
+        vector /= np.linalg.norm(vector) or 1.0
+
+        partition = self._partition(query, category, language, strict)
+        self._expire(partition)
+        entry_ids, matrix, _ = self._matrix(partition)
+        if entry_ids:
+            scores = matrix @ vector
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold:
+                entry_id = entry_ids[best]
+                self._entries.move_to_end(entry_id)
+                self.hits += 1
+                return dict(self._entries[entry_id][2]), vector
+
+        self.misses += 1
+        return None, vector
+
+    def store(
+        self,
+        vector: np.ndarray,
+        query: str,
+        category: str,
+        language: str,
+        response: Dict,
+        strict: bool = False
+    ) -> None:
+        """Cache a response to `query` under the vector returned by `lookup`."""
+        partition = self._partition(query, category, language, strict)
+        self._entries[next(self._ids)] = (partition, vector, dict(response), time.time())
+        self._matrices.pop(partition, None)
+        while len(self._entries) > self.max_entries:
+            entry_id = next(iter(self._entries))
+            self._remove(entry_id)
+            self.evictions += 1
+
+    def invalidate(self) -> None:
+        """Drop every cached answer."""
+        self._entries.clear()
+        self._matrices.clear()
+        self.invalidations += 1
+
+    def stats(self) -> Dict:
+        """Get hit/miss counters for the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    @staticmethod
+    def _partition(query: str, category: str, language: str, strict: bool) -> tuple:
+        return category, language, strict, cited_provisions(query)
+
+    def _stat_version(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(os.path.join(self.store_path, VERSION_FILE))
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _check_version(self) -> None:
+        """Invalidate the cache if the vector store was rebuilt."""
+        version_stat = self._stat_version()
+        if version_stat == self._version_stat:
+            return
+        self._version_stat = version_stat
+        version = read_store_version(self.store_path)
+        if version != self._version:
+            self._version = version
+            self.invalidate()
+
+    def _expire(self, partition: tuple) -> None:
+        """Remove the entries of a partition that are past the TTL."""
+        entry_ids, _, created_at = self._matrix(partition)
+        if not entry_ids:
+            return
+        expired = np.flatnonzero(created_at < time.time() - self.ttl_seconds)
+        for i in expired:
+            self._remove(entry_ids[i])
+
+    def _remove(self, entry_id: int) -> None:
+        partition = self._entries.pop(entry_id)[0]
+        self._matrices.pop(partition, None)
+
+    def _matrix(self, partition: tuple) -> Tuple[list, np.ndarray, np.ndarray]:
+        """Get the stacked, normalized query vectors of one partition and
+        their creation times."""
+        if partition not in self._matrices:
+            entry_ids = [
+                entry_id for entry_id, entry in self._entries.items()
+                if entry[0] == partition
+            ]
+            matrix = (
+                np.stack([self._entries[entry_id][1] for entry_id in entry_ids])
+                if entry_ids else np.empty((0, 0), dtype=np.float32)
+            )
+            created_at = np.array([self._entries[entry_id][3] for entry_id in entry_ids], dtype=np.float64)
+            self._matrices[partition] = (entry_ids, matrix, created_at)
+        return self._matrices[partition]
@@ -0,0 +1,169 @@
+import asyncio
+from collections import defaultdict
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.services.answer_cache import SemanticAnswerCache, normalize_query
+from app.services.chatbot import answer_from_documents
+from app.services.citations import answer_citation
+from app.services.context_packing import pack_context
+from app.services.embedding_cache import aembed_queries
+from app.services.llm_calls import count_llm_calls
+from app.services.retrieval import retrieve_batch
+from app.services.section_index import SectionIndex
+from app.services.timing import timed, timing_context
+
+
+async def _settle(index: int, work: Awaitable) -> Tuple[int, Any, Optional[Exception]]:
+    """Await one item's work, returning its failure instead of raising it."""
+    try:
+        return index, await work, None
+    except Exception as e:
+        return index, None, e
+
+
+async def _as_completed(works: Dict[int, Awaitable]) -> AsyncIterator[Tuple[int, Any, Optional[Exception]]]:
+    """
+    Run the work of several items concurrently and yield (index, result,
+    error) as each finishes. Work still running when the caller stops
+    listening is cancelled.
+    """
+    tasks = [asyncio.ensure_future(_settle(index, work)) for index, work in works.items()]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def answer_batch(
+    items: List[Dict],
+    retrievers: Dict[str, Any],
+    llm,
+    embeddings,
+    answer_cache: Optional[SemanticAnswerCache] = None,
+    section_index: Optional[SectionIndex] = None,
+    concurrency: int = settings.BATCH_CONCURRENCY
+) -> AsyncIterator[Dict]:
+    """
+    Answer many standalone questions, yielding each result as soon as it is
+    ready.
+
+    The per-request overheads are paid once for the whole batch: every query
+    (and its answer cache key) is embedded in one request, cached and
+    citation answers are returned straight away, each category's index is
+    searched once with the matrix of its queries, and answers are generated
+    at most `concurrency` at a time (within the LLM_CONCURRENCY shared with
+    interactive requests). Items have no chat history and are not saved to
+    any session.
+
+    Args:
+        items: Dictionaries with "query", "category" and "language"
+        retrievers: Retriever of each category in the batch
+        llm: Language model
+        embeddings: Embeddings used by the retrievers
+        answer_cache: Optional semantic cache for answers
+        section_index: Optional section index for citation queries
+        concurrency: Most answers generated at the same time
+
+    Yields:
+        {"index", "answer", "sources"} or {"index", "error"} per item, in
+        completion order, then a summary with "done", the item and error
+        counts, per-stage latencies (milliseconds, added up over items) and
+        the number of LLM calls made
+    """
+    with timing_context() as timings, count_llm_calls() as llm_calls:
+        questions = [f"[Category: {item['category']}] {item['query']}" for item in items]
+        cache_keys = [normalize_query(item["query"]) for item in items] if answer_cache is not None else []
+
+        # One embedding request for the whole batch
+        texts = list(dict.fromkeys(questions + cache_keys))
+        with timed("retrieval.embedding"):
+            vectors = dict(zip(texts, await aembed_queries(embeddings, texts)))
+
+        errors = 0
+        cache_vectors: Dict[int, Any] = {}
+
+        async def shortcut(i: int) -> Optional[Dict]:
+            item = items[i]
+            if section_index is not None:
+                with timed("citation_lookup"):
+                    citation = await answer_citation(
+                        item["query"], item["category"], item["language"], llm, section_index
+                    )
+                if citation is not None:
+                    return citation
+            if answer_cache is not None:
+                with timed("answer_cache"):
+                    cached, cache_vectors[i] = await answer_cache.lookup(
+                        item["query"], item["category"], item["language"], vector=vectors[cache_keys[i]]
+                    )
+                return cached
+            return None
+
+        pending: List[int] = []
+        async for i, response, error in _as_completed({i: shortcut(i) for i in range(len(items))}):
+            if error is not None:
+                errors += 1
+                yield {"index": i, "error": str(error)}
+            elif response is not None:
+                yield {"index": i, **response}
+            else:
+                pending.append(i)
+
+        # One vector search per category over all of its queries
+        by_category: Dict[str, List[int]] = defaultdict(list)
+        for i in sorted(pending):
+            by_category[items[i]["category"]].append(i)
+
+        async def retrieve(category: str, indices: List[int]) -> List[Tuple[int, List]]:
+            documents = await asyncio.to_thread(
+                retrieve_batch,
+                retrievers[category],
+                [questions[i] for i in indices],
+                [vectors[questions[i]] for i in indices]
+            )
+            with timed("context_packing"):
+                return [(i, pack_context(docs)) for i, docs in zip(indices, documents)]
+
+        groups = list(by_category.items())
+        with timed("retrieval"):
+            retrieved = await asyncio.gather(
+                *(retrieve(category, indices) for category, indices in groups),
+                return_exceptions=True
+            )
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def generate(i: int, documents: List) -> Dict:
+            item = items[i]
+            async with semaphore:
+                _, response = await answer_from_documents(questions[i], documents, item["language"], llm)
+            if cache_vectors.get(i) is not None:
+                answer_cache.store(cache_vectors[i], item["query"], item["category"], item["language"], response)
+            return response
+
+        works = {}
+        for (category, indices), group in zip(groups, retrieved):
+            if isinstance(group, BaseException):
+                for i in indices:
+                    errors += 1
+                    yield {"index": i, "error": str(group)}
+                continue
+            for i, documents in group:
+                works[i] = generate(i, documents)
+        async for i, response, error in _as_completed(works):
+            if error is not None:
+                errors += 1
+                yield {"index": i, "error": str(error)}
+            else:
+                yield {"index": i, **response}
+
+        yield {
+            "done": True,
+            "items": len(items),
+            "errors": errors,
+            "timings": timings.snapshot(),
+            "llm_calls": llm_calls.calls
+        }
@@ -0,0 +1,160 @@
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+from app.config import settings
+
+# Files of a saved BM25 index, all plain .npy arrays so they can be mapped
+BM25_FILES = {
+    "terms": "bm25.terms.npy",
+    "offsets": "bm25.offsets.npy",
+    "postings": "bm25.postings.npy",
+    "frequencies": "bm25.frequencies.npy",
+    "lengths": "bm25.lengths.npy",
+}
+
+# Longer tokens are truncated so the vocabulary fits a fixed-width array
+_MAX_TERM_LENGTH = 32
+
+# Words, numbers and section numbers with letter suffixes ("498a")
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the "
+    "this to was were which with shall any such may under".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word and number tokens of a text, without stopwords."""
+    return [
+        token[:_MAX_TERM_LENGTH]
+        for token in _TOKEN.findall(text.lower())
+        if token not in _STOPWORDS
+    ]
+
+
+def write_bm25_index(vectors: FAISS, directory: str) -> None:
+    """
+    Build a BM25 inverted index over the chunks of a vector store and save it
+    in `directory`. Postings hold index positions, so keyword hits map to
+    chunks exactly like vector hits.
+
+    The index is stored in CSR form: a sorted vocabulary, an offsets array
+    into the concatenated postings, and per-posting term frequencies.
+
+    Args:
+        vectors: Vector store whose chunks to index
+        directory: Directory to write the BM25 files to
+    """
+    count = vectors.index.ntotal
+    lengths = np.zeros(count, dtype=np.uint32)
+    postings: Dict[str, List[Tuple[int, int]]] = {}
+    for position, doc_id in vectors.index_to_docstore_id.items():
+        tokens = tokenize(vectors.docstore.search(doc_id).page_content)
+        lengths[position] = len(tokens)
+        for term, frequency in Counter(tokens).items():
+            postings.setdefault(term, []).append((position, frequency))
+
+    terms = sorted(postings)
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(postings[term]) for term in terms])
+    positions = np.empty(offsets[-1], dtype=np.int32)
+    frequencies = np.empty(offsets[-1], dtype=np.uint16)
+    for i, term in enumerate(terms):
+        entries = np.array(postings[term], dtype=np.int64).reshape(-1, 2)
+        positions[offsets[i]:offsets[i + 1]] = entries[:, 0]
+        frequencies[offsets[i]:offsets[i + 1]] = np.minimum(entries[:, 1], np.iinfo(np.uint16).max)
+
+    arrays = {
+        "terms": np.array(terms, dtype=f"U{_MAX_TERM_LENGTH}"),
+        "offsets": offsets,
+        "postings": positions,
+        "frequencies": frequencies,
+        "lengths": lengths,
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, BM25_FILES[name]), array)
+
+
+class BM25Index:
+    """
+    Read-only BM25 index over the chunks of a saved vector store. The arrays
+    are memory-mapped, so loading is instant and workers share the pages.
+    """
+
+    def __init__(self, directory: str, k1: float = settings.BM25_K1, b: float = settings.BM25_B):
+        arrays = {
+            name: np.load(os.path.join(directory, filename), mmap_mode="r")
+            for name, filename in BM25_FILES.items()
+        }
+        self.terms = arrays["terms"]
+        self.offsets = arrays["offsets"]
+        self.postings = arrays["postings"]
+        self.frequencies = arrays["frequencies"]
+        self.lengths = arrays["lengths"]
+        self.k1 = k1
+        self.b = b
+        self.count = len(self.lengths)
+        self.average_length = float(self.lengths.mean()) if self.count else 0.0
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["BM25Index"]:
+        """Load the BM25 index saved in `directory`, or None if there is none."""
+        if not all(os.path.exists(os.path.join(directory, f)) for f in BM25_FILES.values()):
+            return None
+        return cls(directory)
+
+    def _idf(self, document_frequency: int) -> float:
+        return math.log(1 + (self.count - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def _term_range(self, term: str) -> Optional[Tuple[int, int]]:
+        i = int(np.searchsorted(self.terms, term))
+        if i == len(self.terms) or self.terms[i] != term:
+            return None
+        return int(self.offsets[i]), int(self.offsets[i + 1])
+
+    def idf(self, term: str) -> float:
+        """BM25 inverse document frequency of a token, 0 if no chunk has it."""
+        term_range = self._term_range(term)
+        if term_range is None:
+            return 0.0
+        start, end = term_range
+        return self._idf(end - start)
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """
+        Score chunks against a query with BM25.
+
+        Args:
+            query: Query text
+            k: Maximum number of results
+
+        Returns:
+            (index position, score) pairs, best first
+        """
+        if not self.count:
+            return []
+        scores = np.zeros(self.count, dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_range = self._term_range(term)
+            if term_range is None:
+                continue
+            start, end = term_range
+            positions = self.postings[start:end]
+            frequencies = self.frequencies[start:end].astype(np.float32)
+            idf = self._idf(end - start)
+            norm = self.k1 * (1 - self.b + self.b * self.lengths[positions] / self.average_length)
+            scores[positions] += idf * frequencies * (self.k1 + 1) / (frequencies + norm)
+
+        k = min(k, int(np.count_nonzero(scores)))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(position), float(scores[position])) for position in top]
@@ -1,22 +1,120 @@
-from langchain.chains import ConversationalRetrievalChain
+import asyncio
+import threading
+from collections import OrderedDict
+from contextlib import aclosing, nullcontext
+from typing import AsyncIterator, Awaitable, Dict, List, Optional, Tuple
+
+from langchain.chains.combine_documents.stuff import StuffDocumentsChain
+from langchain.chains.conversational_retrieval.base import _get_chat_history
+from langchain.chains.conversational_retrieval.prompts import CONDENSE_QUESTION_PROMPT
+from langchain.chains.question_answering import load_qa_chain
+from langchain.chains.question_answering.stuff_prompt import PROMPT_SELECTOR
 from langchain.memory import ConversationBufferWindowMemory
+from langchain_core.documents import Document
 
-from app.services.translation import translate_text
+from app.services.answer_cache import SemanticAnswerCache, normalize_query
+from app.services.citations import answer_citation
+from app.services.context_packing import pack_context
+from app.services.condense import condense_stats, needs_condensing
+from app.services.limits import upstream_slot
+from app.services.llm_calls import count_llm_calls
+from app.services.llm_router import fast_llm
+from app.services.relevance import RelevanceClassifier
+from app.services.section_index import SectionIndex
+from app.services.single_flight import SingleFlight
+from app.services.timing import timed, timing_context
+from app.services.translation import translate_text, stream_translation
 from app.config import settings
 
+# Pre-built answer chains keyed by the identity of their LLM. The
+# dependencies hand out a single long-lived LLM client, so in the API this
+# holds one chain.
+_QA_CHAIN_CACHE_SIZE = 32
+_qa_chains: "OrderedDict[int, StuffDocumentsChain]" = OrderedDict()
+_qa_chains_lock = threading.Lock()
+
+
+class SpeculationStats:
+    """Counts speculative retrievals that were used or thrown away."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.used = 0
+        self.wasted = 0
+
+    def record(self, wasted: bool) -> None:
+        with self._lock:
+            if wasted:
+                self.wasted += 1
+            else:
+                self.used += 1
+
+    def stats(self) -> Dict:
+        total = self.used + self.wasted
+        return {
+            "used": self.used,
+            "wasted": self.wasted,
+            "waste_rate": self.wasted / total if total else 0.0,
+        }
+
+
+speculation_stats = SpeculationStats()
+
+# Identical session-independent requests in flight, shared across endpoints
+single_flight = SingleFlight()
+
+
+def get_qa_chain(llm) -> StuffDocumentsChain:
+    """
+    Get the chain answering a question from retrieved documents, building
+    it on first use.
+    
+    It is the chain ConversationalRetrievalChain uses for its final step.
+    It holds no per-request state, so one chain serves every session
+    concurrently.
+    
+    Args:
+        llm: Language model
+        
+    Returns:
+        Stuff documents chain taking "input_documents" and "question"
+    """
+    # The cached chain references the LLM, so its id stays unique
+    key = id(llm)
+    with _qa_chains_lock:
+        qa = _qa_chains.get(key)
+        if qa is not None:
+            _qa_chains.move_to_end(key)
+            return qa
+    qa = load_qa_chain(llm, chain_type="stuff")
+    with _qa_chains_lock:
+        qa = _qa_chains.setdefault(key, qa)
+        _qa_chains.move_to_end(key)
+        while len(_qa_chains) > _QA_CHAIN_CACHE_SIZE:
+            _qa_chains.popitem(last=False)
+    return qa
+
 
-def get_chat_response(
+async def get_chat_response(
     query: str,
     category: str,
     language: str,
     retriever,
     llm,
     memory: ConversationBufferWindowMemory,
-    strict_category_check: bool = False
+    strict_category_check: bool = False,
+    answer_cache: Optional[SemanticAnswerCache] = None,
+    section_index: Optional[SectionIndex] = None,
+    relevance_classifier: Optional[RelevanceClassifier] = None
 ):
     """
     Process a user query and return a response using RAG architecture.
     
+    Queries that only cite a provision ("What does Section 302 IPC say?")
+    are answered verbatim from the section index instead. Identical
+    session-independent requests in flight at the same time share one
+    computation.
+    
     Args:
         query: User's question
         category: Legal category
@@ -25,73 +123,516 @@ def get_chat_response(
         llm: Language model
         memory: Conversation memory
         strict_category_check: Whether to enforce strict category relevance
+        answer_cache: Optional semantic cache for session-independent answers
+        section_index: Optional section index for citation queries
+        relevance_classifier: Optional local classifier for the strict
+            category check
         
     Returns:
-        Dictionary with answer and sources
+        Dictionary with answer, sources, per-stage latencies (milliseconds)
+        and the number of LLM calls made
     """
+    with timing_context() as timings, count_llm_calls() as llm_calls:
+        key = await _coalescing_key(query, category, language, memory, strict_category_check)
+        if key is None:
+            response = await _get_chat_response(
+                query, category, language, retriever, llm, memory,
+                strict_category_check, answer_cache, section_index, relevance_classifier
+            )
+        else:
+            events, leader = single_flight.join(key, lambda: _response_events(_get_chat_response(
+                query, category, language, retriever, llm, memory,
+                strict_category_check, answer_cache, section_index, relevance_classifier
+            )))
+            response = None
+            # Followers only wait, so their wait is their one stage
+            with nullcontext() if leader else timed("coalesced"):
+                async with aclosing(events):
+                    async for event in events:
+                        if event["event"] == "done":
+                            response = event["data"]
+            if response is None:
+                raise RuntimeError("Shared chat computation ended without an answer")
+            if not leader:
+                await _save_coalesced_answer(memory, query, category, response)
+    return {**response, "timings": timings.snapshot(), "llm_calls": llm_calls.calls}
+
+
+async def _get_chat_response(
+    query: str,
+    category: str,
+    language: str,
+    retriever,
+    llm,
+    memory: ConversationBufferWindowMemory,
+    strict_category_check: bool,
+    answer_cache: Optional[SemanticAnswerCache],
+    section_index: Optional[SectionIndex],
+    relevance_classifier: Optional[RelevanceClassifier]
+):
+    """Answer a query; see `get_chat_response`."""
     # Add category context to the query
     enhanced_query = f"[Category: {category}] {query}"
     
-    # If strict category check is enabled, first verify query relevance
+    # Citation queries need neither retrieval nor generation
+    citation = await _lookup_citation(
+        section_index, query, category, language, llm, strict_category_check
+    )
+    if citation is not None:
+        await memory.asave_context({"question": enhanced_query}, {"answer": citation["answer"]})
+        return citation
+    
+    # Serve repeated questions from the semantic answer cache
+    with timed("answer_cache"):
+        cached, query_vector = await _lookup_cached_answer(
+            answer_cache, query, category, language, memory, strict_category_check
+        )
+    if cached is not None:
+        await memory.asave_context({"question": enhanced_query}, {"answer": cached["answer"]})
+        return cached
+    
+    # Condense and retrieve; with the strict category check, this runs
+    # speculatively while relevance is being checked
+    retrieval = _condense_and_retrieve(query, enhanced_query, retriever, llm, memory)
     if strict_category_check:
-        relevance_check = check_category_relevance(query, category, llm)
+        relevance_check, retrieved = await _check_relevance_speculatively(
+            query, category, llm, relevance_classifier, query_vector, retrieval
+        )
         if not relevance_check["is_relevant"]:
             return {
                 "answer": relevance_check["message"],
                 "sources": []
             }
+    else:
+        retrieved = await retrieval
+    question, source_documents = retrieved
     
-    # Setup QA chain
-    qa = ConversationalRetrievalChain.from_llm(
-        llm=llm,
-        retriever=retriever,
-        memory=memory,
-        return_source_documents=True
-    )
+    english_response, response = await answer_from_documents(question, source_documents, language, llm)
+    await memory.asave_context({"question": enhanced_query}, {"answer": english_response})
+    if query_vector is not None:
+        answer_cache.store(query_vector, query, category, language, response, strict_category_check)
     
-    # Get response
-    result = qa({"question": enhanced_query})
+    return response
+
+
+async def answer_from_documents(
+    question: str,
+    source_documents: List[Document],
+    language: str,
+    llm
+) -> Tuple[str, Dict]:
+    """
+    Answer a question from retrieved documents with the pre-built chain and
+    translate the answer if needed.
     
-    # Extract answer and sources
-    english_response = result["answer"]
-    source_documents = result.get("source_documents", [])
+    Args:
+        question: Standalone question
+        source_documents: Passages to answer from
+        language: Response language
+        llm: Language model
+        
+    Returns:
+        Tuple of the English answer and the response (answer and sources)
+    """
+    qa = get_qa_chain(llm)
+    with timed("generation"):
+        async with upstream_slot("llm"):
+            result = await qa.ainvoke({
+                "input_documents": source_documents,
+                "question": question
+            })
+    english_response = result[qa.output_key]
     
     # Extract source filenames
-    sources = []
-    for doc in source_documents:
-        if hasattr(doc, "metadata") and "source" in doc.metadata:
-            source = doc.metadata["source"]
-            if source not in sources:
-                sources.append(source)
+    sources = _extract_sources(source_documents)
     
     # Translate response if needed
     final_response = english_response
     if language != "English" and settings.ENABLE_TRANSLATION:
-        final_response = translate_text(
-            text=english_response, 
-            source_lang="English", 
-            target_lang=language,
-            llm=llm
-        )
+        with timed("translation"):
+            final_response = await translate_text(
+                text=english_response, 
+                source_lang="English", 
+                target_lang=language,
+                llm=llm
+            )
     
-    return {
+    return english_response, {
         "answer": final_response,
         "sources": sources
     }
 
 
-def check_category_relevance(query: str, category: str, llm):
+async def stream_chat_response(
+    query: str,
+    category: str,
+    language: str,
+    retriever,
+    llm,
+    memory: ConversationBufferWindowMemory,
+    strict_category_check: bool = False,
+    answer_cache: Optional[SemanticAnswerCache] = None,
+    section_index: Optional[SectionIndex] = None,
+    relevance_classifier: Optional[RelevanceClassifier] = None
+) -> AsyncIterator[Dict]:
+    """
+    Process a user query and stream the response as it is generated.
+    
+    Runs the same steps as `get_chat_response` (condense, retrieve, answer,
+    translate) with the same prompts, but yields events as soon as each one
+    is available instead of waiting for the whole answer.
+    
+    Args:
+        query: User's question
+        category: Legal category
+        language: Response language
+        retriever: Vector store retriever
+        llm: Language model
+        memory: Conversation memory
+        strict_category_check: Whether to enforce strict category relevance
+        answer_cache: Optional semantic cache for session-independent answers
+        section_index: Optional section index for citation queries
+        relevance_classifier: Optional local classifier for the strict
+            category check
+        
+    Yields:
+        Event dictionaries with "event" ("sources", "token" or "done") and
+        "data"; the "done" data includes per-stage latencies (milliseconds)
+        and the number of LLM calls made
+    """
+    with timing_context() as timings, count_llm_calls() as llm_calls:
+        key = await _coalescing_key(query, category, language, memory, strict_category_check)
+        
+        def start():
+            return _stream_chat_events(
+                query, category, language, retriever, llm, memory,
+                strict_category_check, answer_cache, section_index, relevance_classifier
+            )
+        
+        leader = True
+        if key is None:
+            events = start()
+        else:
+            events, leader = single_flight.join(key, start)
+        first_token = True
+        # Closed with the response, so a shared computation knows at once
+        # when this subscriber has gone
+        async with aclosing(events):
+            async for event in events:
+                if event["event"] == "token" and first_token:
+                    timings.mark("first_token")
+                    first_token = False
+                elif event["event"] == "done":
+                    if not leader:
+                        await _save_coalesced_answer(memory, query, category, event["data"])
+                    event = {"event": "done", "data": {
+                        **event["data"], "timings": timings.snapshot(), "llm_calls": llm_calls.calls
+                    }}
+                yield event
+
+
+async def _stream_chat_events(
+    query: str,
+    category: str,
+    language: str,
+    retriever,
+    llm,
+    memory: ConversationBufferWindowMemory,
+    strict_category_check: bool,
+    answer_cache: Optional[SemanticAnswerCache],
+    section_index: Optional[SectionIndex],
+    relevance_classifier: Optional[RelevanceClassifier]
+) -> AsyncIterator[Dict]:
+    """Yield the events of a streamed answer; see `stream_chat_response`."""
+    enhanced_query = f"[Category: {category}] {query}"
+    
+    cached = await _lookup_citation(
+        section_index, query, category, language, llm, strict_category_check
+    )
+    query_vector = None
+    if cached is None:
+        with timed("answer_cache"):
+            cached, query_vector = await _lookup_cached_answer(
+                answer_cache, query, category, language, memory, strict_category_check
+            )
+    if cached is not None:
+        await memory.asave_context({"question": enhanced_query}, {"answer": cached["answer"]})
+        yield {"event": "sources", "data": {"sources": cached["sources"]}}
+        yield {"event": "token", "data": {"text": cached["answer"]}}
+        yield {"event": "done", "data": cached}
+        return
+    
+    retrieval = _condense_and_retrieve(query, enhanced_query, retriever, llm, memory)
+    if strict_category_check:
+        relevance_check, retrieved = await _check_relevance_speculatively(
+            query, category, llm, relevance_classifier, query_vector, retrieval
+        )
+        if not relevance_check["is_relevant"]:
+            yield {"event": "sources", "data": {"sources": []}}
+            yield {"event": "token", "data": {"text": relevance_check["message"]}}
+            yield {"event": "done", "data": {"answer": relevance_check["message"], "sources": []}}
+            return
+    else:
+        retrieved = await retrieval
+    
+    # Retrieval finishes well before generation, so send sources first
+    question, source_documents = retrieved
+    sources = _extract_sources(source_documents)
+    yield {"event": "sources", "data": {"sources": sources}}
+    
+    english_parts: List[str] = []
+    
+    async def english_tokens():
+        qa_prompt = PROMPT_SELECTOR.get_prompt(llm).format_prompt(
+            context="\n\n".join(doc.page_content for doc in source_documents),
+            question=question
+        )
+        async with upstream_slot("llm"):
+            async for chunk in llm.astream(qa_prompt.to_messages()):
+                english_parts.append(chunk.content)
+                yield chunk.content
+    
+    tokens = english_tokens()
+    if language != "English" and settings.ENABLE_TRANSLATION:
+        tokens = stream_translation(
+            tokens,
+            source_lang="English",
+            target_lang=language,
+            llm=llm
+        )
+    
+    # Generation and (streamed) translation overlap, so they are one stage
+    answer_parts: List[str] = []
+    with timed("generation"):
+        async for token in tokens:
+            if token:
+                answer_parts.append(token)
+                yield {"event": "token", "data": {"text": token}}
+    
+    english_response = "".join(english_parts)
+    await memory.asave_context({"question": enhanced_query}, {"answer": english_response})
+    
+    response = {"answer": "".join(answer_parts), "sources": sources}
+    if query_vector is not None:
+        answer_cache.store(query_vector, query, category, language, response, strict_category_check)
+    
+    yield {"event": "done", "data": response}
+
+
+async def _condense_and_retrieve(
+    query: str,
+    enhanced_query: str,
+    retriever,
+    llm,
+    memory: ConversationBufferWindowMemory
+) -> Tuple[str, List[Document]]:
+    """
+    Condense the question against the chat history, as
+    ConversationalRetrievalChain would, unless it is clearly standalone,
+    then retrieve documents for it and pack them into the context budget.
+    
+    Returns:
+        Tuple of the question to answer and the passages to answer from
+    """
+    question = enhanced_query
+    chat_history = (await memory.aload_memory_variables({}))[memory.memory_key]
+    condense = needs_condensing(query, chat_history)
+    if chat_history:
+        condense_stats.record(condense)
+    if condense:
+        condense_prompt = CONDENSE_QUESTION_PROMPT.format(
+            question=enhanced_query,
+            chat_history=_get_chat_history(chat_history)
+        )
+        with timed("condense"):
+            async with upstream_slot("llm"):
+                condensed = await llm.ainvoke(condense_prompt)
+        question = condensed.content
+    
+    with timed("retrieval"):
+        source_documents = await retriever.ainvoke(question)
+    with timed("context_packing"):
+        source_documents = pack_context(source_documents)
+    return question, source_documents
+
+
+async def _check_relevance_speculatively(
+    query: str,
+    category: str,
+    llm,
+    relevance_classifier: Optional[RelevanceClassifier],
+    query_vector,
+    retrieval: Awaitable
+):
+    """
+    Run the category relevance check and, if speculation is enabled, the
+    retrieval at the same time. Retrieval is cancelled if the query is
+    rejected, and only started after the check otherwise.
+    
+    Returns:
+        Tuple of the relevance check result and the retrieval result (None
+        if the query was rejected)
+    """
+    if not settings.SPECULATIVE_RETRIEVAL_ENABLED:
+        with timed("relevance_check"):
+            relevance_check = await check_category_relevance(
+                query, category, llm, relevance_classifier, query_vector
+            )
+        if not relevance_check["is_relevant"]:
+            retrieval.close()
+            return relevance_check, None
+        return relevance_check, await retrieval
+    
+    speculative = asyncio.ensure_future(retrieval)
+    try:
+        with timed("relevance_check"):
+            relevance_check = await check_category_relevance(
+                query, category, llm, relevance_classifier, query_vector
+            )
+    except BaseException:
+        speculative.cancel()
+        raise
+    if not relevance_check["is_relevant"]:
+        speculative.cancel()
+        speculation_stats.record(wasted=True)
+        return relevance_check, None
+    speculation_stats.record(wasted=False)
+    return relevance_check, await speculative
+
+
+async def _lookup_cached_answer(
+    answer_cache: Optional[SemanticAnswerCache],
+    query: str,
+    category: str,
+    language: str,
+    memory: ConversationBufferWindowMemory,
+    strict_category_check: bool
+):
+    """
+    Look up a session-independent answer in the semantic cache.
+    
+    Requests with chat history are not cacheable, since the answer depends on
+    the conversation so far.
+    
+    Returns:
+        Tuple of the cached response (or None) and the query vector to store
+        the fresh response under (None if the request is not cacheable)
+    """
+    if answer_cache is None:
+        return None, None
+    chat_history = (await memory.aload_memory_variables({}))[memory.memory_key]
+    if chat_history:
+        return None, None
+    return await answer_cache.lookup(query, category, language, strict_category_check)
+
+
+async def _coalescing_key(
+    query: str,
+    category: str,
+    language: str,
+    memory: ConversationBufferWindowMemory,
+    strict_category_check: bool
+) -> Optional[Tuple]:
+    """
+    Key under which identical requests share one computation, or None if
+    the request must be answered on its own (coalescing is disabled or the
+    answer depends on the session's chat history).
+    """
+    if not settings.COALESCING_ENABLED:
+        return None
+    chat_history = (await memory.aload_memory_variables({}))[memory.memory_key]
+    if chat_history:
+        return None
+    return (normalize_query(query), category, language, strict_category_check)
+
+
+async def _response_events(response: Awaitable[Dict]) -> AsyncIterator[Dict]:
+    """Events of a complete response, as a stream would send them."""
+    response = await response
+    yield {"event": "sources", "data": {"sources": response["sources"]}}
+    yield {"event": "token", "data": {"text": response["answer"]}}
+    yield {"event": "done", "data": response}
+
+
+async def _save_coalesced_answer(
+    memory: ConversationBufferWindowMemory, query: str, category: str, response: Dict
+) -> None:
+    """Record an answer computed for another request in this session's memory."""
+    enhanced_query = f"[Category: {category}] {query}"
+    await memory.asave_context({"question": enhanced_query}, {"answer": response["answer"]})
+
+
+async def _lookup_citation(
+    section_index: Optional[SectionIndex],
+    query: str,
+    category: str,
+    language: str,
+    llm,
+    strict_category_check: bool
+) -> Optional[Dict]:
+    """Answer a citation-style query from the section index, if possible."""
+    if section_index is None:
+        return None
+    with timed("citation_lookup"):
+        return await answer_citation(
+            query, category, language, llm, section_index, strict_category_check
+        )
+
+
+def _extract_sources(source_documents) -> List[str]:
+    """Extract unique source filenames from retrieved documents."""
+    sources = []
+    for doc in source_documents:
+        if hasattr(doc, "metadata") and "source" in doc.metadata:
+            source = doc.metadata["source"]
+            if source not in sources:
+                sources.append(source)
+    return sources
+
+
+async def check_category_relevance(
+    query: str,
+    category: str,
+    llm,
+    classifier: Optional[RelevanceClassifier] = None,
+    query_vector=None
+):
     """
     Check if a query is relevant to the specified legal category.
     
+    Clear cases are decided by the local classifier; the LLM is only asked
+    about queries near its decision boundary (or when there is no classifier).
+    
     Args:
         query: User's question
         category: Legal category
         llm: Language model
+        classifier: Optional local relevance classifier
+        query_vector: Embedding of the query, if already computed
         
     Returns:
         Dictionary with relevance check result
     """
+    is_relevant = None
+    if classifier is not None:
+        is_relevant = await classifier.classify(query, category, query_vector)
+    if is_relevant is None:
+        is_relevant = await _ask_category_relevance(query, category, fast_llm(llm))
+    
+    if is_relevant:
+        return {
+            "is_relevant": True,
+            "message": ""
+        }
+    else:
+        return {
+            "is_relevant": False,
+            "message": f"I'm sorry, but your question doesn't appear to be related to the '{category}' category. Please ask a question specifically about {category} or select a different legal category."
+        }
+
+
+async def _ask_category_relevance(query: str, category: str, llm) -> bool:
+    """Ask the LLM whether a query is relevant to a category."""
     prompt = f"""
     You are a legal expert responsible for routing questions to the appropriate department.
     
@@ -107,16 +648,6 @@ def check_category_relevance(query: str, category: str, llm):
     - Respond with only a single word: "YES" or "NO".
     """
     
-    response = llm.invoke(prompt)
-    is_relevant = response.content.strip().upper() == "YES"
-    
-    if is_relevant:
-        return {
-            "is_relevant": True,
-            "message": ""
-        }
-    else:
-        return {
-            "is_relevant": False,
-            "message": f"I'm sorry, but your question doesn't appear to be related to the '{category}' category. Please ask a question specifically about {category} or select a different legal category."
-        }
\ No newline at end of file
+    async with upstream_slot("llm"):
+        response = await llm.ainvoke(prompt)
+    return response.content.strip().upper() == "YES"
\ No newline at end of file
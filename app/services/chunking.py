@@ -0,0 +1,443 @@
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from app.config import settings
+
+# Bump when the statute chunker's output changes, so ingestion re-chunks
+STATUTE_CHUNKER_VERSION = 2
+
+# Lines at the top and bottom of each page checked for running headers/footers
+_EDGE_LINES = 3
+
+# "420. Cheating.—", "1[52A. “Harbour”.—", "20. Protection ... offences. —(1)"
+_SECTION_HEADING = re.compile(
+    r"^\s*(?:\d*\s*\[)?\s*(\d{1,4}[A-Z]{0,3})\s*\.\s+(\S.{0,300}?)\s*\.?\s*[—–―]"
+)
+_SECTION_START = re.compile(r"^\s*(?:\d*\s*\[)?\s*\d{1,4}[A-Z]{0,3}\s*\.\s+\S")
+_CHAPTER = re.compile(r"^\s*CHAPTER\s+([IVXLCDM]+[A-Z]?|\d+[A-Z]?)\b\.?\s*[—–―-]?\s*(.*)$")
+_PART = re.compile(r"^\s*PART\s+([IVXLCDM]+[A-Z]?)\s*$")
+_SCHEDULE = re.compile(r"^\s*(?:THE\s+)?(?:[A-Z]+\s+)?SCHEDULE\s*[—–―.-]?\s*(?:\[.*)?$")
+_ACT_TITLE = re.compile(r"^\s*(THE\s+[A-Z ,()\d]*?(?:ACT|CODE|RULES|CONSTITUTION OF INDIA)(?:,\s*\d{4})?)\W*$")
+# Amendment footnotes, e.g. "1. Subs. by Act 26 of 1955, s. 117 ..."
+_FOOTNOTE = re.compile(r"^\s*\d+\.\s+(?:Subs|Ins|Rep|Omitted|Added|The words|Cl|Sub-s|Vide)\b\.?")
+
+# Minimum section headings for a PDF to be treated as a statute
+_MIN_SECTIONS = 3
+
+# Structural divisions a chunk never spans
+_PACK_BOUNDARIES = ("chapter", "part", "schedule")
+
+# Omitted or repealed provisions, listed the same way in tables of contents
+_OMITTED = re.compile(r"[—–―]\s*(?:Omitted|Rep\.)", re.IGNORECASE)
+
+# A table of contents is a run of at least this many section entries, at
+# most _CONTENTS_MAX_GAP lines apart (wrapped titles, chapter headings), of
+# which less than half have the "—" that opens a section's text
+_CONTENTS_MIN_ENTRIES = 10
+_CONTENTS_MAX_GAP = 6
+
+
+def chunker_signature() -> str:
+    """Identify the chunking configuration; chunks change whenever it does."""
+    if settings.CHUNKING_STRATEGY == "statute":
+        return f"statute-v{STATUTE_CHUNKER_VERSION}:{settings.CHUNK_SIZE}:{settings.STATUTE_CHUNK_OVERLAP}"
+    return f"recursive:{settings.CHUNK_SIZE}:{settings.CHUNK_OVERLAP}"
+
+
+def _normalize_line(line: str) -> str:
+    """Key for spotting repeated lines: digits and spacing are ignored."""
+    return re.sub(r"\s+", " ", re.sub(r"\d+", "#", line)).strip().lower()
+
+
+def strip_boilerplate(pages: List[str]) -> List[List[str]]:
+    """
+    Split pages into lines and drop running headers and footers.
+
+    Lines near the top or bottom of a page that recur (ignoring digits, so
+    page numbers match) on at least 30% of pages are boilerplate, as are
+    bare page numbers and amendment footnotes.
+
+    Args:
+        pages: Text of each page
+
+    Returns:
+        Remaining lines of each page
+    """
+    page_lines = [[line for line in page.splitlines() if line.strip()] for page in pages]
+
+    counts = Counter()
+    for lines in page_lines:
+        edges = lines[:_EDGE_LINES] + lines[-_EDGE_LINES:]
+        counts.update({_normalize_line(line) for line in edges})
+    threshold = max(3, math.ceil(0.3 * len(pages)))
+    repeated = {key for key, count in counts.items() if count >= threshold}
+    repeated.add("#")
+
+    cleaned = []
+    for lines in page_lines:
+        keep = []
+        for i, line in enumerate(lines):
+            at_edge = i < _EDGE_LINES or i >= len(lines) - _EDGE_LINES
+            if at_edge and _normalize_line(line) in repeated:
+                continue
+            if _FOOTNOTE.match(line):
+                continue
+            keep.append(line)
+        cleaned.append(keep)
+    return cleaned
+
+
+def _act_title(page_lines: List[List[str]]) -> Optional[str]:
+    """Title of the act from its first pages, if there is one."""
+    for lines in page_lines[:2]:
+        for line in lines[:10]:
+            match = _ACT_TITLE.match(line)
+            if match:
+                return re.sub(r"\s+", " ", match.group(1)).strip().title().replace("Of ", "of ")
+    return None
+
+
+def _section_heading(lines: List[str], i: int) -> Optional[re.Match]:
+    """Match a section heading starting at line `i` (it may wrap once)."""
+    line = lines[i]
+    if not _SECTION_START.match(line):
+        return None
+    match = _SECTION_HEADING.match(line)
+    if match is None and i + 1 < len(lines) and not _SECTION_START.match(lines[i + 1]):
+        match = _SECTION_HEADING.match(f"{line.rstrip()} {lines[i + 1].lstrip()}")
+    return match
+
+
+def _contents_lines(lines: List[str]) -> set:
+    """
+    Indices of the lines of the table of contents ("ARRANGEMENT OF
+    SECTIONS"), whose entries would otherwise parse as sections without
+    text.
+    """
+    starts = [i for i, line in enumerate(lines) if _SECTION_START.match(line)]
+    runs, run = [], []
+    for i in starts:
+        if run and i - run[-1] > _CONTENTS_MAX_GAP:
+            runs.append(run)
+            run = []
+        run.append(i)
+    if run:
+        runs.append(run)
+
+    dropped = set()
+    for run in runs:
+        if len(run) < _CONTENTS_MIN_ENTRIES:
+            continue
+        headings = sum(1 for i in run if _section_heading(lines, i))
+        if headings >= len(run) / 2:
+            continue
+        first, last = run[0], run[-1]
+        # Headings just above the first entry ("CHAPTER I", "SECTIONS")
+        while first > 0 and first - 1 not in dropped and lines[first - 1].isupper():
+            first -= 1
+        # The last entry's title may wrap
+        for _ in range(2):
+            following = last + 1
+            if following >= len(lines) or lines[following].isupper() or _SECTION_START.match(lines[following]):
+                break
+            last = following
+        dropped.update(range(first, last + 1))
+    return dropped
+
+
+def _section_key(number: str) -> Tuple[int, str]:
+    """Order of section numbers: "10" < "10A" < "10B" < "11"."""
+    digits = re.match(r"\d+", number).group()
+    return int(digits), number[len(digits):]
+
+
+def _drop_repeated_numbers(units: List[Dict]) -> List[Dict]:
+    """
+    Keep one unit per section number. Sections follow each other in order,
+    so the units on the longest increasing run of numbers are the sections;
+    other units repeating one of their numbers (unmatched footnotes,
+    numbered paragraphs) are text of the unit before them.
+    """
+    numbered = [i for i, unit_ in enumerate(units) if unit_["number"] and unit_["schedule"] is None]
+    # Longest strictly increasing subsequence of section numbers
+    tails: List[int] = []
+    previous: Dict[int, Optional[int]] = {}
+    for i in numbered:
+        key = _section_key(units[i]["number"])
+        low, high = 0, len(tails)
+        while low < high:
+            middle = (low + high) // 2
+            if _section_key(units[tails[middle]]["number"]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        previous[i] = tails[low - 1] if low else None
+        if low == len(tails):
+            tails.append(i)
+        else:
+            tails[low] = i
+    kept = set()
+    i = tails[-1] if tails else None
+    while i is not None:
+        kept.add(i)
+        i = previous[i]
+    sections = {units[i]["number"] for i in kept}
+
+    result: List[Dict] = []
+    for i, unit_ in enumerate(units):
+        repeated = i in previous and i not in kept and unit_["number"] in sections
+        if repeated and result and all(result[-1][key] == unit_[key] for key in _PACK_BOUNDARIES):
+            result[-1]["lines"].extend(unit_["lines"])
+        elif repeated:
+            result.append({**unit_, "number": None, "title": None})
+        else:
+            result.append(unit_)
+    return result
+
+
+def parse_statute(pages: List[Document], source: str) -> Dict:
+    """
+    Parse the structure of a statute.
+
+    Text is cut at section (or, for the Constitution, article) headings,
+    after stripping running headers and footers and the table of contents,
+    while tracking the chapter, part and schedule each unit belongs to. Each
+    section number is kept once.
+
+    Args:
+        pages: Pages loaded from the PDF
+        source: File name of the PDF
+
+    Returns:
+        Dictionary with the act name, whether it was found in the text
+        ("titled"), the unit kind ("section" or "article"), the cleaned lines
+        of each page and the parsed units (number, title, lines, page and
+        structural context)
+    """
+    page_lines = strip_boilerplate([page.page_content for page in pages])
+    lines = [(line, number) for number, page in enumerate(page_lines) for line in page]
+    contents = _contents_lines([line for line, _ in lines])
+    lines = [line for i, line in enumerate(lines) if i not in contents]
+    texts = [line for line, _ in lines]
+    title = _act_title(page_lines)
+    act = title or os.path.splitext(source)[0].replace("_", " ")
+    unit = "article" if "constitution" in act.lower() else "section"
+
+    # Walk the lines, opening a new unit at every structural heading
+    units = []
+    context = {"chapter": None, "part": None, "schedule": None}
+    current = None
+    pending_title = None
+    seen_section = False
+    i = 0
+    while i < len(texts):
+        line = texts[i]
+        heading = None
+        if context["schedule"] is None:
+            heading = _section_heading(texts, i)
+        chapter = _CHAPTER.match(line)
+        part = _PART.match(line)
+        # Schedules follow the body of an act; the table of contents before
+        # the first section may list them too
+        schedule = _SCHEDULE.match(line) if seen_section else None
+
+        if chapter or part or schedule:
+            if chapter:
+                title = chapter.group(2).strip(" .—–―-\uf0be")
+                context["chapter"] = f"CHAPTER {chapter.group(1)}" + (f" {title}" if title else "")
+                pending_title = None if title else "chapter"
+            elif part:
+                context["part"] = f"PART {part.group(1)}"
+                context["chapter"] = None
+                pending_title = "part"
+            else:
+                context["schedule"] = line.strip()
+                context["chapter"] = None
+            current = {"number": None, "title": None, "lines": [], "page": lines[i][1], **context}
+            units.append(current)
+            i += 1
+            continue
+
+        if pending_title and line.isupper():
+            # Title line following a bare "CHAPTER III" / "PART XIII"
+            context[pending_title] = f"{context[pending_title]} {line.strip()}"
+            current[pending_title] = context[pending_title]
+            pending_title = None
+            i += 1
+            continue
+        pending_title = None
+
+        if heading:
+            seen_section = seen_section or not _OMITTED.search(heading.string)
+            current = {
+                "number": heading.group(1),
+                "title": re.sub(r"\s+", " ", heading.group(2)).strip(" .“”\"[]"),
+                "lines": [],
+                "page": lines[i][1],
+                **context,
+            }
+            units.append(current)
+        elif current is None:
+            current = {"number": None, "title": None, "lines": [], "page": lines[i][1], **context}
+            units.append(current)
+        current["lines"].append(line)
+        i += 1
+
+    return {
+        "act": act,
+        "titled": title is not None,
+        "unit": unit,
+        "page_lines": page_lines,
+        "units": _drop_repeated_numbers([unit_ for unit_ in units if unit_["lines"]]),
+    }
+
+
+def _is_statute(parsed: Dict) -> bool:
+    return sum(1 for unit_ in parsed["units"] if unit_["number"]) >= _MIN_SECTIONS
+
+
+def split_statute(pages: List[Document], source: str, parsed: Optional[Dict] = None) -> List[Document]:
+    """
+    Split a statute into chunks along its structure.
+
+    Short consecutive sections of the same chapter are packed into one chunk
+    up to CHUNK_SIZE, and sections longer than that are split at sub-section
+    boundaries. Every chunk carries the act, chapter, part, schedule and
+    section numbers as metadata. PDFs without recognisable sections (guides,
+    notes) are split by size only.
+
+    Args:
+        pages: Pages loaded from the PDF
+        source: File name of the PDF
+        parsed: Result of `parse_statute`, if already parsed
+
+    Returns:
+        Chunks in document order
+    """
+    parsed = parsed or parse_statute(pages, source)
+    if not _is_statute(parsed):
+        return split_recursive(
+            [Document(page_content="\n".join(lines_), metadata=page.metadata)
+             for lines_, page in zip(parsed["page_lines"], pages)]
+        )
+    return _pack_units(parsed["units"], pages, parsed["act"], parsed["unit"])
+
+
+def extract_sections(parsed: Dict, source: str) -> List[Dict]:
+    """
+    Verbatim text of every section (or article) of a parsed statute, for
+    the citation index. Documents whose act title was not found (guides,
+    notes) have no citable sections.
+
+    Args:
+        parsed: Result of `parse_statute`
+        source: File name of the PDF
+
+    Returns:
+        Section dictionaries with source, act, unit, number, heading, page
+        and text
+    """
+    if not parsed["titled"] or not _is_statute(parsed):
+        return []
+    sections = []
+    for unit_ in parsed["units"]:
+        # Schedules have their own numbered paragraphs; they are not citable
+        # as sections of the act
+        if unit_["number"] is None or unit_["schedule"] is not None:
+            continue
+        sections.append({
+            "source": source,
+            "act": parsed["act"],
+            "unit": parsed["unit"],
+            "number": unit_["number"],
+            "heading": unit_["title"],
+            "page": unit_["page"],
+            "text": "\n".join(unit_["lines"]).strip(),
+        })
+    return sections
+
+
+def _pack_units(units: List[Dict], pages: List[Document], act: str, unit: str) -> List[Document]:
+    """Split long units into pieces, then pack pieces into chunks."""
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=settings.CHUNK_SIZE,
+        chunk_overlap=settings.STATUTE_CHUNK_OVERLAP,
+        separators=["\n(", "\nExplanation", "\nIllustration", "\n", ". ", " ", ""]
+    )
+    pieces = []
+    for unit_ in units:
+        text = "\n".join(unit_["lines"]).strip()
+        if len(text) <= settings.CHUNK_SIZE:
+            pieces.append({**unit_, "text": text})
+            continue
+        label = f"{unit.title()} {unit_['number']}" if unit_["number"] else None
+        for n, part in enumerate(splitter.split_text(text)):
+            # Continuations would otherwise not say which provision they belong to
+            if n and label:
+                part = f"[{label} (continued)]\n{part}"
+            pieces.append({**unit_, "text": part})
+
+    chunks = []
+    group: List[Dict] = []
+    size = 0
+    for piece in pieces:
+        same_context = group and all(
+            group[0][key] == piece[key] for key in _PACK_BOUNDARIES
+        )
+        if group and (not same_context or size + len(piece["text"]) + 1 > settings.CHUNK_SIZE):
+            chunks.append(_chunk_document(group, pages, act, unit))
+            group, size = [], 0
+        group.append(piece)
+        size += len(piece["text"]) + 1
+    if group:
+        chunks.append(_chunk_document(group, pages, act, unit))
+    return chunks
+
+
+def _chunk_document(group: List[Dict], pages: List[Document], act: str, unit: str) -> Document:
+    """Build a chunk from consecutive pieces, with structural metadata."""
+    first = group[0]
+    numbers = list(dict.fromkeys(piece["number"] for piece in group if piece["number"]))
+    metadata = {
+        **pages[first["page"]].metadata,
+        "act": act,
+        "unit": unit,
+        "chapter": first["chapter"],
+        "part": first["part"],
+        "schedule": first["schedule"],
+        "section": numbers[0] if numbers else None,
+        "sections": numbers,
+        "heading": first["title"],
+    }
+    text = "\n".join(piece["text"] for piece in group)
+    return Document(page_content=text, metadata=metadata)
+
+
+def split_recursive(pages: List[Document]) -> List[Document]:
+    """Split pages into fixed-size overlapping chunks (CHUNK_SIZE/CHUNK_OVERLAP)."""
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=settings.CHUNK_SIZE,
+        chunk_overlap=settings.CHUNK_OVERLAP
+    )
+    return text_splitter.split_documents(pages)
+
+
+def split_pdf_pages(pages: List[Document], source: str) -> Tuple[List[Document], List[Dict]]:
+    """
+    Split the pages of a PDF with the configured CHUNKING_STRATEGY.
+
+    Returns:
+        Tuple of the chunks and the citable sections (see `extract_sections`)
+    """
+    parsed = parse_statute(pages, source)
+    if settings.CHUNKING_STRATEGY == "statute":
+        chunks = split_statute(pages, source, parsed)
+    else:
+        chunks = split_recursive(pages)
+    return chunks, extract_sections(parsed, source)
@@ -0,0 +1,143 @@
+import asyncio
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.config import settings
+from app.services.embedding import categories_for_source
+from app.services.limits import upstream_slot
+from app.services.section_index import SectionIndex
+from app.services.translation import translate_text
+
+# "Section 302", "sec. 420", "Article 21", "Art 21A"
+_CITATION = re.compile(r"\b(section|sec|article|art)\b\.?\s*(\d{1,4}[a-z]{0,3})\b", re.IGNORECASE)
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Words a pure "what does Section X say" query may contain besides the citation
+_FILLER = frozenset(
+    "what whats does do is are say says said state states stated the a of in under "
+    "text full provision provisions read reads tell me about show give quote contents "
+    "content please exact verbatim wording meaning mean means".split()
+)
+
+# Abbreviations users cite acts by
+ACT_ALIASES = {
+    "ipc": "The Indian Penal Code",
+    "coi": "The Constitution of India",
+    "constitution": "The Constitution of India",
+}
+
+
+def parse_citation(query: str) -> Optional[Dict]:
+    """
+    Recognise queries that only ask for the text of one provision, such as
+    "What does Section 302 IPC say?" or "Article 21".
+
+    Args:
+        query: User's question
+
+    Returns:
+        Dictionary with the unit ("section" or "article"), number and the
+        remaining words naming the act, or None for other queries
+    """
+    matches = list(_CITATION.finditer(query))
+    if len(matches) != 1:
+        return None
+    match = matches[0]
+    unit, number = _provision(match)
+    rest = query[:match.start()] + " " + query[match.end():]
+    act_words = {word for word in _WORD.findall(rest.lower()) if word not in _FILLER}
+    return {"unit": unit, "number": number, "act_words": act_words}
+
+
+def cited_provisions(query: str) -> Tuple[Tuple[str, str], ...]:
+    """
+    Every provision a query cites, e.g. (("section", "302"),) for
+    "punishment under section 302", in a canonical order.
+    """
+    return tuple(sorted({_provision(match) for match in _CITATION.finditer(query)}))
+
+
+def _provision(match: re.Match) -> Tuple[str, str]:
+    unit = "article" if match.group(1).lower().startswith("art") else "section"
+    return unit, match.group(2).upper()
+
+
+def _act_words(act: str) -> Set[str]:
+    words = {word for word in _WORD.findall(act.lower()) if word not in _FILLER}
+    words.update(alias for alias, name in ACT_ALIASES.items() if name == act)
+    return words | {"act", "code"}
+
+
+def _candidate_acts(index: SectionIndex, citation: Dict, category: str, strict: bool) -> List[str]:
+    """Acts a citation may refer to, narrowed by category when ambiguous."""
+    acts = [
+        act for act, (unit, _) in index.acts.items()
+        if unit == citation["unit"] and citation["act_words"] <= _act_words(act)
+    ]
+    in_category = [act for act in acts if category in categories_for_source(index.acts[act][1])]
+    return in_category if strict or len(acts) > 1 else acts
+
+
+def format_provision(provision: Dict) -> str:
+    """Verbatim provision with a citation line."""
+    title = f"{provision['act']}, {provision['unit'].title()} {provision['number']}"
+    if provision["heading"]:
+        title = f"{title} ({provision['heading']})"
+    return f"{title}:\n\n{provision['text']}"
+
+
+async def answer_citation(
+    query: str,
+    category: str,
+    language: str,
+    llm,
+    index: SectionIndex,
+    strict_category_check: bool = False
+) -> Optional[Dict]:
+    """
+    Answer a citation-style query with the verbatim provision from the
+    section index, without retrieval or (unless summaries are enabled) an
+    LLM call.
+
+    Args:
+        query: User's question
+        category: Legal category
+        language: Response language
+        llm: Language model, used for the optional summary and translation
+        index: Section index
+        strict_category_check: Only answer from acts in the category
+
+    Returns:
+        Dictionary with answer and sources, or None if the query is not a
+        citation of exactly one indexed provision
+    """
+    citation = parse_citation(query)
+    if citation is None:
+        return None
+
+    acts = _candidate_acts(index, citation, category, strict_category_check)
+    matches = await asyncio.to_thread(index.lookup, citation["unit"], citation["number"], acts)
+    index.record(len(matches) == 1)
+    if len(matches) != 1:
+        return None
+    provision = matches[0]
+
+    answer = format_provision(provision)
+    if settings.CITATION_SUMMARY_ENABLED:
+        answer = f"{answer}\n\nSummary: {await summarize_provision(provision, llm)}"
+    if language != "English" and settings.ENABLE_TRANSLATION:
+        answer = await translate_text(answer, source_lang="English", target_lang=language, llm=llm)
+
+    return {"answer": answer, "sources": [provision["source"]]}
+
+
+async def summarize_provision(provision: Dict, llm) -> str:
+    """Summarise a provision in plain language in a couple of sentences."""
+    prompt = f"""
+    Summarise the following legal provision in plain language in at most two sentences, without adding anything that is not in the text.
+
+    {format_provision(provision)}
+    """
+    async with upstream_slot("llm"):
+        response = await llm.ainvoke(prompt)
+    return response.content.strip()
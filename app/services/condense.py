@@ -0,0 +1,79 @@
+import re
+import threading
+from typing import Dict, List
+
+from langchain_core.messages import BaseMessage
+
+from app.config import settings
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Words that point back at earlier turns ("is it bailable?", "what about
+# the second one?"). "it" and "that" also occur in standalone questions
+# ("is it legal to ..."), which only costs an unneeded condense.
+_REFERENCES = frozenset(
+    "it its this that these those they them their theirs he him his she her hers "
+    "there such same above former latter previous earlier mentioned said "
+    "also too else again another other others more one ones".split()
+)
+
+# Openings of elliptical follow-ups ("and for minors?", "what if he refuses?")
+_FOLLOW_UP = re.compile(
+    r"^\s*(?:and|but|or|so|then|what about|how about|what if|and if|if so|if not|"
+    r"in that case|ok|okay|why not|how come)\b",
+    re.IGNORECASE
+)
+
+
+def needs_condensing(query: str, chat_history: List[BaseMessage]) -> bool:
+    """
+    Decide whether a question must be rewritten against the chat history
+    before retrieval, or can be used as it is.
+
+    Only questions that are clearly standalone skip the rewrite: long enough,
+    not opening like a follow-up and without words referring back.
+
+    Args:
+        query: User's question
+        chat_history: Messages of the conversation so far
+
+    Returns:
+        True if the question should be condensed
+    """
+    if not chat_history:
+        return False
+    if not settings.CONDENSE_HEURISTICS_ENABLED:
+        return True
+    if _FOLLOW_UP.match(query):
+        return True
+    words = _WORD.findall(query.lower())
+    if len(words) < settings.CONDENSE_MIN_WORDS:
+        return True
+    return any(word in _REFERENCES for word in words)
+
+
+class CondenseStats:
+    """Counts how often follow-up questions were condensed or used as is."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.condensed = 0
+        self.skipped = 0
+
+    def record(self, condensed: bool) -> None:
+        with self._lock:
+            if condensed:
+                self.condensed += 1
+            else:
+                self.skipped += 1
+
+    def stats(self) -> Dict:
+        total = self.condensed + self.skipped
+        return {
+            "condensed": self.condensed,
+            "skipped": self.skipped,
+            "skip_rate": self.skipped / total if total else 0.0,
+        }
+
+
+condense_stats = CondenseStats()
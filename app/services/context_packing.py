@@ -0,0 +1,200 @@
+import re
+import threading
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.config import settings
+
+_WORD = re.compile(r"\w+")
+
+# Word shingles and hash functions of the MinHash signatures
+_SHINGLE_SIZE = 5
+_MINHASH_PERMUTATIONS = 64
+_MINHASH_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(1234)
+_MINHASH_A = _rng.integers(1, _MINHASH_PRIME, _MINHASH_PERMUTATIONS, dtype=np.uint64)
+_MINHASH_B = _rng.integers(0, _MINHASH_PRIME, _MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+# Where a trimmed passage may be cut: after a sentence or at a line break
+_CUT = re.compile(r"(?<=[.;:])\s|\n")
+
+
+def count_tokens(text: str) -> int:
+    """Rough token count of a text (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+def minhash(text: str) -> np.ndarray:
+    """MinHash signature of a text's word shingles."""
+    words = _WORD.findall(text.lower())
+    shingles = {
+        " ".join(words[i:i + _SHINGLE_SIZE])
+        for i in range(max(1, len(words) - _SHINGLE_SIZE + 1))
+    }
+    hashes = np.array([zlib.crc32(shingle.encode("utf-8")) for shingle in shingles], dtype=np.uint64)
+    return ((_MINHASH_A[:, None] * hashes[None, :] + _MINHASH_B[:, None]) % _MINHASH_PRIME).min(axis=1)
+
+
+def _overlap(first: str, second: str, min_chars: int) -> int:
+    """Length of the longest suffix of `first` that `second` starts with."""
+    if len(first) < min_chars or len(second) < min_chars:
+        return 0
+    probe = second[:min_chars]
+    end = len(first)
+    while True:
+        start = first.rfind(probe, 0, end)
+        if start == -1:
+            return 0
+        if second.startswith(first[start:]):
+            return len(first) - start
+        end = start + min_chars - 1
+
+
+def _merge(first: Document, second: Document, min_chars: int) -> Optional[Document]:
+    """
+    Merge two chunks of the same source if one contains the other or they
+    overlap end to start, keeping the metadata of `first`.
+    """
+    if first.metadata.get("source") != second.metadata.get("source"):
+        return None
+    a, b = first.page_content, second.page_content
+    if b in a:
+        return first
+    if a in b:
+        return Document(page_content=b, metadata=first.metadata)
+    overlap = _overlap(a, b, min_chars)
+    if overlap:
+        return Document(page_content=a + b[overlap:], metadata=first.metadata)
+    overlap = _overlap(b, a, min_chars)
+    if overlap:
+        return Document(page_content=b + a[overlap:], metadata=first.metadata)
+    return None
+
+
+def merge_neighbours(documents: List[Document], min_chars: int = settings.CONTEXT_MIN_OVERLAP_CHARS) -> List[Document]:
+    """
+    Merge chunks of the same source that overlap (the chunk overlap of the
+    splitter) or contain one another into single passages. A merged passage
+    takes the place of its best-ranked chunk.
+    """
+    passages = list(documents)
+    i = 0
+    while i < len(passages):
+        j = i + 1
+        while j < len(passages):
+            merged = _merge(passages[i], passages[j], min_chars)
+            if merged is not None:
+                passages[i] = merged
+                del passages[j]
+                # The longer passage may now overlap chunks already compared
+                j = i + 1
+            else:
+                j += 1
+        i += 1
+    return passages
+
+
+def drop_near_duplicates(documents: List[Document], threshold: float = settings.CONTEXT_DEDUP_THRESHOLD) -> List[Document]:
+    """
+    Drop passages whose estimated Jaccard similarity (MinHash over word
+    shingles) with a better-ranked passage reaches `threshold`.
+    """
+    kept: List[Document] = []
+    signatures: List[np.ndarray] = []
+    for doc in documents:
+        signature = minhash(doc.page_content)
+        if any(np.mean(signature == other) >= threshold for other in signatures):
+            continue
+        kept.append(doc)
+        signatures.append(signature)
+    return kept
+
+
+def _trim(text: str, max_tokens: int) -> str:
+    """Cut a text to about `max_tokens`, at a sentence or line end if possible."""
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    cuts = [match.start() for match in _CUT.finditer(text, 0, max_chars)]
+    return text[:cuts[-1]].rstrip() if cuts else text[:max_chars].rstrip()
+
+
+def fit_to_budget(
+    documents: List[Document],
+    budget: int = settings.CONTEXT_TOKEN_BUDGET,
+    min_tokens: int = settings.CONTEXT_MIN_PASSAGE_TOKENS
+) -> List[Document]:
+    """
+    Keep passages in rank order until the token budget is spent. The first
+    passage that does not fit is trimmed to the remaining budget if at least
+    `min_tokens` of it would be left.
+    """
+    packed: List[Document] = []
+    remaining = budget
+    for doc in documents:
+        tokens = count_tokens(doc.page_content)
+        if tokens <= remaining:
+            packed.append(doc)
+            remaining -= tokens
+            continue
+        if remaining >= min_tokens:
+            packed.append(Document(page_content=_trim(doc.page_content, remaining), metadata=doc.metadata))
+        break
+    return packed
+
+
+class PackingStats:
+    """Prompt tokens of retrieved and packed context, over all requests."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+
+    def record(self, tokens_in: int, tokens_out: int) -> None:
+        with self._lock:
+            self.requests += 1
+            self.tokens_in += tokens_in
+            self.tokens_out += tokens_out
+
+    def stats(self) -> Dict:
+        saved = self.tokens_in - self.tokens_out
+        return {
+            "requests": self.requests,
+            "tokens_retrieved": self.tokens_in,
+            "tokens_packed": self.tokens_out,
+            "tokens_saved": saved,
+            "saved_rate": saved / self.tokens_in if self.tokens_in else 0.0,
+        }
+
+
+packing_stats = PackingStats()
+
+
+def pack_context(documents: List[Document]) -> List[Document]:
+    """
+    Turn retrieved chunks (best first) into the passages put in the prompt:
+    overlapping neighbours are merged, near-duplicates dropped and the rest
+    trimmed to CONTEXT_TOKEN_BUDGET, still in rank order.
+
+    Args:
+        documents: Retrieved chunks, best first
+
+    Returns:
+        Passages to answer from, best first
+    """
+    if not settings.CONTEXT_PACKING_ENABLED or not documents:
+        return documents
+    tokens_in = sum(count_tokens(doc.page_content) for doc in documents)
+    passages = fit_to_budget(drop_near_duplicates(merge_neighbours(documents)))
+    tokens_out = sum(count_tokens(doc.page_content) for doc in passages)
+    packing_stats.record(tokens_in, tokens_out)
+    print(
+        f"Packed {len(documents)} chunks into {len(passages)} passages: "
+        f"{tokens_in} -> {tokens_out} context tokens ({tokens_in - tokens_out} saved)"
+    )
+    return passages
@@ -0,0 +1,109 @@
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import Mapping
+from typing import Iterator, List, Optional, Union
+
+from langchain_community.docstore.base import Docstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+# SQLite file holding the chunks of a saved vector store, read by the API
+DOCSTORE_FILE = "docstore.sqlite3"
+
+
+def write_sqlite_docstore(vectors: FAISS, path: str) -> None:
+    """
+    Write the chunks of a vector store, and their index positions, to a
+    SQLite file at `path`.
+
+    Args:
+        vectors: Vector store to export
+        path: File to write (replaced if it exists)
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute(
+            "CREATE TABLE docs ("
+            "position INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE, "
+            "page_content TEXT NOT NULL, metadata TEXT NOT NULL)"
+        )
+        rows = []
+        for position, doc_id in vectors.index_to_docstore_id.items():
+            doc = vectors.docstore.search(doc_id)
+            rows.append((position, doc_id, doc.page_content, json.dumps(doc.metadata, default=str)))
+        conn.executemany("INSERT INTO docs VALUES (?, ?, ?, ?)", rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class ReadOnlyConnection:
+    """
+    Read-only SQLite connection, opened once and shared by every thread
+    (searches run in a pool). The file stays open, so after a re-ingest
+    swaps in a new file, this keeps reading the version it was opened on.
+    """
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(
+            f"file:{os.path.abspath(path)}?mode=ro", uri=True, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+
+    def fetchall(self, sql: str, parameters: tuple = ()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, parameters).fetchall()
+
+    def fetchone(self, sql: str, parameters: tuple = ()) -> Optional[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, parameters).fetchone()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class SQLiteDocstore(Docstore):
+    """
+    Read-only docstore that looks chunks up in SQLite on demand instead of
+    unpickling all of them into every worker. The file is shared through
+    the OS page cache, so workers only pay for the rows they read.
+    """
+
+    def __init__(self, connection: ReadOnlyConnection):
+        self._connection = connection
+
+    def search(self, search: str) -> Union[str, Document]:
+        row = self._connection.fetchone(
+            "SELECT page_content, metadata FROM docs WHERE id = ?", (search,)
+        )
+        if row is None:
+            return f"ID {search} not found."
+        return Document(id=search, page_content=row[0], metadata=json.loads(row[1]))
+
+
+class SQLiteIndexMap(Mapping):
+    """Index position -> docstore ID mapping read from a SQLite docstore."""
+
+    def __init__(self, connection: ReadOnlyConnection):
+        self._connection = connection
+        self._length = None
+
+    def __getitem__(self, position: int) -> str:
+        row = self._connection.fetchone("SELECT id FROM docs WHERE position = ?", (int(position),))
+        if row is None:
+            raise KeyError(position)
+        return row[0]
+
+    def __len__(self) -> int:
+        if self._length is None:
+            self._length = self._connection.fetchone("SELECT COUNT(*) FROM docs")[0]
+        return self._length
+
+    def __iter__(self) -> Iterator[int]:
+        rows = self._connection.fetchall("SELECT position FROM docs ORDER BY position")
+        return (position for position, in rows)
@@ -1,20 +1,359 @@
+import asyncio
+import fnmatch
+import hashlib
+import json
 import os
+import random
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from uuid import uuid4
+import faiss
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
-from langchain_community.document_loaders import PyPDFDirectoryLoader
+from langchain_community.document_loaders import PyPDFLoader
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 
 from app.config import settings
+from app.services.chunking import chunker_signature, split_pdf_pages
+from app.services.embedding_cache import CachedEmbeddings
+from app.services.section_index import section_index_path, update_section_index
+from app.services.vector_index import reconstruct_all, save_search_index, save_vector_store
 
-def embed_and_save_documents(data_dir="./LEGAL-DATA"):
+# File written next to the saved index to mark each rebuild
+VERSION_FILE = "VERSION"
+
+# Ingestion manifest recording file and chunk hashes of the saved index
+MANIFEST_FILE = "manifest.json"
+
+# Sub-directory holding the per-category partitions of the index
+CATEGORIES_DIR = "categories"
+
+def write_store_version(store_path=None):
+    """Mark the vector store at `store_path` as rebuilt with a new version."""
+    store_path = store_path or settings.VECTOR_STORE_PATH
+    with open(os.path.join(store_path, VERSION_FILE), "w") as f:
+        f.write(uuid4().hex)
+
+def read_store_version(store_path=None):
+    """Read the current vector store version, or None if it was never written."""
+    store_path = store_path or settings.VECTOR_STORE_PATH
+    try:
+        with open(os.path.join(store_path, VERSION_FILE)) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+def category_slug(category):
+    """URL/path friendly name of a legal category."""
+    return category.lower().replace(" ", "-")
+
+def category_store_path(category, store_path=None):
+    """Path of a category's partition of the vector store."""
+    store_path = store_path or settings.VECTOR_STORE_PATH
+    return os.path.join(store_path, CATEGORIES_DIR, category_slug(category))
+
+def categories_for_source(source):
+    """Legal categories whose corpus includes the given source file."""
+    return [
+        category for category, patterns in settings.CATEGORY_SOURCES.items()
+        if any(fnmatch.fnmatch(source.lower(), pattern.lower()) for pattern in patterns)
+    ]
+
+def load_manifest(store_path=None):
+    """Load the ingestion manifest of a saved vector store."""
+    store_path = store_path or settings.VECTOR_STORE_PATH
+    try:
+        with open(os.path.join(store_path, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"files": {}}
+
+def save_manifest(manifest, store_path=None):
+    """Save the ingestion manifest next to the vector store."""
+    store_path = store_path or settings.VECTOR_STORE_PATH
+    with open(os.path.join(store_path, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+def hash_file(path):
+    """Compute the SHA-256 hash of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def chunk_id(source, text):
+    """Content-addressed ID of a chunk, used as its docstore ID."""
+    return hashlib.sha256(f"{source}\x00{text}".encode("utf-8")).hexdigest()
+
+def load_and_split_pdf(path):
+    """
+    Load a PDF file and split it into chunks with content-hashed IDs, using
+    the configured CHUNKING_STRATEGY.
+    
+    Identical chunks within a file are only kept once.
+    
+    Args:
+        path: Path to the PDF file
+    
+    Returns:
+        Tuple of a dictionary mapping chunk IDs to documents (in document
+        order) and the citable sections of the file
+    """
+    source = os.path.basename(path)
+    docs = PyPDFLoader(path).load()
+    split_docs, sections = split_pdf_pages(docs, source)
+    chunks = {}
+    for doc in split_docs:
+        # Ensure metadata includes the source file name and its categories
+        doc.metadata['source'] = source
+        doc.metadata['categories'] = categories_for_source(source)
+        chunks.setdefault(chunk_id(source, doc.page_content), doc)
+    return chunks, sections
+
+def diff_files(data_dir, manifest, reparse=False):
     """
-    Load PDF documents, split them into chunks, embed them, and save to disk.
+    Compare the PDFs in `data_dir` against the manifest of the saved index.
+    
+    Args:
+        data_dir: Directory containing PDF files
+        manifest: Manifest of the saved index
+        reparse: Treat every file as changed (chunks that did not change
+            are still not re-embedded)
+    
+    Returns:
+        Ingestion plan with per-file change lists, the file hashes, the new
+        manifest (so far holding unchanged files only), the chunks to embed
+        ("add", filled in once new and changed files are parsed), the chunk
+        IDs to delete and the citable sections of each parsed file
+    """
+    pdf_files = sorted(f for f in os.listdir(data_dir) if f.lower().endswith('.pdf'))
+    old_files = manifest.get("files", {})
+    chunker = chunker_signature()
+    # Files chunked with other settings are re-chunked as if they changed
+    rechunk = reparse or manifest.get("chunker") != chunker
+    plan = {
+        "manifest": {"files": {}, "chunker": chunker},
+        "hashes": {},
+        "add": {},
+        "delete": [],
+        "sections": {},
+        "new_files": [],
+        "changed_files": [],
+        "removed_files": sorted(set(old_files) - set(pdf_files)),
+        "unchanged_files": [],
+    }
+    
+    for name in plan["removed_files"]:
+        plan["delete"].extend(old_files[name]["chunks"])
+    
+    for name in pdf_files:
+        file_hash = hash_file(os.path.join(data_dir, name))
+        plan["hashes"][name] = file_hash
+        old = old_files.get(name)
+        if old is None:
+            plan["new_files"].append(name)
+        elif old["hash"] != file_hash or rechunk:
+            plan["changed_files"].append(name)
+        else:
+            plan["unchanged_files"].append(name)
+            plan["manifest"]["files"][name] = old
+    
+    return plan
+
+def print_plan(plan):
+    """Print a summary of what an ingestion run changes."""
+    print(f"New files: {len(plan['new_files'])} {', '.join(plan['new_files'])}")
+    print(f"Changed files: {len(plan['changed_files'])} {', '.join(plan['changed_files'])}")
+    print(f"Removed files: {len(plan['removed_files'])} {', '.join(plan['removed_files'])}")
+    print(f"Unchanged files: {len(plan['unchanged_files'])}")
+
+async def embed_with_retry(embeddings, texts):
+    """
+    Embed texts, retrying failed requests with exponential backoff and jitter.
+    
+    Args:
+        embeddings: Embeddings model
+        texts: Texts to embed
+    
+    Returns:
+        List of embedding vectors
+    """
+    for attempt in range(settings.INGEST_MAX_RETRIES + 1):
+        try:
+            return await embeddings.aembed_documents(texts)
+        except Exception as e:
+            if attempt == settings.INGEST_MAX_RETRIES:
+                raise
+            delay = settings.INGEST_RETRY_BACKOFF * (2 ** attempt) * (1 + random.random())
+            print(f"Embedding request failed ({e}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+async def run_ingestion_pipeline(data_dir, manifest, plan, embeddings, vectors=None, dry_run=False):
+    """
+    Parse, chunk and embed new and changed files as a pipeline.
+    
+    PDFs are parsed and split across a process pool. As each file finishes,
+    its chunks are diffed against the manifest and new chunks are streamed
+    into embedding batches. Up to INGEST_MAX_IN_FLIGHT batches are embedded
+    concurrently, and their vectors are added straight into one index.
     
     Args:
         data_dir: Directory containing PDF files
+        manifest: Manifest of the saved index
+        plan: Ingestion plan from `diff_files`, completed in place
+        embeddings: Embeddings model
+        vectors: Existing vector store to add to, or None to create one
+        dry_run: Only fill in the plan, without embedding anything
     
     Returns:
-        Number of chunks created
+        The updated vector store (None if nothing was embedded into a new one)
+    """
+    loop = asyncio.get_running_loop()
+    old_files = manifest.get("files", {})
+    in_flight = asyncio.Semaphore(settings.INGEST_MAX_IN_FLIGHT)
+    tasks = []
+    batch_ids = []
+    
+    async def embed_batch(ids):
+        nonlocal vectors
+        try:
+            docs = [plan["add"][cid] for cid in ids]
+            texts = [doc.page_content for doc in docs]
+            text_embeddings = list(zip(texts, await embed_with_retry(embeddings, texts)))
+        finally:
+            in_flight.release()
+        metadatas = [doc.metadata for doc in docs]
+        if vectors is None:
+            vectors = FAISS.from_embeddings(text_embeddings, embeddings, metadatas=metadatas, ids=ids)
+        else:
+            vectors.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+    
+    async def submit_batch():
+        nonlocal batch_ids
+        # Wait for a free slot so parsing never runs far ahead of embedding
+        await in_flight.acquire()
+        tasks.append(asyncio.create_task(embed_batch(batch_ids)))
+        batch_ids = []
+    
+    async def parse(pool, name):
+        chunks, sections = await loop.run_in_executor(pool, load_and_split_pdf, os.path.join(data_dir, name))
+        return name, chunks, sections
+    
+    files = plan["new_files"] + plan["changed_files"]
+    try:
+        with ProcessPoolExecutor(max_workers=settings.INGEST_PARSE_WORKERS) as pool:
+            for parsed in asyncio.as_completed([parse(pool, name) for name in files]):
+                name, chunks, sections = await parsed
+                plan["sections"][name] = sections
+                old_chunks = set(old_files[name]["chunks"]) if name in old_files else set()
+                plan["delete"].extend(cid for cid in old_chunks if cid not in chunks)
+                plan["manifest"]["files"][name] = {"hash": plan["hashes"][name], "chunks": list(chunks)}
+                for cid, doc in chunks.items():
+                    if cid in old_chunks or cid in plan["add"]:
+                        continue
+                    plan["add"][cid] = doc
+                    if dry_run:
+                        continue
+                    batch_ids.append(cid)
+                    if len(batch_ids) == settings.INGEST_EMBEDDING_BATCH_SIZE:
+                        await submit_batch()
+        if batch_ids and not dry_run:
+            await submit_batch()
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    
+    return vectors
+
+def build_category_partitions(vectors, store_path=None):
+    """
+    Split the global index into one sub-index per legal category.
+    
+    Vectors are copied out of the global index, so no embedding calls are
+    made. Categories are resolved from each chunk's source file with the
+    current CATEGORY_SOURCES.
+    
+    Args:
+        vectors: Global vector store
+        store_path: Directory of the global vector store
+    
+    Returns:
+        Dictionary mapping categories to their number of chunks
+    """
+    positions = {category: [] for category in settings.LEGAL_CATEGORIES}
+    for position, doc_id in vectors.index_to_docstore_id.items():
+        doc = vectors.docstore.search(doc_id)
+        for category in categories_for_source(doc.metadata.get("source", "")):
+            if category in positions:
+                positions[category].append(position)
+    
+    all_vectors = reconstruct_all(vectors.index)
+    counts = {}
+    for category, category_positions in positions.items():
+        path = category_store_path(category, store_path)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        counts[category] = len(category_positions)
+        if not category_positions:
+            continue
+        
+        doc_ids = [vectors.index_to_docstore_id[position] for position in category_positions]
+        matrix = all_vectors[category_positions]
+        index = faiss.IndexFlatL2(matrix.shape[1])
+        index.add(matrix)
+        partition = FAISS(
+            embedding_function=vectors.embedding_function,
+            index=index,
+            docstore=InMemoryDocstore({doc_id: vectors.docstore.search(doc_id) for doc_id in doc_ids}),
+            index_to_docstore_id=dict(enumerate(doc_ids))
+        )
+        save_vector_store(partition, path)
+        save_search_index(partition, path)
+    
+    return counts
+
+def rebuild_search_indexes(embeddings=None):
+    """
+    Rebuild the configured search index and the category partitions of the
+    saved vector store without embedding anything, e.g. after changing
+    VECTOR_INDEX_TYPE or CATEGORY_SOURCES.
+    
+    Returns:
+        The index type served for the global store
+    """
+    store_path = settings.VECTOR_STORE_PATH
+    vectors = FAISS.load_local(store_path, embeddings, allow_dangerous_deserialization=True)
+    # Re-save so stores from before the SQLite docstore can be memory-mapped
+    save_vector_store(vectors, store_path)
+    index_type = save_search_index(vectors, store_path)
+    print(f"Built {index_type} search index over {vectors.index.ntotal} chunks")
+    counts = build_category_partitions(vectors, store_path)
+    for category, count in counts.items():
+        print(f"Category partition '{category}': {count} chunks")
+    write_store_version(store_path)
+    return index_type
+
+def embed_and_save_documents(data_dir="./LEGAL-DATA", dry_run=False, embeddings=None):
+    """
+    Incrementally update the vector store from the PDF documents in `data_dir`.
+    
+    A manifest saved next to the index records the hash of every file and of
+    every chunk. Only chunks of new or changed files that are not already in
+    the index are embedded, vectors of removed files and chunks are deleted,
+    and the index is updated in place.
+    
+    Args:
+        data_dir: Directory containing PDF files
+        dry_run: Only print what would change, without embedding or saving
+        embeddings: Embeddings model (defaults to Google Generative AI,
+            behind the embedding cache if enabled)
+    
+    Returns:
+        Number of chunks embedded (or that would be embedded on a dry run)
     """
     # Check if directory exists
     if not os.path.exists(data_dir):
@@ -23,75 +362,68 @@ def embed_and_save_documents(data_dir="./LEGAL-DATA"):
         print(f"No documents found in {data_dir}. Please add PDF files to this directory.")
         return 0
     
-    # Check if directory contains PDF files
-    pdf_files = [f for f in os.listdir(data_dir) if f.lower().endswith('.pdf')]
-    if not pdf_files:
+    store_path = settings.VECTOR_STORE_PATH
+    index_exists = os.path.exists(os.path.join(store_path, "index.faiss"))
+    # An index without a manifest cannot be updated in place; rebuild it
+    manifest = load_manifest(store_path) if index_exists else {"files": {}}
+    if index_exists and not manifest["files"]:
+        print(f"No ingestion manifest found in {store_path}, rebuilding the vector store")
+    # Stores from before the section index was added need every file parsed
+    # once more to build it
+    reparse = bool(manifest["files"]) and not os.path.exists(section_index_path(store_path))
+    
+    plan = diff_files(data_dir, manifest, reparse=reparse)
+    if not plan["hashes"] and not manifest["files"]:
         print(f"No PDF files found in {data_dir}. Please add PDF files to this directory.")
         return 0
+    print_plan(plan)
     
-    print(f"Found {len(pdf_files)} PDF files: {', '.join(pdf_files)}")
+    if dry_run:
+        asyncio.run(run_ingestion_pipeline(data_dir, manifest, plan, embeddings, dry_run=True))
+        print(f"Chunks to embed: {len(plan['add'])}")
+        print(f"Chunks to delete: {len(plan['delete'])}")
+        return len(plan["add"])
     
-    # Initialize embeddings
-    embeddings = GoogleGenerativeAIEmbeddings(model=settings.EMBEDDING_MODEL)
+    if not plan["new_files"] and not plan["changed_files"] and not plan["removed_files"]:
+        print("Vector store is up to date.")
+        return 0
     
-    # Load documents
-    loader = PyPDFDirectoryLoader(data_dir)
-    print("Loader initialized")
-    docs = loader.load()
-    print(f"Loaded {len(docs)} documents")
+    # Initialize embeddings
+    if embeddings is None:
+        embeddings = GoogleGenerativeAIEmbeddings(model=settings.EMBEDDING_MODEL)
+        if settings.EMBEDDING_CACHE_ENABLED:
+            embeddings = CachedEmbeddings(embeddings)
     
-    if not docs:
-        print(f"No content could be extracted from the PDF files in {data_dir}.")
-        print("Please ensure the PDF files are valid and contain text content.")
-        return 0
+    vectors = None
+    if manifest["files"]:
+        vectors = FAISS.load_local(store_path, embeddings, allow_dangerous_deserialization=True)
     
-    # Split documents
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=settings.CHUNK_SIZE, 
-        chunk_overlap=settings.CHUNK_OVERLAP
-    )
-    final_documents = text_splitter.split_documents(docs)
-    print(f"Split into {len(final_documents)} chunks")
+    start = time.perf_counter()
+    vectors = asyncio.run(run_ingestion_pipeline(data_dir, manifest, plan, embeddings, vectors))
+    elapsed = time.perf_counter() - start
+    print(f"Embedded {len(plan['add'])} chunks in {elapsed:.1f}s")
     
-    if not final_documents:
-        print("No document chunks were created. The PDFs might be empty or contain only images.")
+    if vectors is None:
+        print("No vector stores were created.")
         return 0
     
-    # Ensure metadata includes the source file name
-    for doc in final_documents:
-        if 'source' in doc.metadata:
-            source_file = doc.metadata['source']
-            doc.metadata['source'] = os.path.basename(source_file)
-        else:
-            # If source metadata is not present, add it
-            doc.metadata['source'] = os.path.basename(data_dir)
-    
-    # Batch documents to avoid payload size limits
-    batch_size = 100
-    batched_documents = [
-        final_documents[i:i + batch_size] 
-        for i in range(0, len(final_documents), batch_size)
-    ]
+    if plan["delete"]:
+        vectors.delete(plan["delete"])
+        print(f"Deleted {len(plan['delete'])} chunks")
     
-    # Create vector stores for each batch
-    print(f"Processing {len(batched_documents)} batches")
-    vector_stores = []
-    for i, batch in enumerate(batched_documents):
-        print(f"Processing batch {i+1}/{len(batched_documents)}")
-        vector_store = FAISS.from_documents(batch, embeddings)
-        vector_stores.append(vector_store)
-    
-    # Merge vector stores only if there are any
-    if vector_stores:
-        vectors = vector_stores[0]
-        for vector_store in vector_stores[1:]:
-            vectors.merge_from(vector_store)
-        print("Merged vector stores")
-        
-        # Save to disk
-        vectors.save_local(settings.VECTOR_STORE_PATH)
-        print(f"Saved vector store to {settings.VECTOR_STORE_PATH}")
-    else:
-        print("No vector stores were created.")
+    # Save to disk
+    save_vector_store(vectors, store_path)
+    index_type = save_search_index(vectors, store_path)
+    print(f"Built {index_type} search index over {vectors.index.ntotal} chunks")
+    counts = build_category_partitions(vectors, store_path)
+    for category, count in counts.items():
+        print(f"Category partition '{category}': {count} chunks")
+    if not manifest["files"] and os.path.exists(section_index_path(store_path)):
+        os.remove(section_index_path(store_path))
+    sections = update_section_index(store_path, plan["sections"], plan["removed_files"])
+    print(f"Indexed {sections} sections for citation lookup")
+    save_manifest(plan["manifest"], store_path)
+    write_store_version(store_path)
+    print(f"Saved vector store to {store_path}")
     
-    return len(final_documents)
\ No newline at end of file
+    return len(plan["add"])
@@ -0,0 +1,221 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.config import settings
+
+# Keys per SQLite lookup, below SQLite's bound-parameter limit
+_LOOKUP_BATCH = 500
+
+# Task type every query is embedded with, whether alone or in a batch
+QUERY_TASK_TYPE = "retrieval_query"
+
+# Cache kind for query vectors; includes the task type they were embedded with
+_QUERY_KIND = f"query:{QUERY_TASK_TYPE}"
+
+
+def embedding_key(model_name: str, kind: str, text: str) -> str:
+    """
+    Cache key for an embedding. Query and document embeddings are kept apart
+    since providers may embed them differently (e.g. retrieval task types).
+    """
+    payload = f"{model_name}\x00{kind}\x00{text}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _query_options(embeddings: Embeddings) -> Dict:
+    """
+    Provider options pinning how queries are embedded. Google embeddings
+    otherwise embed single queries as documents but batched ones as queries.
+    """
+    # Imported here so the cache does not pull in the Google client
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+    if isinstance(embeddings, GoogleGenerativeAIEmbeddings):
+        return {"task_type": QUERY_TASK_TYPE}
+    return {}
+
+
+def embed_query(embeddings: Embeddings, text: str) -> List[float]:
+    """Embed one query with the pinned query task type."""
+    return embeddings.embed_query(text, **_query_options(embeddings))
+
+
+async def aembed_query(embeddings: Embeddings, text: str) -> List[float]:
+    """Embed one query with the pinned query task type."""
+    return await embeddings.aembed_query(text, **_query_options(embeddings))
+
+
+async def aembed_queries(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    """
+    Embed many queries, in one provider request where possible.
+
+    Embedding wrappers defining `aembed_queries` handle it themselves; Google
+    embeddings are asked for query vectors in a single batch request; other
+    providers embed each query concurrently.
+
+    Args:
+        embeddings: Embeddings to use
+        texts: Queries to embed
+
+    Returns:
+        Query vector per text, as `aembed_query` would return it
+    """
+    if hasattr(embeddings, "aembed_queries"):
+        return await embeddings.aembed_queries(texts)
+    options = _query_options(embeddings)
+    if options:
+        return await embeddings.aembed_documents(texts, **options)
+    return list(await asyncio.gather(*(embeddings.aembed_query(text) for text in texts)))
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that stores every vector on disk, keyed by model name
+    and text hash, so re-ingestion and repeated queries are local lookups.
+
+    Vectors are stored as float32 blobs in a SQLite file shared by all
+    processes (ingestion and API workers), with a small in-process LRU in
+    front of it for hot queries.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str = settings.EMBEDDING_MODEL,
+        path: str = settings.EMBEDDING_CACHE_PATH,
+        memory_size: int = settings.EMBEDDING_CACHE_MEMORY_SIZE
+    ):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.memory_size = memory_size
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [embedding_key(self.model_name, "document", text) for text in texts]
+        found = self._lookup(keys)
+        missing = self._missing(keys, texts, found)
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            found.update(self._store(list(missing), vectors))
+        return [found[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = embedding_key(self.model_name, _QUERY_KIND, text)
+        found = self._lookup([key])
+        if key not in found:
+            found.update(self._store([key], [embed_query(self.embeddings, text)]))
+        return found[key].tolist()
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [embedding_key(self.model_name, "document", text) for text in texts]
+        found = await asyncio.to_thread(self._lookup, keys)
+        missing = self._missing(keys, texts, found)
+        if missing:
+            vectors = await self.embeddings.aembed_documents(list(missing.values()))
+            found.update(await asyncio.to_thread(self._store, list(missing), vectors))
+        return [found[key].tolist() for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = embedding_key(self.model_name, _QUERY_KIND, text)
+        found = self._lookup_memory([key])
+        if key not in found:
+            found = await asyncio.to_thread(self._lookup, [key])
+        if key not in found:
+            vector = await aembed_query(self.embeddings, text)
+            found.update(await asyncio.to_thread(self._store, [key], [vector]))
+        return found[key].tolist()
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        keys = [embedding_key(self.model_name, _QUERY_KIND, text) for text in texts]
+        found = await asyncio.to_thread(self._lookup, keys)
+        missing = self._missing(keys, texts, found)
+        if missing:
+            vectors = await aembed_queries(self.embeddings, list(missing.values()))
+            found.update(await asyncio.to_thread(self._store, list(missing), vectors))
+        return [found[key].tolist() for key in keys]
+
+    def stats(self) -> Dict:
+        """Get hit/miss counters for the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    @staticmethod
+    def _missing(keys: List[str], texts: List[str], found: Dict) -> Dict[str, str]:
+        """Unique keys (and their texts) that are not cached yet."""
+        return {key: text for key, text in zip(keys, texts) if key not in found}
+
+    def _lookup_memory(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+            if len(found) == len(set(keys)):
+                self.hits += len(found)
+        return found
+
+    def _lookup(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Look up vectors in memory, then on disk."""
+        found = self._lookup_memory(keys)
+        unique = set(keys)
+        if len(found) == len(unique):
+            return found
+
+        pending = [key for key in unique if key not in found]
+        with self._lock:
+            for start in range(0, len(pending), _LOOKUP_BATCH):
+                batch = pending[start:start + _LOOKUP_BATCH]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+                    self._remember(key, found[key])
+            self.hits += len(found)
+            self.misses += len(unique) - len(found)
+        return found
+
+    def _store(self, keys: List[str], vectors: List[List[float]]) -> Dict[str, np.ndarray]:
+        """Persist freshly computed vectors."""
+        arrays = [np.asarray(vector, dtype=np.float32) for vector in vectors]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, array.tobytes()) for key, array in zip(keys, arrays)]
+            )
+            self._conn.commit()
+            for key, array in zip(keys, arrays):
+                self._remember(key, array)
+        return dict(zip(keys, arrays))
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
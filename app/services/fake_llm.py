@@ -0,0 +1,77 @@
+import asyncio
+import random
+import time
+from typing import Any, AsyncIterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Local chat model that answers with a fixed text after an injected
+    latency, for tests, benchmarks and running the API without provider keys.
+
+    A share of calls can be made slow (`slow_rate`, `slow_latency`) or fail
+    (`failure_rate`) to exercise hedging and fallback in the LLM router.
+    """
+
+    response: str = "YES"
+    latency: float = 0.5
+    slow_rate: float = 0.0
+    slow_latency: float = 5.0
+    failure_rate: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _latency(self) -> float:
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise RuntimeError("Fake backend failure")
+        if self.slow_rate and random.random() < self.slow_rate:
+            return self.slow_latency
+        return self.latency
+
+    def _message(self, messages: List[BaseMessage]) -> AIMessage:
+        # Usage as a provider would report it, estimated at four characters a token
+        input_tokens = sum(len(str(message.content)) for message in messages) // 4 + 1
+        output_tokens = len(self.response) // 4 + 1
+        return AIMessage(content=self.response, usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        })
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self._latency())
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self._latency())
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages))])
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        # The latency is paid before the first token, as with a real provider
+        await asyncio.sleep(self._latency())
+        for i, token in enumerate(self.response.split(" ")):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=(" " if i else "") + token))
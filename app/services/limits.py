@@ -0,0 +1,71 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List
+
+from langchain_core.embeddings import Embeddings
+
+from app.config import settings
+from app.services.embedding_cache import aembed_queries, aembed_query, embed_query
+from app.services.metrics import UPSTREAM_IN_FLIGHT, UPSTREAM_WAIT_SECONDS
+
+# Shared semaphores, one per upstream service
+_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def get_semaphore(upstream: str) -> asyncio.Semaphore:
+    """
+    Get the semaphore bounding concurrent calls to an upstream service.
+
+    The limit is read from the `<UPSTREAM>_CONCURRENCY` setting, e.g.
+    `LLM_CONCURRENCY` for the "llm" upstream.
+
+    Args:
+        upstream: Upstream name ("llm", "translation" or "embedding")
+
+    Returns:
+        Semaphore shared by all requests in this process
+    """
+    if upstream not in _semaphores:
+        limit = getattr(settings, f"{upstream.upper()}_CONCURRENCY")
+        _semaphores[upstream] = asyncio.Semaphore(limit)
+    return _semaphores[upstream]
+
+
+@asynccontextmanager
+async def upstream_slot(upstream: str):
+    """Wait for a free slot on an upstream service and hold it for the block."""
+    start = time.perf_counter()
+    async with get_semaphore(upstream):
+        UPSTREAM_WAIT_SECONDS.observe(time.perf_counter() - start, upstream=upstream)
+        UPSTREAM_IN_FLIGHT.inc(upstream=upstream)
+        try:
+            yield
+        finally:
+            UPSTREAM_IN_FLIGHT.dec(upstream=upstream)
+
+
+class LimitedEmbeddings(Embeddings):
+    """Embeddings wrapper that bounds concurrent async calls to the provider."""
+
+    def __init__(self, embeddings: Embeddings, upstream: str = "embedding"):
+        self.embeddings = embeddings
+        self.upstream = upstream
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return embed_query(self.embeddings, text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        async with upstream_slot(self.upstream):
+            return await self.embeddings.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        async with upstream_slot(self.upstream):
+            return await aembed_query(self.embeddings, text)
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        async with upstream_slot(self.upstream):
+            return await aembed_queries(self.embeddings, texts)
@@ -0,0 +1,102 @@
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.tracers.context import register_configure_hook
+
+from app.config import settings
+from app.services.llm_router import ROUTER_TAG
+from app.services.metrics import LLM_TOKENS
+
+
+class LLMCallCounter(BaseCallbackHandler):
+    """
+    Counts the LLM calls (invoke or stream) made while a request runs. Calls
+    to the router are not counted, only the backend calls it makes, so a
+    hedged request counts twice.
+    """
+
+    # Counting is cheap, so don't hand it to an executor
+    run_inline = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _count(self, tags: Optional[List[str]]) -> None:
+        if tags and ROUTER_TAG in tags:
+            return
+        with self._lock:
+            self.calls += 1
+
+    def on_chat_model_start(self, serialized: Any, messages: Any, **kwargs: Any) -> None:
+        self._count(kwargs.get("tags"))
+
+    def on_llm_start(self, serialized: Any, prompts: Any, **kwargs: Any) -> None:
+        self._count(kwargs.get("tags"))
+
+
+class LLMTokenMetrics(BaseCallbackHandler):
+    """
+    Adds the token usage reported by LLM providers to the token metrics.
+    Router runs are skipped, since they return their backend's result.
+    """
+
+    run_inline = True
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        tags = kwargs.get("tags")
+        if tags and ROUTER_TAG in tags:
+            return
+        prompt_tokens = completion_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    prompt_tokens += usage.get("input_tokens", 0)
+                    completion_tokens += usage.get("output_tokens", 0)
+        llm_output = response.llm_output or {}
+        if not (prompt_tokens or completion_tokens):
+            usage = llm_output.get("token_usage") or {}
+            prompt_tokens = usage.get("prompt_tokens", 0)
+            completion_tokens = usage.get("completion_tokens", 0)
+        model = llm_output.get("model_name") or "unknown"
+        if prompt_tokens:
+            LLM_TOKENS.inc(prompt_tokens, model=model, kind="prompt")
+        if completion_tokens:
+            LLM_TOKENS.inc(completion_tokens, model=model, kind="completion")
+
+
+# Token metrics are recorded for every model call in the process
+_llm_token_metrics: ContextVar[Optional[LLMTokenMetrics]] = ContextVar(
+    "llm_token_metrics", default=LLMTokenMetrics() if settings.METRICS_ENABLED else None
+)
+register_configure_hook(_llm_token_metrics, inheritable=True)
+
+# Counter of the request being processed. LangChain adds it to the callbacks
+# of every model call made in this context, including those inside chains.
+_llm_call_counter: ContextVar[Optional[LLMCallCounter]] = ContextVar("llm_call_counter", default=None)
+register_configure_hook(_llm_call_counter, inheritable=True)
+
+
+@contextmanager
+def count_llm_calls() -> Iterator[LLMCallCounter]:
+    """
+    Count the LLM calls made for the duration of a request.
+
+    Yields:
+        LLMCallCounter whose `calls` is updated as models are called
+    """
+    counter = LLMCallCounter()
+    token = _llm_call_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        try:
+            _llm_call_counter.reset(token)
+        except ValueError:
+            # Streaming generator closed from another context
+            pass
@@ -0,0 +1,452 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import ConfigDict
+
+from app.config import settings
+from app.services.fake_llm import FakeChatModel
+
+# Tag of the router's own runs, so that only the backend calls it makes are
+# counted as LLM calls
+ROUTER_TAG = "llm-router"
+
+TIERS = ("default", "fast")
+
+
+def estimate_tokens(messages: List[BaseMessage]) -> int:
+    """Rough token count of a prompt (about four characters per token)."""
+    return sum(len(str(message.content)) for message in messages) // 4 + 1
+
+
+class TokenBudget:
+    """
+    Token bucket enforcing a backend's tokens-per-minute limit. Calls
+    reserve an estimate up front and settle the difference once the
+    provider reports actual usage.
+    """
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = float(tokens_per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+
+    def wait_time(self, tokens: int) -> float:
+        """Seconds until `tokens` can be spent (0 if they can be now)."""
+        if self.unlimited:
+            return 0.0
+        self._refill()
+        needed = min(tokens, self.capacity) - self.tokens
+        return max(0.0, needed * 60 / self.capacity)
+
+    def spend(self, tokens: int) -> None:
+        """Spend (or, if negative, refund) tokens; the balance may go negative."""
+        if not self.unlimited:
+            self._refill()
+            self.tokens -= tokens
+
+    async def reserve(self, tokens: int) -> None:
+        """
+        Wait until `tokens` can be spent and spend them. Callers queue on a
+        lock and each rechecks the balance after its wait, so a burst of
+        calls is spread out instead of all spending at once.
+        """
+        if self.unlimited:
+            return
+        async with self._lock:
+            while True:
+                delay = self.wait_time(tokens)
+                if not delay:
+                    self.spend(tokens)
+                    return
+                await asyncio.sleep(delay)
+
+
+class LLMBackend:
+    """One provider model behind the router, with its own limits."""
+
+    def __init__(
+        self,
+        name: str,
+        model: BaseChatModel,
+        tiers: List[str],
+        concurrency: int,
+        tokens_per_minute: int = 0,
+        cooldown_seconds: float = settings.LLM_BACKEND_COOLDOWN_SECONDS
+    ):
+        self.name = name
+        self.model = model
+        self.tiers = tiers
+        self.concurrency = concurrency
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.budget = TokenBudget(tokens_per_minute)
+        self.cooldown_seconds = cooldown_seconds
+        self.cooldown_until = 0.0
+        self.in_flight = 0
+        self.calls = 0
+        self.failures = 0
+        self.hedges = 0
+        self.wins = 0
+
+    def cooling_down(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+    def has_capacity(self) -> bool:
+        return self.in_flight < self.concurrency
+
+    def fail(self) -> None:
+        """Count a failure and rest the backend for the cooldown period."""
+        self.failures += 1
+        self.cooldown_until = time.monotonic() + self.cooldown_seconds
+
+    def stats(self) -> Dict:
+        return {
+            "tiers": self.tiers,
+            "calls": self.calls,
+            "failures": self.failures,
+            "hedges": self.hedges,
+            "wins": self.wins,
+            "in_flight": self.in_flight,
+            "cooling_down": self.cooling_down(),
+        }
+
+
+class LLMRouter(BaseChatModel):
+    """
+    Chat model that spreads calls over several backends.
+
+    Backends are tried in order: ones cooling down after a failure or out of
+    token budget are passed over, and a failed call falls back to the next
+    backend. If the chosen backend has not answered (or, when streaming,
+    sent its first token) after `hedge_delay` seconds, the same request is
+    also sent to the next backend with spare capacity and whichever answers
+    first is used; the other call is cancelled.
+
+    `fast` is an optional router over smaller models for cheap tasks; see
+    `fast_llm`.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    backends: List[LLMBackend]
+    hedge_delay: float = settings.LLM_HEDGE_DELAY_SECONDS
+    output_tokens_estimate: int = settings.LLM_OUTPUT_TOKENS_ESTIMATE
+    fast: Optional["LLMRouter"] = None
+    tags: Optional[List[str]] = [ROUTER_TAG]
+
+    @property
+    def _llm_type(self) -> str:
+        return "llm-router"
+
+    def _order(self, tokens: int) -> List[LLMBackend]:
+        """Backends to try, best first: available ones in configured order,
+        then the others by how soon they can take the request."""
+        available = [
+            backend for backend in self.backends
+            if not backend.cooling_down() and backend.budget.wait_time(tokens) == 0
+        ]
+        others = sorted(
+            (backend for backend in self.backends if backend not in available),
+            key=lambda backend: max(
+                backend.cooldown_until - time.monotonic(), backend.budget.wait_time(tokens)
+            )
+        )
+        return available + others
+
+    async def _call(
+        self, backend: LLMBackend, messages: List[BaseMessage], tokens: int, **kwargs: Any
+    ) -> AIMessage:
+        """Invoke one backend within its concurrency and token budget."""
+        async with backend.semaphore:
+            # Reserved once a slot is free, so the balance is current
+            await backend.budget.reserve(tokens)
+            backend.in_flight += 1
+            backend.calls += 1
+            try:
+                message = await backend.model.ainvoke(messages, **kwargs)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                backend.fail()
+                raise
+            finally:
+                backend.in_flight -= 1
+        usage = getattr(message, "usage_metadata", None)
+        if usage:
+            backend.budget.spend(usage["total_tokens"] - tokens)
+        return message
+
+    def _next_hedge(self, order: List[LLMBackend]) -> Optional[LLMBackend]:
+        for backend in order:
+            if not backend.cooling_down() and backend.has_capacity():
+                return backend
+        return None
+
+    async def _race(self, order: List[LLMBackend], start) -> Any:
+        """
+        Run `start(backend)` on the first backend, hedging to the next one
+        after `hedge_delay` and falling back on errors.
+
+        Returns:
+            Tuple of the winning backend and its result
+        """
+        order = list(order)
+        pending: Dict[asyncio.Task, LLMBackend] = {}
+        hedged = False
+        error: Optional[BaseException] = None
+
+        def launch(backend: LLMBackend) -> None:
+            order.remove(backend)
+            pending[asyncio.ensure_future(start(backend))] = backend
+
+        launch(order[0])
+        try:
+            while pending:
+                can_hedge = not hedged and self.hedge_delay > 0 and order
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=self.hedge_delay if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    hedged = True
+                    backend = self._next_hedge(order)
+                    if backend is not None:
+                        backend.hedges += 1
+                        launch(backend)
+                    continue
+                for task in done:
+                    backend = pending.pop(task)
+                    if task.exception() is None:
+                        backend.wins += 1
+                        return backend, task.result()
+                    error = task.exception()
+                if not pending and order:
+                    # Every call so far failed; fall back to the next backend
+                    launch(order[0])
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+            # Let cancelled calls release their slots (and streams) first
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tokens = estimate_tokens(messages) + self.output_tokens_estimate
+        if stop is not None:
+            kwargs["stop"] = stop
+        _, message = await self._race(
+            self._order(tokens),
+            lambda backend: self._call(backend, messages, tokens, **kwargs)
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        tokens = estimate_tokens(messages) + self.output_tokens_estimate
+        if stop is not None:
+            kwargs["stop"] = stop
+        streams: Dict[LLMBackend, AsyncIterator] = {}
+
+        async def first_chunk(backend: LLMBackend):
+            # Hedge and fall back until the first token; after that the
+            # answer has been partly sent and can only fail
+            streams[backend] = self._stream(backend, messages, tokens, **kwargs)
+            return await streams[backend].__anext__()
+
+        try:
+            backend, chunk = await self._race(self._order(tokens), first_chunk)
+            yield ChatGenerationChunk(message=chunk)
+            async for chunk in streams.pop(backend):
+                yield ChatGenerationChunk(message=chunk)
+        finally:
+            for stream in streams.values():
+                await stream.aclose()
+
+    async def _stream(
+        self, backend: LLMBackend, messages: List[BaseMessage], tokens: int, **kwargs: Any
+    ) -> AsyncIterator:
+        """Stream from one backend within its concurrency and token budget."""
+        async with backend.semaphore:
+            # Reserved once a slot is free, so the balance is current
+            await backend.budget.reserve(tokens)
+            backend.in_flight += 1
+            backend.calls += 1
+            try:
+                async for chunk in backend.model.astream(messages, **kwargs):
+                    yield chunk
+            except (asyncio.CancelledError, GeneratorExit):
+                raise
+            except Exception:
+                backend.fail()
+                raise
+            finally:
+                backend.in_flight -= 1
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        # Blocking calls only fall back; hedging needs the event loop
+        tokens = estimate_tokens(messages) + self.output_tokens_estimate
+        error: Optional[Exception] = None
+        for backend in self._order(tokens):
+            backend.calls += 1
+            try:
+                message = backend.model.invoke(messages, stop=stop, **kwargs)
+            except Exception as e:
+                backend.fail()
+                error = e
+                continue
+            backend.wins += 1
+            return ChatResult(generations=[ChatGeneration(message=message)])
+        raise error
+
+    def stats(self) -> Dict:
+        """Get per-backend call counters, for this router and its fast tier."""
+        stats = {"default": {backend.name: backend.stats() for backend in self.backends}}
+        if self.fast is not None:
+            stats["fast"] = {backend.name: backend.stats() for backend in self.fast.backends}
+        return stats
+
+
+def fast_llm(llm):
+    """The model to use for cheap tasks: the router's fast tier, if any."""
+    return getattr(llm, "fast", None) or llm
+
+
+def default_backend_configs() -> List[Dict[str, Any]]:
+    """
+    Backends used when LLM_BACKENDS is empty: LLM_MODEL on Groq for
+    answers, LLM_FAST_MODEL on Groq for cheap tasks, and LLM_FALLBACK_MODEL
+    on Gemini behind both when a Google API key is configured.
+    """
+    configs = [
+        {
+            "name": f"groq:{settings.LLM_MODEL}", "provider": "groq", "model": settings.LLM_MODEL,
+            "tiers": ["default"], "tokens_per_minute": settings.LLM_TOKENS_PER_MINUTE,
+        },
+        {
+            "name": f"groq:{settings.LLM_FAST_MODEL}", "provider": "groq", "model": settings.LLM_FAST_MODEL,
+            "tiers": ["fast"], "tokens_per_minute": settings.LLM_TOKENS_PER_MINUTE,
+        },
+    ]
+    if settings.GOOGLE_API_KEY and settings.LLM_FALLBACK_MODEL:
+        configs.append({
+            "name": f"google:{settings.LLM_FALLBACK_MODEL}", "provider": "google",
+            "model": settings.LLM_FALLBACK_MODEL, "tiers": ["default", "fast"],
+        })
+    return configs
+
+
+def create_chat_model(config: Dict[str, Any], concurrency: int) -> BaseChatModel:
+    """
+    Create the chat model of a backend.
+
+    Args:
+        config: Backend settings ("provider", "model" and provider options)
+        concurrency: Maximum concurrent calls, used to size connection pools
+
+    Returns:
+        LangChain chat model
+    """
+    provider = config["provider"]
+    if provider == "groq":
+        from langchain_groq import ChatGroq
+
+        # Keep-alive connections shared by every request to this backend
+        limits = httpx.Limits(
+            max_connections=concurrency,
+            max_keepalive_connections=concurrency,
+            keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY
+        )
+        return ChatGroq(
+            groq_api_key=config.get("api_key", settings.GROQ_API_KEY),
+            model_name=config["model"],
+            http_client=httpx.Client(limits=limits),
+            http_async_client=httpx.AsyncClient(limits=limits)
+        )
+    if provider == "google":
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        return ChatGoogleGenerativeAI(
+            model=config["model"],
+            google_api_key=config.get("api_key", settings.GOOGLE_API_KEY)
+        )
+    if provider == "fake":
+        return FakeChatModel(**{
+            key: config[key]
+            for key in ("response", "latency", "slow_rate", "slow_latency", "failure_rate")
+            if key in config
+        })
+    raise ValueError(f"Unknown LLM provider {provider!r}. Must be one of: groq, google, fake")
+
+
+def build_llm_router(configs: Optional[List[Dict[str, Any]]] = None) -> LLMRouter:
+    """
+    Build the LLM router from backend settings.
+
+    Each config has a "provider" ("groq", "google" or "fake"), a "model",
+    and optionally a "name", the "tiers" it serves ("default" and/or
+    "fast"), a "concurrency" limit and a "tokens_per_minute" budget (0 for
+    none). Fake backends also take FakeChatModel's fields.
+
+    Args:
+        configs: Backend settings (defaults to LLM_BACKENDS, or
+            `default_backend_configs` if that is empty)
+
+    Returns:
+        Router over the default tier, with the fast tier as `fast`
+    """
+    configs = configs or settings.LLM_BACKENDS or default_backend_configs()
+    backends = []
+    for i, config in enumerate(configs):
+        tiers = config.get("tiers", ["default"])
+        unknown = set(tiers) - set(TIERS)
+        if unknown:
+            raise ValueError(f"Unknown LLM tiers {sorted(unknown)}. Must be among: {', '.join(TIERS)}")
+        concurrency = config.get("concurrency", settings.LLM_CONCURRENCY)
+        backends.append(LLMBackend(
+            name=config.get("name", f"{config['provider']}:{config.get('model', i)}"),
+            model=create_chat_model(config, concurrency),
+            tiers=tiers,
+            concurrency=concurrency,
+            tokens_per_minute=config.get("tokens_per_minute", 0)
+        ))
+
+    default = [backend for backend in backends if "default" in backend.tiers]
+    fast = [backend for backend in backends if "fast" in backend.tiers]
+    if not default:
+        raise ValueError("No LLM backend serves the default tier")
+    return LLMRouter(
+        backends=default,
+        fast=LLMRouter(backends=fast) if fast else None
+    )
@@ -0,0 +1,180 @@
+import math
+import threading
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from app.config import settings
+
+# Latency buckets in seconds, from cache hits to long generations
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_sample(name: str, labels: Sequence[Tuple[str, str]], value: float) -> str:
+    if labels:
+        name += "{" + ",".join(f'{label}="{_escape(str(v))}"' for label, v in labels) + "}"
+    if math.isinf(value):
+        return f"{name} {'+Inf' if value > 0 else '-Inf'}"
+    return f"{name} {float(value)!r}"
+
+
+class _Metric:
+    """Metric family with a fixed set of label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+    def _samples(self) -> Iterator[Tuple[str, List[Tuple[str, str]], float]]:
+        # A metric without labels is reported as 0 until first recorded
+        values = self._values or ({(): 0.0} if not self.labels else {})
+        for key, value in values.items():
+            yield self.name, list(zip(self.labels, key)), value
+
+    def render(self) -> str:
+        """Text exposition of the metric family."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            lines.extend(_format_sample(*sample) for sample in self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if not settings.METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Value per label set that can go up and down."""
+
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if not settings.METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values per label set, in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels) -> None:
+        if not settings.METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Bucket counts (not yet cumulative), sum
+                state = self._values[key] = [[0] * len(self.buckets), 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+
+    def _samples(self):
+        for key, (counts, total) in self._values.items():
+            labels = list(zip(self.labels, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = "+Inf" if math.isinf(bound) else f"{bound:g}"
+                yield f"{self.name}_bucket", labels + [("le", le)], cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+def render(metrics: Iterable[_Metric]) -> str:
+    """Prometheus text exposition (format 0.0.4) of several metric families."""
+    return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+# Process-wide metrics, recorded on the hot path
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "lawgpt_http_requests_in_flight", "HTTP requests being processed"
+)
+HTTP_REQUESTS = Counter(
+    "lawgpt_http_requests_total", "HTTP requests handled", ["route", "method", "status"]
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "lawgpt_http_request_duration_seconds", "Time to handle an HTTP request, body included", ["route", "method"]
+)
+STAGE_SECONDS = Histogram(
+    "lawgpt_stage_duration_seconds", "Time spent in each chat pipeline stage", ["stage"]
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    "lawgpt_upstream_in_flight", "Calls in progress to each upstream service", ["upstream"]
+)
+UPSTREAM_WAIT_SECONDS = Histogram(
+    "lawgpt_upstream_wait_seconds", "Time waiting for a concurrency slot of an upstream service", ["upstream"]
+)
+LLM_TOKENS = Counter(
+    "lawgpt_llm_tokens_total", "Tokens reported by LLM providers", ["model", "kind"]
+)
+
+METRICS = [
+    HTTP_REQUESTS_IN_FLIGHT,
+    HTTP_REQUESTS,
+    HTTP_REQUEST_SECONDS,
+    STAGE_SECONDS,
+    UPSTREAM_IN_FLIGHT,
+    UPSTREAM_WAIT_SECONDS,
+    LLM_TOKENS,
+]
+
+
+def cache_metrics(caches: Dict[str, Dict]) -> List[_Metric]:
+    """
+    Hit and miss counters of the caches, read from their `stats()` at scrape
+    time.
+
+    Args:
+        caches: Cache name -> stats with "hits" and "misses" (None if the
+            cache is disabled)
+
+    Returns:
+        Metric families to render with the process-wide ones
+    """
+    hits = Counter("lawgpt_cache_hits_total", "Cache lookups that found an entry", ["cache"])
+    misses = Counter("lawgpt_cache_misses_total", "Cache lookups that found nothing", ["cache"])
+    for name, stats in caches.items():
+        if stats is not None:
+            hits.inc(stats["hits"], cache=name)
+            misses.inc(stats["misses"], cache=name)
+    return [hits, misses]
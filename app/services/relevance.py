@@ -0,0 +1,176 @@
+import os
+import threading
+from typing import Dict, List, Optional
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+from app.config import settings
+
+# Files of the saved relevance prototypes, plain .npy arrays like BM25's
+RELEVANCE_FILES = {
+    "prototypes": "relevance.prototypes.npy",
+    "sources": "relevance.sources.npy",
+}
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def write_relevance_prototypes(vectors: FAISS, directory: str) -> None:
+    """
+    Summarise the chunk embeddings of each source file by a few prototype
+    vectors (spherical k-means centroids) and save them in `directory`.
+
+    Prototypes are labelled with their source file rather than a category,
+    so changing CATEGORY_SOURCES does not require re-ingesting.
+
+    Args:
+        vectors: Vector store whose chunks to summarise (with an exact index)
+        directory: Directory to write the relevance files to
+    """
+    by_source: Dict[str, List[int]] = {}
+    for position, doc_id in vectors.index_to_docstore_id.items():
+        source = vectors.docstore.search(doc_id).metadata.get("source", "unknown")
+        by_source.setdefault(source, []).append(position)
+
+    dimension = vectors.index.d
+    prototypes = [np.empty((0, dimension), dtype=np.float32)]
+    sources: List[str] = []
+    for source, positions in sorted(by_source.items()):
+        embeddings = _normalize(np.stack([vectors.index.reconstruct(p) for p in positions]))
+        k = min(settings.RELEVANCE_PROTOTYPES_PER_SOURCE, len(positions))
+        kmeans = faiss.Kmeans(
+            dimension, k, niter=20, spherical=True, seed=1234,
+            min_points_per_centroid=1, verbose=False
+        )
+        kmeans.train(np.ascontiguousarray(embeddings, dtype=np.float32))
+        prototypes.append(_normalize(kmeans.centroids))
+        sources.extend([source] * k)
+
+    np.save(os.path.join(directory, RELEVANCE_FILES["prototypes"]), np.concatenate(prototypes))
+    np.save(os.path.join(directory, RELEVANCE_FILES["sources"]), np.array(sources, dtype=str))
+
+
+class RelevanceClassifier:
+    """
+    Local check of whether a query belongs to a legal category.
+
+    The query embedding is compared with the prototypes of every source
+    file; the nearest prototypes vote for the categories of their source,
+    weighted by similarity. Clear majorities are decided locally in
+    microseconds, and only queries near the boundary are left for the LLM.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        embeddings,
+        neighbours: int = settings.RELEVANCE_NEIGHBOURS,
+        accept: float = settings.RELEVANCE_ACCEPT_THRESHOLD,
+        reject: float = settings.RELEVANCE_REJECT_THRESHOLD
+    ):
+        self.prototypes = np.load(os.path.join(directory, RELEVANCE_FILES["prototypes"]))
+        self.sources = np.load(os.path.join(directory, RELEVANCE_FILES["sources"]))
+        self.embeddings = embeddings
+        self.neighbours = neighbours
+        self.accept = accept
+        self.reject = reject
+        # category -> boolean mask over the prototypes
+        self._masks: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+        self.accepted = 0
+        self.rejected = 0
+        self.uncertain = 0
+
+    @classmethod
+    def load(cls, directory: str, embeddings) -> Optional["RelevanceClassifier"]:
+        """Load the prototypes saved in `directory`, or None if there are none."""
+        if not all(os.path.exists(os.path.join(directory, f)) for f in RELEVANCE_FILES.values()):
+            return None
+        return cls(directory, embeddings)
+
+    def _mask(self, category: str) -> np.ndarray:
+        mask = self._masks.get(category)
+        if mask is None:
+            # Imported here: the embedding module saves stores through
+            # vector_index, which imports this module
+            from app.services.embedding import categories_for_source
+            in_category = {
+                source for source in set(self.sources.tolist())
+                if category in categories_for_source(source)
+            }
+            mask = np.array([source in in_category for source in self.sources.tolist()], dtype=bool)
+            self._masks[category] = mask
+        return mask
+
+    def score(self, query_vector, category: str) -> Optional[float]:
+        """
+        Share of the nearest prototypes' similarity that belongs to the
+        category.
+
+        Args:
+            query_vector: Query embedding
+            category: Legal category
+
+        Returns:
+            Score between 0 and 1, or None if no indexed source belongs to the
+            category (so there is nothing to compare with)
+        """
+        mask = self._mask(category)
+        if not mask.any():
+            return None
+        vector = _normalize(np.asarray(query_vector, dtype=np.float32))
+        similarities = self.prototypes @ vector
+        k = min(self.neighbours, len(similarities))
+        nearest = np.argpartition(-similarities, k - 1)[:k]
+        weights = np.maximum(similarities[nearest], 0.0)
+        total = float(weights.sum())
+        if total == 0.0:
+            return None
+        return float(weights[mask[nearest]].sum()) / total
+
+    async def classify(self, query: str, category: str, query_vector=None) -> Optional[bool]:
+        """
+        Decide locally whether a query is relevant to a category.
+
+        Args:
+            query: User's question
+            category: Legal category
+            query_vector: Embedding of the query, if already computed
+
+        Returns:
+            True or False for clear cases, None if the LLM should decide
+        """
+        if query_vector is None:
+            query_vector = await self.embeddings.aembed_query(query)
+        score = self.score(query_vector, category)
+        if score is None or self.reject < score < self.accept:
+            decision = None
+        else:
+            decision = score >= self.accept
+        self._record(decision)
+        return decision
+
+    def _record(self, decision: Optional[bool]) -> None:
+        with self._lock:
+            if decision is None:
+                self.uncertain += 1
+            elif decision:
+                self.accepted += 1
+            else:
+                self.rejected += 1
+
+    def stats(self) -> Dict:
+        """Get counters of local decisions and LLM fallbacks."""
+        total = self.accepted + self.rejected + self.uncertain
+        return {
+            "prototypes": len(self.sources),
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "llm_fallbacks": self.uncertain,
+            "local_rate": (self.accepted + self.rejected) / total if total else 0.0,
+        }
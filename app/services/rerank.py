@@ -0,0 +1,170 @@
+import threading
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from app.config import settings
+from app.services.bm25 import BM25Index, tokenize
+
+# Share of the lexical score given to query words, the rest to word pairs
+_TERM_WEIGHT = 0.7
+
+
+class LexicalReranker:
+    """
+    Cheap CPU reranker scoring how much of the query a passage contains.
+
+    The score is the IDF-weighted share of query words found in the passage,
+    blended with the share of adjacent query word pairs ("section 420",
+    "article 21") found next to each other. Scores are in [0, 1], so gaps
+    between them can be compared across queries.
+    """
+
+    def __init__(self, keyword_index: Optional[BM25Index] = None, max_chars: int = settings.RERANK_MAX_CHARS):
+        self.keyword_index = keyword_index
+        self.max_chars = max_chars
+
+    def _weight(self, term: str) -> float:
+        if self.keyword_index is None:
+            return 1.0
+        return self.keyword_index.idf(term)
+
+    def score(self, query: str, passages: Sequence[str]) -> np.ndarray:
+        """
+        Score passages against a query.
+
+        Args:
+            query: Query text
+            passages: Candidate passage texts
+
+        Returns:
+            Score per passage, higher is more relevant
+        """
+        query_tokens = tokenize(query)
+        weights = {term: self._weight(term) for term in set(query_tokens)}
+        total = sum(weights.values())
+        pairs = set(zip(query_tokens, query_tokens[1:]))
+        scores = np.zeros(len(passages), dtype=np.float32)
+        if not total:
+            return scores
+        for i, passage in enumerate(passages):
+            tokens = tokenize(passage[:self.max_chars])
+            present = set(tokens)
+            score = sum(weight for term, weight in weights.items() if term in present) / total
+            if pairs:
+                found = pairs & set(zip(tokens, tokens[1:]))
+                score = _TERM_WEIGHT * score + (1 - _TERM_WEIGHT) * len(found) / len(pairs)
+            scores[i] = score
+        return scores
+
+
+class CrossEncoderReranker:
+    """
+    Reranker scoring (query, passage) pairs with a small cross-encoder model
+    on CPU, in batches. Needs the optional `sentence-transformers` package.
+    """
+
+    def __init__(
+        self,
+        model_name: str = settings.RERANK_MODEL,
+        batch_size: int = settings.RERANK_BATCH_SIZE,
+        max_chars: int = settings.RERANK_MAX_CHARS
+    ):
+        from sentence_transformers import CrossEncoder
+
+        self.model = CrossEncoder(model_name, device="cpu")
+        self.batch_size = batch_size
+        self.max_chars = max_chars
+        # The model is shared by all retrievers; one batch runs at a time
+        self._lock = threading.Lock()
+
+    def score(self, query: str, passages: Sequence[str]) -> np.ndarray:
+        """
+        Score passages against a query.
+
+        Args:
+            query: Query text
+            passages: Candidate passage texts
+
+        Returns:
+            Relevance probability per passage
+        """
+        pairs = [(query, passage[:self.max_chars]) for passage in passages]
+        with self._lock:
+            logits = self.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+        return 1.0 / (1.0 + np.exp(-np.asarray(logits, dtype=np.float32)))
+
+
+def adaptive_k(
+    scores: Sequence[float],
+    min_k: int = settings.RERANK_MIN_K,
+    max_k: int = settings.RERANK_MAX_K,
+    min_gap: float = settings.RERANK_MIN_GAP,
+    min_relative_score: float = settings.RERANK_MIN_RELATIVE_SCORE
+) -> int:
+    """
+    Choose how many of the reranked passages to keep.
+
+    Passages scoring below `min_relative_score` of the best one are dropped,
+    then the list is cut at the largest drop between consecutive scores if
+    that drop is at least `min_gap`. A query with one clear answer keeps few
+    passages; one with many similar candidates keeps up to `max_k`.
+
+    Args:
+        scores: Passage scores, best first
+        min_k: Fewest passages to keep
+        max_k: Most passages to keep
+        min_gap: Smallest score drop to cut at
+        min_relative_score: Share of the best score a passage needs
+
+    Returns:
+        Number of passages to keep
+    """
+    count = min(max_k, len(scores))
+    if count <= min_k:
+        return count
+    best = scores[0]
+    for i in range(min_k, count):
+        if scores[i] < min_relative_score * best:
+            count = i
+            break
+    if count <= min_k:
+        return count
+    gaps = np.asarray(scores[min_k - 1:count - 1]) - np.asarray(scores[min_k:count])
+    largest = int(np.argmax(gaps))
+    if gaps[largest] >= min_gap:
+        return min_k + largest
+    return count
+
+
+class RerankStats:
+    """Counters of reranked queries and passages kept."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.candidates = 0
+        self.kept = 0
+        self.timeouts = 0
+
+    def record(self, candidates: int, kept: int) -> None:
+        with self._lock:
+            self.queries += 1
+            self.candidates += candidates
+            self.kept += kept
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def stats(self) -> Dict:
+        return {
+            "queries": self.queries,
+            "timeouts": self.timeouts,
+            "mean_candidates": self.candidates / self.queries if self.queries else 0.0,
+            "mean_kept": self.kept / self.queries if self.queries else 0.0,
+        }
+
+
+rerank_stats = RerankStats()
+
@@ -0,0 +1,253 @@
+import asyncio
+import re
+from typing import Any, Dict, List
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStoreRetriever
+from pydantic import ConfigDict
+
+from app.config import settings
+from app.services.bm25 import BM25Index
+from app.services.limits import upstream_slot
+from app.services.rerank import adaptive_k, rerank_stats
+from app.services.timing import timed
+
+# Routing tag the chatbot prefixes queries with ("[Category: ...] ..."); its
+# words would match every chunk of the category, so keyword search skips it
+_QUERY_TAG = re.compile(r"^\s*\[[^\]]*\]\s*")
+
+
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int = settings.RRF_K) -> List[int]:
+    """
+    Fuse several rankings of index positions with reciprocal rank fusion.
+
+    Args:
+        rankings: Position lists, best first
+        k: RRF constant; larger values flatten the contribution of top ranks
+
+    Returns:
+        Positions ordered by fused score, best first
+    """
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, position in enumerate(ranking):
+            scores[position] = scores.get(position, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def search_positions(vector_store: FAISS, embeddings, k: int) -> List[List[int]]:
+    """
+    Search the FAISS index for several query vectors at once.
+
+    Args:
+        vector_store: Vector store to search
+        embeddings: Query vectors, one row per query
+        k: Hits per query
+
+    Returns:
+        Index positions of the hits of each query, best first
+    """
+    with timed("retrieval.vector"):
+        vectors = np.array(embeddings, dtype=np.float32).reshape(len(embeddings), -1)
+        if vector_store._normalize_L2:
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        _, positions = vector_store.index.search(vectors, k)
+    return [[int(position) for position in row if position != -1] for row in positions]
+
+
+def documents_at(vector_store: FAISS, positions: List[int]) -> List[Document]:
+    """Read the chunks at the given index positions from the docstore."""
+    documents = []
+    for position in positions:
+        doc = vector_store.docstore.search(vector_store.index_to_docstore_id[position])
+        if isinstance(doc, Document):
+            documents.append(doc)
+    return documents
+
+
+def retrieve_batch(retriever: BaseRetriever, queries: List[str], embeddings) -> List[List[Document]]:
+    """
+    Retrieve documents for many queries whose embeddings are known, searching
+    FAISS once for all of them where the retriever allows it.
+
+    Handles the retrievers built by `get_retriever`; any other retriever is
+    invoked once per query.
+
+    Args:
+        retriever: Retriever to search with
+        queries: Query texts, as they would be passed to the retriever
+        embeddings: Query vectors, one row per query
+
+    Returns:
+        Documents per query, best first
+    """
+    if isinstance(retriever, RerankingRetriever):
+        candidates = retrieve_batch(retriever.retriever, queries, embeddings)
+        return [retriever._rerank(query, documents) for query, documents in zip(queries, candidates)]
+    if isinstance(retriever, HybridRetriever):
+        return retriever.search_batch(queries, embeddings)
+    if (
+        isinstance(retriever, VectorStoreRetriever)
+        and isinstance(retriever.vectorstore, FAISS)
+        and retriever.search_type == "similarity"
+    ):
+        k = retriever.search_kwargs.get("k", settings.RETRIEVAL_K)
+        return [
+            documents_at(retriever.vectorstore, positions)
+            for positions in search_positions(retriever.vectorstore, embeddings, k)
+        ]
+    return [retriever.invoke(query) for query in queries]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retriever combining dense FAISS search with BM25 keyword search.
+
+    Exact references such as "Section 420 IPC" or "Article 21" are often
+    missed by embeddings alone. Both searches run concurrently over the same
+    chunks, their top `fetch_k` candidates are fused with reciprocal rank
+    fusion, and only the top `k` chunks are read from the docstore.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vector_store: FAISS
+    keyword_index: BM25Index
+    k: int = settings.RETRIEVAL_K
+    fetch_k: int = settings.HYBRID_FETCH_K
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        with timed("retrieval.embedding"):
+            embedding = self.vector_store.embedding_function.embed_query(query)
+        vector_hits = self._vector_search(embedding)
+        keyword_hits = self._keyword_search(query)
+        return self._fuse(vector_hits, keyword_hits)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        async def vector_search():
+            with timed("retrieval.embedding"):
+                embedding = await self.vector_store.embedding_function.aembed_query(query)
+            return await asyncio.to_thread(self._vector_search, embedding)
+
+        vector_hits, keyword_hits = await asyncio.gather(
+            vector_search(),
+            asyncio.to_thread(self._keyword_search, query)
+        )
+        return await asyncio.to_thread(self._fuse, vector_hits, keyword_hits)
+
+    def search_batch(self, queries: List[str], embeddings) -> List[List[Document]]:
+        """
+        Retrieve documents for many queries whose embeddings are known, with
+        one vector search over the whole query matrix.
+
+        Args:
+            queries: Query texts
+            embeddings: Query vectors, one row per query
+
+        Returns:
+            Documents per query, best first
+        """
+        vector_hits = search_positions(self.vector_store, embeddings, self.fetch_k)
+        return [
+            self._fuse(hits, self._keyword_search(query))
+            for query, hits in zip(queries, vector_hits)
+        ]
+
+    def _vector_search(self, embedding: List[float]) -> List[int]:
+        return search_positions(self.vector_store, [embedding], self.fetch_k)[0]
+
+    def _keyword_search(self, query: str) -> List[int]:
+        with timed("retrieval.bm25"):
+            hits = self.keyword_index.search(_QUERY_TAG.sub("", query), self.fetch_k)
+        return [position for position, _ in hits]
+
+    def _fuse(self, vector_hits: List[int], keyword_hits: List[int]) -> List[Document]:
+        with timed("retrieval.fusion"):
+            positions = reciprocal_rank_fusion([vector_hits, keyword_hits])[:self.k]
+            return documents_at(self.vector_store, positions)
+
+
+def _record_timeout(task: asyncio.Task) -> None:
+    """Count a timed-out rerank once its slot is free again."""
+    if not task.cancelled():
+        task.exception()
+    rerank_stats.record_timeout()
+
+
+class RerankingRetriever(BaseRetriever):
+    """
+    Retriever that over-fetches candidates from another retriever, rescores
+    them with a reranker and keeps an adaptive number of them (see
+    `adaptive_k`), so queries with one clear answer send fewer passages to
+    the LLM and ambiguous ones get more evidence.
+
+    Reranking runs in a worker thread, at most RERANK_CONCURRENCY at a time.
+    If it takes longer than `timeout`, including the wait for a slot, the
+    first `k` candidates are returned in retrieval order; a rerank already
+    running keeps its slot until its thread finishes.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    retriever: BaseRetriever
+    reranker: Any
+    k: int = settings.RETRIEVAL_K
+    timeout: float = settings.RERANK_TIMEOUT_SECONDS
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        documents = self.retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+        return self._rerank(query, documents)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        documents = await self.retriever.ainvoke(query, config={"callbacks": run_manager.get_child()})
+
+        started = False
+
+        async def rerank():
+            nonlocal started
+            async with upstream_slot("rerank"):
+                started = True
+                return await asyncio.to_thread(self._rerank, query, documents)
+
+        task = asyncio.ensure_future(rerank())
+        try:
+            # Shielded: a rerank already running in a thread cannot be
+            # stopped, so its task keeps the slot until the thread is done
+            return await asyncio.wait_for(asyncio.shield(task), self.timeout)
+        except asyncio.TimeoutError:
+            if not started:
+                task.cancel()
+            task.add_done_callback(_record_timeout)
+            return documents[:self.k]
+
+    def _rerank(self, query: str, documents: List[Document]) -> List[Document]:
+        if not documents:
+            return documents
+        with timed("retrieval.rerank"):
+            scores = self.reranker.score(
+                _QUERY_TAG.sub("", query),
+                [doc.page_content for doc in documents]
+            )
+        if scores.max() == scores.min():
+            # Nothing to tell the candidates apart; trust the retrieval order
+            kept = documents[:self.k]
+        else:
+            order = np.argsort(-scores, kind="stable")
+            kept = [documents[i] for i in order[:adaptive_k(scores[order])]]
+        rerank_stats.record(len(documents), len(kept))
+        return kept
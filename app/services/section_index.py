@@ -0,0 +1,151 @@
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from app.services.docstore import ReadOnlyConnection
+
+# SQLite file mapping (act, section/article number) to the provision's text
+SECTION_INDEX_FILE = "sections.sqlite3"
+
+# The dash closing a section's heading; the provision's text follows it
+_HEADING_END = re.compile(r"[—–―]")
+
+# Fewer words after the heading than this is a contents entry or an omitted
+# provision, not text to quote
+MIN_BODY_WORDS = 3
+
+
+def section_index_path(store_path: str) -> str:
+    return os.path.join(store_path, SECTION_INDEX_FILE)
+
+
+def body_words(text: str) -> int:
+    """Number of words of a provision's text after its heading."""
+    parts = _HEADING_END.split(text, maxsplit=1)
+    return len(parts[-1].split())
+
+
+def update_section_index(
+    store_path: str,
+    sections_by_file: Dict[str, List[Dict]],
+    removed_files: Iterable[str] = ()
+) -> int:
+    """
+    Replace the indexed sections of re-parsed files and drop those of
+    removed files, leaving other files untouched.
+
+    Args:
+        store_path: Directory of the vector store
+        sections_by_file: Sections extracted from each parsed file
+        removed_files: Files no longer in the corpus
+
+    Returns:
+        Total number of indexed sections
+    """
+    os.makedirs(store_path, exist_ok=True)
+    conn = sqlite3.connect(section_index_path(store_path))
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sections ("
+            "source TEXT NOT NULL, ordinal INTEGER NOT NULL, act TEXT NOT NULL, "
+            "unit TEXT NOT NULL, number TEXT NOT NULL, heading TEXT, page INTEGER, "
+            "text TEXT NOT NULL, PRIMARY KEY (source, ordinal))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS sections_number ON sections (unit, number)")
+        with conn:
+            for source in [*sections_by_file, *removed_files]:
+                conn.execute("DELETE FROM sections WHERE source = ?", (source,))
+            conn.executemany(
+                "INSERT INTO sections VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (section["source"], ordinal, section["act"], section["unit"],
+                     section["number"].upper(), section["heading"], section["page"], section["text"])
+                    for sections in sections_by_file.values()
+                    for ordinal, section in enumerate(sections)
+                ]
+            )
+        return conn.execute("SELECT COUNT(*) FROM sections").fetchone()[0]
+    finally:
+        conn.close()
+
+
+class SectionIndex:
+    """
+    Read-only lookup of statute provisions by act and section (or article)
+    number, built at ingestion from the parsed structure of each PDF.
+    """
+
+    def __init__(self, path: str):
+        self._connection = ReadOnlyConnection(path)
+        rows = self._connection.fetchall("SELECT DISTINCT act, unit, source FROM sections")
+        # act -> (unit, source)
+        self.acts = {act: (unit, source) for act, unit, source in rows}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, store_path: str) -> Optional["SectionIndex"]:
+        """Open the section index of a vector store, or None if there is none."""
+        path = section_index_path(store_path)
+        if not os.path.exists(path):
+            return None
+        return cls(path)
+
+    def lookup(self, unit: str, number: str, acts: Iterable[str]) -> List[Dict]:
+        """
+        Find a provision in the given acts.
+
+        Entries without body text (table of contents lines in indexes built
+        before those were dropped) are skipped, and if a number still occurs
+        more than once in an act, the longest occurrence is the provision.
+
+        Args:
+            unit: "section" or "article"
+            number: Section or article number, e.g. "498A"
+            acts: Acts to search
+
+        Returns:
+            One match per act that has the provision
+        """
+        acts = list(acts)
+        if not acts:
+            return []
+        rows = self._connection.fetchall(
+            f"SELECT act, source, number, heading, page, text FROM sections "
+            f"WHERE unit = ? AND number = ? AND act IN ({','.join('?' * len(acts))}) "
+            f"ORDER BY source, ordinal",
+            (unit, number.upper(), *acts)
+        )
+        matches = {}
+        for act, source, number_, heading, page, text in rows:
+            if body_words(text) < MIN_BODY_WORDS:
+                continue
+            if act in matches and len(matches[act]["text"]) >= len(text):
+                continue
+            matches[act] = {
+                "act": act, "source": source, "unit": unit, "number": number_,
+                "heading": heading, "page": page, "text": text,
+            }
+        return list(matches.values())
+
+    def record(self, hit: bool) -> None:
+        """Count a citation-style query as answered (hit) or not."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> Dict:
+        """Get counters for the citation fast path."""
+        lookups = self.hits + self.misses
+        return {
+            "sections": self._connection.fetchone("SELECT COUNT(*) FROM sections")[0],
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
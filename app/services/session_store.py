@@ -0,0 +1,221 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from app.config import settings
+from app.database import SessionLocal, ChatSession, ChatMessage
+
+# Message types persisted to the database
+_MESSAGE_TYPES = {"human": HumanMessage, "ai": AIMessage}
+
+# Prune expired sessions from the database every N writes
+_PRUNE_EVERY = 500
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) for history trimming."""
+    return len(text) // 4 + 1
+
+
+class SessionStore:
+    """
+    Conversation history keyed by session ID.
+
+    Recently used sessions are kept in an in-process LRU; everything else lives
+    in SQLite (through the `app.database` engine) so history survives worker
+    restarts and memory use stays bounded by the LRU size however many sessions
+    exist. Sessions idle for longer than the TTL are evicted from both.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = settings.SESSION_CACHE_SIZE,
+        ttl_seconds: int = settings.SESSION_TTL_SECONDS,
+        max_messages: int = settings.SESSION_MAX_MESSAGES,
+        max_tokens: int = settings.SESSION_MAX_TOKENS
+    ):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+        self.max_tokens = max_tokens
+        # session_id -> (messages, last_active timestamp)
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._writes = 0
+
+    def get_messages(self, session_id: str) -> List[BaseMessage]:
+        """Get the (trimmed) message history for a session."""
+        now = time.time()
+        with self._lock:
+            cached = self._cached(session_id, now)
+        if cached is not None:
+            return list(cached)
+
+        messages = self._load(session_id)
+        with self._lock:
+            # A write may have cached newer history while this one loaded
+            cached = self._cached(session_id, now)
+            if cached is not None:
+                return list(cached)
+            self._remember(session_id, messages, now)
+        return list(messages)
+
+    def add_messages(self, session_id: str, messages: Sequence[BaseMessage]) -> None:
+        """Append messages to a session and persist them."""
+        now = time.time()
+        # Writes are serialized (SQLite has a single writer anyway), so the
+        # history read here cannot change before the new messages are saved
+        with self._write_lock:
+            history = self.get_messages(session_id) + list(messages)
+            with self._lock:
+                self._remember(session_id, self._trim(history), now)
+                self._writes += 1
+                prune = self._writes % _PRUNE_EVERY == 0
+            self._persist(session_id, messages, now)
+        if prune:
+            self.prune_expired()
+
+    def clear(self, session_id: str) -> None:
+        """Delete a session's history."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        db = SessionLocal()
+        try:
+            db.query(ChatMessage).filter(ChatMessage.session_id == session_id).delete()
+            db.query(ChatSession).filter(ChatSession.id == session_id).delete()
+            db.commit()
+        finally:
+            db.close()
+
+    def prune_expired(self) -> int:
+        """
+        Delete sessions idle for longer than the TTL.
+
+        Returns:
+            Number of sessions deleted from the database
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+        db = SessionLocal()
+        try:
+            expired = db.query(ChatSession).filter(ChatSession.last_active < cutoff)
+            db.query(ChatMessage).filter(
+                ChatMessage.session_id.in_(
+                    db.query(ChatSession.id)
+                    .filter(ChatSession.last_active < cutoff)
+                    .scalar_subquery()
+                )
+            ).delete(synchronize_session=False)
+            deleted = expired.delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        finally:
+            db.close()
+
+    def _cached(self, session_id: str, now: float) -> Optional[List[BaseMessage]]:
+        """Messages of a session in the LRU, unless idle past the TTL (call
+        with the lock held)."""
+        cached = self._sessions.get(session_id)
+        if cached is None:
+            return None
+        messages, last_active = cached
+        if now - last_active > self.ttl_seconds:
+            del self._sessions[session_id]
+            return None
+        self._sessions.move_to_end(session_id)
+        return messages
+
+    def _remember(self, session_id: str, messages: List[BaseMessage], now: float) -> None:
+        """Insert or refresh a session in the LRU, evicting the oldest ones."""
+        self._sessions[session_id] = (messages, now)
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def _trim(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        """Keep the newest messages within the message cap and token budget."""
+        messages = messages[-self.max_messages:]
+        total = sum(estimate_tokens(m.content) for m in messages)
+        while len(messages) > 1 and total > self.max_tokens:
+            total -= estimate_tokens(messages[0].content)
+            messages = messages[1:]
+        return messages
+
+    def _load(self, session_id: str) -> List[BaseMessage]:
+        """Load a session's newest messages from the database."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+        db = SessionLocal()
+        try:
+            session = db.query(ChatSession).filter(ChatSession.id == session_id).first()
+            if session is None or session.last_active < cutoff:
+                return []
+            rows = (
+                db.query(ChatMessage)
+                .filter(ChatMessage.session_id == session_id)
+                .order_by(ChatMessage.id.desc())
+                .limit(self.max_messages)
+                .all()
+            )
+        finally:
+            db.close()
+
+        messages = [
+            _MESSAGE_TYPES.get(row.role, HumanMessage)(content=row.content)
+            for row in reversed(rows)
+        ]
+        return self._trim(messages)
+
+    def _persist(self, session_id: str, messages: Sequence[BaseMessage], now: float) -> None:
+        """Write new messages and drop rows beyond the per-session cap."""
+        last_active = datetime.utcfromtimestamp(now)
+        db = SessionLocal()
+        try:
+            session = db.query(ChatSession).filter(ChatSession.id == session_id).first()
+            if session is None:
+                db.add(ChatSession(id=session_id, last_active=last_active))
+            else:
+                session.last_active = last_active
+            for message in messages:
+                db.add(ChatMessage(
+                    session_id=session_id,
+                    role=message.type,
+                    content=message.content,
+                    created_at=last_active
+                ))
+            db.flush()
+
+            stale = (
+                db.query(ChatMessage.id)
+                .filter(ChatMessage.session_id == session_id)
+                .order_by(ChatMessage.id.desc())
+                .offset(self.max_messages)
+            )
+            db.query(ChatMessage).filter(
+                ChatMessage.id.in_(stale.scalar_subquery())
+            ).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+
+class SessionChatMessageHistory(BaseChatMessageHistory):
+    """LangChain chat history backed by a `SessionStore`."""
+
+    def __init__(self, session_id: str, store: SessionStore):
+        self.session_id = session_id
+        self.store = store
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        return self.store.get_messages(self.session_id)
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        self.store.add_messages(self.session_id, messages)
+
+    def clear(self) -> None:
+        self.store.clear(self.session_id)
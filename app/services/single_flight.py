@@ -0,0 +1,108 @@
+import asyncio
+from typing import AsyncIterator, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class _Flight:
+    """Events of one shared computation, kept for late subscribers."""
+
+    def __init__(self):
+        self.events: List[Dict] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.changed = asyncio.Condition()
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+
+
+class SingleFlight:
+    """
+    Shares one in-flight computation among concurrent identical requests.
+
+    The first request for a key starts the computation in its own task; the
+    ones arriving while it runs subscribe to it instead of starting their
+    own. Every subscriber sees all events from the beginning, so requests
+    that arrive late still get the whole answer. The computation is cancelled
+    if every subscriber goes away before it finishes.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def join(
+        self, key: Hashable, start: Callable[[], AsyncIterator[Dict]]
+    ) -> Tuple[AsyncIterator[Dict], bool]:
+        """
+        Subscribe to the computation for `key`, starting it if none is in
+        flight.
+
+        Args:
+            key: Identity of the request
+            start: Called (in the caller's context) to start the computation;
+                returns its events
+
+        Returns:
+            Tuple of the events and whether this request started the
+            computation
+        """
+        flight = self._flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.ensure_future(self._run(key, flight, start()))
+            self.leaders += 1
+        else:
+            self.followers += 1
+        return self._follow(key, flight), leader
+
+    async def _run(self, key: Hashable, flight: _Flight, events: AsyncIterator[Dict]) -> None:
+        try:
+            async for event in events:
+                async with flight.changed:
+                    flight.events.append(event)
+                    flight.changed.notify_all()
+        except BaseException as e:
+            flight.error = e
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            flight.done = True
+            async with flight.changed:
+                flight.changed.notify_all()
+
+    async def _follow(self, key: Hashable, flight: _Flight) -> AsyncIterator[Dict]:
+        flight.subscribers += 1
+        try:
+            seen = 0
+            while True:
+                async with flight.changed:
+                    await flight.changed.wait_for(lambda: seen < len(flight.events) or flight.done)
+                    events = flight.events[seen:]
+                for event in events:
+                    yield event
+                seen += len(events)
+                if flight.done and seen == len(flight.events):
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                # Nobody is waiting any more; new requests start afresh
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+
+    def stats(self) -> Dict:
+        """Get counters of computations started and requests coalesced."""
+        total = self.leaders + self.followers
+        return {
+            "in_flight": len(self._flights),
+            "started": self.leaders,
+            "coalesced": self.followers,
+            "coalesced_rate": self.followers / total if total else 0.0,
+        }
@@ -0,0 +1,76 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from app.services.metrics import STAGE_SECONDS
+
+
+class StageTimings(dict):
+    """Stage name -> latency in milliseconds, for one request."""
+
+    def __init__(self):
+        super().__init__()
+        self.start = time.perf_counter()
+
+    def elapsed(self) -> float:
+        """Milliseconds since the request started."""
+        return round((time.perf_counter() - self.start) * 1000, 3)
+
+    def mark(self, stage: str) -> None:
+        """Record the time elapsed since the start under `stage`."""
+        self[stage] = self.elapsed()
+
+    def snapshot(self) -> Dict[str, float]:
+        """Copy of the stage timings, plus the total so far."""
+        return {**self, "total": self.elapsed()}
+
+
+# Stage timings of the request being processed. Tasks and threads started by
+# the request copy the context, so they record into the same dict.
+_timings: ContextVar[Optional[StageTimings]] = ContextVar("timings", default=None)
+
+
+@contextmanager
+def timing_context() -> Iterator[StageTimings]:
+    """
+    Collect stage timings for the duration of a request. Nested contexts
+    share the outermost one, so the timings recorded by the chat pipeline
+    are also seen by the HTTP middleware that reports them.
+
+    Yields:
+        StageTimings that `timed` blocks record their latency into
+    """
+    outer = _timings.get()
+    if outer is not None:
+        yield outer
+        return
+    timings = StageTimings()
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        try:
+            _timings.reset(token)
+        except ValueError:
+            # A streaming generator closed from another context (e.g. on
+            # client disconnect); that context never saw the value
+            pass
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """
+    Record how long a block takes under `stage`, in the request's timings
+    (added up if a stage runs more than once) when inside a
+    `timing_context`, and in the stage latency histogram.
+    """
+    timings = _timings.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        if timings is not None:
+            timings[stage] = round(timings.get(stage, 0.0) + elapsed * 1000, 3)
@@ -1,4 +1,56 @@
-def translate_text(text, source_lang, target_lang, llm):
+import asyncio
+import re
+from typing import AsyncIterator, List
+
+from app.config import settings
+from app.services.limits import upstream_slot
+from app.services.llm_router import fast_llm
+from app.services.timing import timed
+from app.services.translation_cache import get_translation_cache, translation_key
+
+# Marker line that opens each segment of a batched translation prompt
+_SEGMENT_MARKER = re.compile(r"^\s*\[\[(\d+)\]\]\s*$", re.MULTILINE)
+
+
+def _build_translation_prompt(text, source_lang, target_lang):
+    """Build the legal translation prompt for a piece of text."""
+    return f"""
+    You are a professional legal translator with expertise in accurately translating legal documents while preserving their precise meaning and intent.
+
+    Task:
+    Translate the following text from {source_lang} to {target_lang}, ensuring that the legal terminology, nuances, and context remain intact. The translation must be legally accurate and convey the original intent without any misinterpretation or ambiguity.
+
+    Guidelines:
+    - Legal Precision: Maintain the original legal meaning, terminology, and structure. Avoid altering or omitting any critical legal details.
+    - Clarity & Readability: Ensure the translation is clear, concise, and easy to understand while preserving formal legal language.
+    - Structured Formatting: Use short paragraphs, bullet points, and proper spacing to enhance readability.
+    - No Additional Content: Provide only the translated text without any introductory phrases, explanations, or extra notes.
+
+    Output Format:
+    - Strictly translated legal text without any personal interpretation.
+    - Well-organized and properly formatted text to ensure readability and professional presentation.
+
+    {text}
+    """
+
+
+def _build_batch_translation_prompt(texts, source_lang, target_lang):
+    """Build a prompt translating several numbered segments in one round-trip."""
+    segments = "\n\n".join(f"[[{i}]]\n{text}" for i, text in enumerate(texts, 1))
+    instructions = _build_translation_prompt("", source_lang, target_lang).rstrip()
+    return f"""{instructions}
+    - Segments: The text below is split into segments, each starting with a marker line such as [[1]]. Translate every segment separately and keep each marker line exactly as it is, in the same order.
+
+    {segments}
+    """
+
+
+def _split_paragraphs(text: str) -> List[str]:
+    """Split text into non-empty paragraphs at blank lines."""
+    return [paragraph for paragraph in re.split(r"\n\s*\n", text) if paragraph.strip()]
+
+
+async def translate_text(text, source_lang, target_lang, llm):
     """
     Translate text from source language to target language.
     
@@ -6,7 +58,7 @@ def translate_text(text, source_lang, target_lang, llm):
         text: Text to translate
         source_lang: Source language
         target_lang: Target language
-        llm: Language model to use for translation
+        llm: Language model to use for translation (its fast tier, if any)
         
     Returns:
         Translated text
@@ -14,24 +66,161 @@ def translate_text(text, source_lang, target_lang, llm):
     if source_lang == target_lang:
         return text
 
-    translation_prompt = f"""
-    You are a professional legal translator with expertise in accurately translating legal documents while preserving their precise meaning and intent.
+    # Translate paragraph by paragraph so partially repeated answers reuse
+    # the cached translations of the paragraphs they share
+    paragraphs = _split_paragraphs(text)
+    if not paragraphs:
+        return text
+    translations = await translate_batch(paragraphs, source_lang, target_lang, llm)
+    return "\n\n".join(translations)
 
-    Task:
-    Translate the following text from {source_lang} to {target_lang}, ensuring that the legal terminology, nuances, and context remain intact. The translation must be legally accurate and convey the original intent without any misinterpretation or ambiguity.
 
-    Guidelines:
-    - Legal Precision: Maintain the original legal meaning, terminology, and structure. Avoid altering or omitting any critical legal details.
-    - Clarity & Readability: Ensure the translation is clear, concise, and easy to understand while preserving formal legal language.
-    - Structured Formatting: Use short paragraphs, bullet points, and proper spacing to enhance readability.
-    - No Additional Content: Provide only the translated text without any introductory phrases, explanations, or extra notes.
+async def translate_batch(texts, source_lang, target_lang, llm):
+    """
+    Translate several texts, using the translation cache and one LLM
+    round-trip for all cache misses (split into groups of at most
+    TRANSLATION_BATCH_MAX_CHARS characters).
+    
+    Args:
+        texts: Texts to translate
+        source_lang: Source language
+        target_lang: Target language
+        llm: Language model to use for translation (its fast tier, if any)
+        
+    Returns:
+        Translated texts, in the same order
+    """
+    if source_lang == target_lang:
+        return list(texts)
 
-    Output Format:
-    - Strictly translated legal text without any personal interpretation.
-    - Well-organized and properly formatted text to ensure readability and professional presentation.
+    cache = get_translation_cache()
+    keys = [translation_key(text, source_lang, target_lang) for text in texts]
+    with timed("translation.cache"):
+        found = await asyncio.to_thread(cache.get_many, keys) if cache is not None else {}
 
-    {text}
+    # Unique cache misses, grouped to keep each prompt a reasonable size
+    pending = {}
+    for key, text in zip(keys, texts):
+        if key not in found and key not in pending:
+            pending[key] = text
+    groups, group, size = [], [], 0
+    for key in pending:
+        if group and size + len(pending[key]) > settings.TRANSLATION_BATCH_MAX_CHARS:
+            groups.append(group)
+            group, size = [], 0
+        group.append(key)
+        size += len(pending[key])
+    if group:
+        groups.append(group)
+
+    results = await asyncio.gather(*(
+        _translate_group([pending[key] for key in group], source_lang, target_lang, llm)
+        for group in groups
+    ))
+    translated = {
+        key: translation
+        for group, translations in zip(groups, results)
+        for key, translation in zip(group, translations)
+    }
+    if cache is not None:
+        await asyncio.to_thread(cache.put_many, translated)
+
+    found.update(translated)
+    return [found[key] for key in keys]
+
+
+async def _translate_group(texts, source_lang, target_lang, llm):
+    """Translate a group of texts in a single LLM call."""
+    if len(texts) == 1:
+        prompt = _build_translation_prompt(texts[0], source_lang, target_lang)
+    else:
+        prompt = _build_batch_translation_prompt(texts, source_lang, target_lang)
+    with timed("translation.llm"):
+        async with upstream_slot("translation"):
+            response = await fast_llm(llm).ainvoke(prompt)
+    if len(texts) == 1:
+        return [response.content.strip()]
+
+    parts = _SEGMENT_MARKER.split(response.content)
+    segments = {int(number): part.strip() for number, part in zip(parts[1::2], parts[2::2])}
+    if all(i in segments for i in range(1, len(texts) + 1)):
+        return [segments[i] for i in range(1, len(texts) + 1)]
+
+    # The model did not keep the segment markers; translate one by one
+    results = await asyncio.gather(*(
+        _translate_group([text], source_lang, target_lang, llm) for text in texts
+    ))
+    return [result[0] for result in results]
+
+
+async def stream_translation(
+    text_stream: AsyncIterator[str],
+    source_lang: str,
+    target_lang: str,
+    llm
+) -> AsyncIterator[str]:
     """
+    Translate a stream of text incrementally, one paragraph at a time.
     
-    response = llm.invoke(translation_prompt)
-    return response.content
\ No newline at end of file
+    Paragraphs are cut from the incoming stream at blank lines and each one is
+    translated (and streamed) as soon as it is complete, while the source
+    stream keeps producing the next paragraph.
+    
+    Args:
+        text_stream: Async iterator of source text fragments
+        source_lang: Source language
+        target_lang: Target language
+        llm: Language model to use for translation (its fast tier, if any)
+        
+    Yields:
+        Translated text fragments
+    """
+    if source_lang == target_lang:
+        async for fragment in text_stream:
+            yield fragment
+        return
+
+    paragraphs: asyncio.Queue = asyncio.Queue()
+
+    async def split_paragraphs():
+        buffer = ""
+        try:
+            async for fragment in text_stream:
+                buffer += fragment
+                while "\n\n" in buffer:
+                    paragraph, buffer = buffer.split("\n\n", 1)
+                    if paragraph.strip():
+                        await paragraphs.put(paragraph)
+            if buffer.strip():
+                await paragraphs.put(buffer)
+        finally:
+            await paragraphs.put(None)
+
+    cache = get_translation_cache()
+    producer = asyncio.create_task(split_paragraphs())
+    try:
+        first = True
+        while (paragraph := await paragraphs.get()) is not None:
+            if not first:
+                yield "\n\n"
+            first = False
+
+            key = translation_key(paragraph, source_lang, target_lang)
+            with timed("translation.cache"):
+                cached = await asyncio.to_thread(cache.get, key) if cache is not None else None
+            if cached is not None:
+                yield cached
+                continue
+
+            translation_prompt = _build_translation_prompt(paragraph, source_lang, target_lang)
+            parts = []
+            async with upstream_slot("translation"):
+                async for chunk in fast_llm(llm).astream(translation_prompt):
+                    parts.append(chunk.content)
+                    yield chunk.content
+            if cache is not None:
+                await asyncio.to_thread(cache.put_many, {key: "".join(parts).strip()})
+        # Surface any error raised while reading the source stream
+        await producer
+    finally:
+        producer.cancel()
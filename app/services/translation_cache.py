@@ -0,0 +1,124 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from app.config import settings
+from app.database import SessionLocal, TranslationCacheEntry
+
+
+def translation_key(text: str, source_lang: str, target_lang: str) -> str:
+    """Content-addressed cache key for a translation."""
+    payload = f"{source_lang}\x00{target_lang}\x00{text.strip()}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    """
+    Two-level translation cache: an in-process LRU in front of a table in the
+    application database, so translations are shared across workers and
+    survive restarts.
+    """
+
+    def __init__(self, max_entries: int = settings.TRANSLATION_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """
+        Look up translations by key.
+
+        Returns:
+            Mapping of the keys that were found to their translations
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+
+        missing = [key for key in keys if key not in found]
+        if missing:
+            db = SessionLocal()
+            try:
+                rows = (
+                    db.query(TranslationCacheEntry)
+                    .filter(TranslationCacheEntry.key.in_(missing))
+                    .all()
+                )
+            finally:
+                db.close()
+            with self._lock:
+                for row in rows:
+                    found[row.key] = row.translation
+                    self._remember(row.key, row.translation)
+
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up a single translation by key."""
+        return self.get_many([key]).get(key)
+
+    def put_many(self, translations: Dict[str, str]) -> None:
+        """Store translations by key in memory and on disk."""
+        if not translations:
+            return
+        with self._lock:
+            for key, translation in translations.items():
+                self._remember(key, translation)
+        db = SessionLocal()
+        try:
+            try:
+                self._merge(db, translations)
+            except IntegrityError:
+                # A concurrent request inserted some of the same keys between
+                # our lookup and insert; merging again updates those rows
+                db.rollback()
+                self._merge(db, translations)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _merge(db, translations: Dict[str, str]) -> None:
+        for key, translation in translations.items():
+            db.merge(TranslationCacheEntry(key=key, translation=translation))
+        db.commit()
+
+    def stats(self) -> Dict:
+        """Get hit/miss counters for the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._memory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _remember(self, key: str, translation: str) -> None:
+        self._memory[key] = translation
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+@lru_cache
+def _get_translation_cache() -> TranslationCache:
+    return TranslationCache()
+
+
+def get_translation_cache() -> Optional[TranslationCache]:
+    """Get the process-wide translation cache, or None if it is disabled."""
+    if not settings.TRANSLATION_CACHE_ENABLED:
+        return None
+    return _get_translation_cache()
@@ -0,0 +1,239 @@
+import glob
+import math
+import os
+import pickle
+import shutil
+import tempfile
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+from app.config import settings
+from app.services.bm25 import BM25_FILES, write_bm25_index
+from app.services.docstore import (
+    DOCSTORE_FILE, ReadOnlyConnection, SQLiteDocstore, SQLiteIndexMap, write_sqlite_docstore
+)
+from app.services.relevance import RELEVANCE_FILES, write_relevance_prototypes
+
+# Index types selectable through VECTOR_INDEX_TYPE
+INDEX_TYPES = ("Flat", "IVFFlat", "HNSW", "IVFPQ")
+
+# Read flags mapping an index's vectors straight from the file. FAISS
+# builds without IO_FLAG_MMAP_IFC (< 1.10) fall back to IO_FLAG_MMAP, which
+# maps inverted lists but still copies flat code arrays
+_MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+# Times the docstore and index are opened while a re-ingest swaps them
+_LOAD_ATTEMPTS = 2
+
+# Minimum training points per IVF or PQ centroid recommended by FAISS
+_MIN_POINTS_PER_CENTROID = 39
+
+
+def index_file(store_path, index_type):
+    """
+    Path of the search index of a given type. The exact Flat index is always
+    saved as `index.faiss` (it is what incremental ingestion updates); the
+    approximate ones are built from it next to it.
+    """
+    if index_type == "Flat":
+        return os.path.join(store_path, "index.faiss")
+    return os.path.join(store_path, f"index.{index_type.lower()}.faiss")
+
+
+def _ivf_nlist(n):
+    """Number of IVF lists for `n` vectors (IVF_NLIST, or ~4*sqrt(n))."""
+    nlist = settings.IVF_NLIST or int(4 * math.sqrt(n))
+    return max(1, min(nlist, n // _MIN_POINTS_PER_CENTROID))
+
+
+def _pq_m(dimension):
+    """Largest number of PQ sub-quantizers <= PQ_M that divides the dimension."""
+    m = min(settings.PQ_M, dimension)
+    while dimension % m:
+        m -= 1
+    return m
+
+
+def build_index(vectors, index_type):
+    """
+    Build and train an index of the given type over a matrix of vectors.
+
+    Args:
+        vectors: float32 matrix of shape (n, dimension), in docstore order
+        index_type: One of INDEX_TYPES
+
+    Returns:
+        The populated index, or None if there are too few vectors to train it
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {index_type!r}. Must be one of: {', '.join(INDEX_TYPES)}")
+
+    n, dimension = vectors.shape
+    if index_type == "Flat":
+        index = faiss.IndexFlatL2(dimension)
+    elif index_type == "HNSW":
+        index = faiss.IndexHNSWFlat(dimension, settings.HNSW_M)
+        index.hnsw.efConstruction = settings.HNSW_EF_CONSTRUCTION
+    else:
+        nlist = _ivf_nlist(n)
+        if n < nlist * _MIN_POINTS_PER_CENTROID:
+            return None
+        if index_type == "IVFFlat":
+            index = faiss.index_factory(dimension, f"IVF{nlist},Flat")
+        else:
+            # Each PQ codebook of 2**PQ_NBITS centroids is trained like an IVF
+            if n < _MIN_POINTS_PER_CENTROID * 2 ** settings.PQ_NBITS:
+                return None
+            index = faiss.index_factory(dimension, f"IVF{nlist},PQ{_pq_m(dimension)}x{settings.PQ_NBITS}")
+        index.train(vectors)
+
+    index.add(vectors)
+    return index
+
+
+def configure_search(index):
+    """Apply the query-time knobs (IVF_NPROBE, HNSW_EF_SEARCH) to an index."""
+    # The downcast view does not own the index, so only use it to set knobs
+    # and hand back the original object
+    typed = faiss.downcast_index(index)
+    if isinstance(typed, faiss.IndexIVF):
+        typed.nprobe = settings.IVF_NPROBE
+    elif isinstance(typed, faiss.IndexHNSW):
+        typed.hnsw.efSearch = settings.HNSW_EF_SEARCH
+    return index
+
+
+def reconstruct_all(index):
+    """Copy every vector out of an exact index, in position order."""
+    if index.ntotal == 0:
+        return np.empty((0, index.d), dtype=np.float32)
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def _write_index_atomically(index, path):
+    """
+    Write an index to a temporary file and move it into place. API workers
+    may have the old file memory-mapped; overwriting it in place would
+    change (or truncate) the pages under them.
+    """
+    tmp_path = f"{path}.tmp"
+    faiss.write_index(index, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def save_vector_store(vectors: FAISS, store_path):
+    """
+    Save a vector store: the LangChain files used for incremental updates
+    (`index.faiss` and `index.pkl`) plus the SQLite docstore, BM25 index and
+    relevance prototypes the API serves from. Every file is swapped into
+    place atomically.
+
+    Args:
+        vectors: Vector store to save
+        store_path: Directory to save it to
+    """
+    os.makedirs(store_path, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=store_path, prefix=".save-")
+    try:
+        vectors.save_local(tmp_dir)
+        write_sqlite_docstore(vectors, os.path.join(tmp_dir, DOCSTORE_FILE))
+        write_bm25_index(vectors, tmp_dir)
+        write_relevance_prototypes(vectors, tmp_dir)
+        names = ("index.faiss", "index.pkl", DOCSTORE_FILE, *BM25_FILES.values(), *RELEVANCE_FILES.values())
+        for name in names:
+            os.replace(os.path.join(tmp_dir, name), os.path.join(store_path, name))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def save_search_index(vectors: FAISS, store_path, index_type=None):
+    """
+    Build the configured approximate index from a saved Flat store.
+
+    Approximate indexes of other types left over from earlier runs are
+    removed, since their positions no longer match the docstore.
+
+    Args:
+        vectors: Vector store with an exact (Flat) index
+        store_path: Directory the store was saved to
+        index_type: Index type to build (defaults to VECTOR_INDEX_TYPE)
+
+    Returns:
+        The index type that will be served from `store_path`
+    """
+    index_type = index_type or settings.VECTOR_INDEX_TYPE
+    for path in glob.glob(os.path.join(store_path, "index.*.faiss")):
+        os.remove(path)
+    if index_type == "Flat":
+        return "Flat"
+
+    index = build_index(reconstruct_all(vectors.index), index_type)
+    if index is None:
+        # Too few vectors to train on; exact search is cheap at this size
+        return "Flat"
+    _write_index_atomically(index, index_file(store_path, index_type))
+    return index_type
+
+
+def load_vector_store(store_path, embeddings, index_type=None, mmap=None):
+    """
+    Load a vector store, searching with the configured index type if it was
+    built for this store and with the exact Flat index otherwise.
+
+    With memory mapping, the index is mapped read-only instead of copied onto
+    the heap and chunks are read from the SQLite docstore on demand, so
+    loading is near-instant and every worker shares the same pages. Stores
+    saved before the SQLite docstore existed are loaded from the pickle.
+
+    Args:
+        store_path: Directory of the saved store
+        embeddings: Embeddings to use for queries
+        index_type: Index type to load (defaults to VECTOR_INDEX_TYPE)
+        mmap: Memory-map the store (defaults to VECTOR_STORE_MMAP)
+
+    Returns:
+        FAISS vector store
+
+    Raises:
+        RuntimeError: If the memory-mapped index and docstore still disagree
+            on the number of chunks after reopening them
+    """
+    index_type = index_type or settings.VECTOR_INDEX_TYPE
+    mmap = settings.VECTOR_STORE_MMAP if mmap is None else mmap
+    path = index_file(store_path, index_type)
+    if not os.path.exists(path):
+        path = index_file(store_path, "Flat")
+
+    docstore_path = os.path.join(store_path, DOCSTORE_FILE)
+    if mmap and os.path.exists(docstore_path):
+        # The docstore is opened once, before the index, and both stay open:
+        # a re-ingest replacing the files cannot pair positions of one
+        # version with chunks of another. If a save lands between the two
+        # opens and changes the number of chunks, the pair is opened again.
+        for _ in range(_LOAD_ATTEMPTS):
+            connection = ReadOnlyConnection(docstore_path)
+            index = faiss.read_index(path, _MMAP_FLAGS)
+            index_to_docstore_id = SQLiteIndexMap(connection)
+            chunks = len(index_to_docstore_id)
+            if chunks == index.ntotal:
+                break
+            connection.close()
+        else:
+            raise RuntimeError(
+                f"Vector store at {store_path} has {index.ntotal} vectors but "
+                f"{chunks} chunks; it is being rebuilt or is corrupt"
+            )
+        return FAISS(
+            embeddings,
+            configure_search(index),
+            SQLiteDocstore(connection),
+            index_to_docstore_id
+        )
+
+    index = configure_search(faiss.read_index(path))
+    with open(os.path.join(store_path, "index.pkl"), "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+
+    return FAISS(embeddings, index, docstore, index_to_docstore_id)
@@ -0,0 +1,117 @@
+"""
+Load benchmark for the async chat pipeline.
+
+Runs `get_chat_response` against a fake LLM and retriever with injected
+latency, sequentially and then with many concurrent sessions, and reports
+throughput and latency percentiles. Every request asks a different question,
+so identical in-flight requests are not coalesced; a last run sends one
+question from every session to report the effect of coalescing separately.
+
+    python -m benchmarks.bench_async_chat --requests 64 --concurrency 32
+    python -m benchmarks.bench_async_chat --strict --retrieval-latency 0.3 [--no-speculation]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from langchain.memory import ConversationBufferWindowMemory
+
+from app.config import settings
+from app.services.chatbot import get_chat_response
+from benchmarks.fakes import FakeChatModel, FakeRetriever
+
+
+def new_memory() -> ConversationBufferWindowMemory:
+    return ConversationBufferWindowMemory(
+        k=2,
+        memory_key="chat_history",
+        return_messages=True,
+        output_key="answer"
+    )
+
+
+def question(i: int) -> str:
+    return f"What are my rights on arrest for offence number {i}?"
+
+
+async def run_one(query: str, llm, retriever, language: str, strict: bool) -> float:
+    start = time.perf_counter()
+    await get_chat_response(
+        query=query,
+        category="Criminal Law",
+        language=language,
+        retriever=retriever,
+        llm=llm,
+        memory=new_memory(),
+        strict_category_check=strict
+    )
+    return time.perf_counter() - start
+
+
+async def run_load(
+    total: int, concurrency: int, llm, retriever, language: str, strict: bool, identical: bool = False
+):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(i):
+        async with semaphore:
+            return await run_one(question(0 if identical else i), llm, retriever, language, strict)
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(bounded(i) for i in range(total)))
+    wall = time.perf_counter() - start
+    return wall, sorted(latencies)
+
+
+def report(label: str, total: int, wall: float, latencies) -> None:
+    p50 = statistics.median(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{label:<12} requests={total:<5} wall={wall:7.2f}s "
+        f"throughput={total / wall:7.2f} req/s p50={p50:.3f}s p99={p99:.3f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Async chat pipeline load benchmark")
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--retrieval-latency", type=float, default=0.05)
+    parser.add_argument("--language", default="English")
+    parser.add_argument("--strict", action="store_true", help="Enable the category relevance check")
+    parser.add_argument(
+        "--no-speculation", action="store_true",
+        help="Wait for the relevance check before retrieving (with --strict)"
+    )
+    parser.add_argument(
+        "--skip-coalescing", action="store_true",
+        help="Skip the run with one question from every session"
+    )
+    args = parser.parse_args()
+    settings.SPECULATIVE_RETRIEVAL_ENABLED = not args.no_speculation
+
+    llm = FakeChatModel(response="YES", latency=args.llm_latency)
+    retriever = FakeRetriever(latency=args.retrieval_latency)
+
+    sequential_total = max(1, min(args.requests, 8))
+    wall, latencies = asyncio.run(
+        run_load(sequential_total, 1, llm, retriever, args.language, args.strict)
+    )
+    report("sequential", sequential_total, wall, latencies)
+
+    wall, latencies = asyncio.run(
+        run_load(args.requests, args.concurrency, llm, retriever, args.language, args.strict)
+    )
+    report(f"c={args.concurrency}", args.requests, wall, latencies)
+
+    if not args.skip_coalescing and settings.COALESCING_ENABLED:
+        wall, latencies = asyncio.run(
+            run_load(args.requests, args.concurrency, llm, retriever, args.language, args.strict, identical=True)
+        )
+        report("coalesced", args.requests, wall, latencies)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Micro-benchmark of per-request overhead in the chat pipeline.
+
+Compares the old behaviour, which built the LLM client, retriever and a
+``ConversationalRetrievalChain`` on every request, with the current pipeline
+that reuses cached ones, using zero-latency fakes so that only the pipeline's
+own overhead is measured.
+
+    python -m benchmarks.bench_chain_overhead --requests 500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from langchain.chains import ConversationalRetrievalChain
+from langchain.memory import ConversationBufferWindowMemory
+from langchain_groq import ChatGroq
+
+from app.services.chatbot import get_chat_response
+from benchmarks.fakes import FakeChatModel, FakeRetriever
+
+
+def new_memory() -> ConversationBufferWindowMemory:
+    return ConversationBufferWindowMemory(
+        k=2,
+        memory_key="chat_history",
+        return_messages=True,
+        output_key="answer"
+    )
+
+
+def new_client() -> ChatGroq:
+    # Building the client is all that is measured; no request is sent
+    return ChatGroq(groq_api_key="benchmark", model_name="llama3-70b-8192")
+
+
+async def rebuild_request(query: str, category: str):
+    """Answer one request the way the pipeline did before chains were cached."""
+    client = new_client()
+    llm = FakeChatModel(response="Sample answer.", latency=0.0)
+    retriever = FakeRetriever(latency=0.0)
+    qa = ConversationalRetrievalChain.from_llm(
+        llm=llm,
+        retriever=retriever,
+        memory=new_memory(),
+        return_source_documents=True
+    )
+    result = await qa.ainvoke({"question": f"[Category: {category}] {query}"})
+    del client
+    return result
+
+
+async def run(total: int, reuse: bool) -> list:
+    llm = FakeChatModel(response="Sample answer.", latency=0.0)
+    retriever = FakeRetriever(latency=0.0)
+    latencies = []
+    for _ in range(total):
+        start = time.perf_counter()
+        if reuse:
+            await get_chat_response(
+                query="What are my rights on arrest?",
+                category="Criminal Law",
+                language="English",
+                retriever=retriever,
+                llm=llm,
+                memory=new_memory()
+            )
+        else:
+            await rebuild_request("What are my rights on arrest?", "Criminal Law")
+        latencies.append(time.perf_counter() - start)
+    return sorted(latencies)
+
+
+def report(label: str, latencies: list) -> None:
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    mean = statistics.mean(latencies) * 1000
+    print(f"{label:<10} requests={len(latencies):<5} mean={mean:7.3f}ms p50={p50:7.3f}ms p99={p99:7.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request chain overhead micro-benchmark")
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    # Warm up imports and lazily initialised state before measuring
+    asyncio.run(run(10, reuse=False))
+    asyncio.run(run(10, reuse=True))
+
+    report("rebuild", asyncio.run(run(args.requests, reuse=False)))
+    report("reuse", asyncio.run(run(args.requests, reuse=True)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Recall/latency benchmark for the vector index types.
+
+Builds every index type in INDEX_TYPES over the vectors of the saved
+corpus (or a synthetic clustered corpus) and compares each against exact
+Flat search: recall@k, mean query latency, build time and index size.
+Queries are stored vectors with a little noise added, standing in for
+paraphrased questions.
+
+    python -m benchmarks.bench_index --k 4 --queries 500
+    python -m benchmarks.bench_index --synthetic 50000 --nprobe 16 --ef-search 128
+"""
+import argparse
+import os
+import time
+
+import faiss
+import numpy as np
+
+from app.config import settings
+from app.services.vector_index import INDEX_TYPES, build_index, configure_search, reconstruct_all
+
+
+def load_corpus(args) -> np.ndarray:
+    if args.synthetic:
+        rng = np.random.default_rng(0)
+        centers = rng.standard_normal((max(1, args.synthetic // 100), args.dimension))
+        labels = rng.integers(0, len(centers), args.synthetic)
+        vectors = centers[labels] + 0.3 * rng.standard_normal((args.synthetic, args.dimension))
+        return vectors.astype(np.float32)
+    path = os.path.join(args.store_path, "index.faiss")
+    return reconstruct_all(faiss.read_index(path))
+
+
+def make_queries(vectors: np.ndarray, count: int, noise: float) -> np.ndarray:
+    rng = np.random.default_rng(1)
+    picks = vectors[rng.integers(0, len(vectors), count)]
+    scale = noise * np.linalg.norm(picks, axis=1, keepdims=True) / np.sqrt(vectors.shape[1])
+    return (picks + scale * rng.standard_normal(picks.shape)).astype(np.float32)
+
+
+def timed_search(index, queries: np.ndarray, k: int):
+    # One query at a time, as the API searches
+    results = np.empty((len(queries), k), dtype=np.int64)
+    start = time.perf_counter()
+    for i, query in enumerate(queries):
+        _, results[i] = index.search(query[None, :], k)
+    return results, (time.perf_counter() - start) / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vector index recall/latency benchmark")
+    parser.add_argument("--store-path", default=settings.VECTOR_STORE_PATH)
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N synthetic vectors instead of the saved corpus")
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--noise", type=float, default=0.1)
+    parser.add_argument("--k", type=int, default=settings.RETRIEVAL_K)
+    parser.add_argument("--nprobe", type=int, default=settings.IVF_NPROBE)
+    parser.add_argument("--ef-search", type=int, default=settings.HNSW_EF_SEARCH)
+    args = parser.parse_args()
+
+    settings.IVF_NPROBE = args.nprobe
+    settings.HNSW_EF_SEARCH = args.ef_search
+
+    vectors = load_corpus(args)
+    queries = make_queries(vectors, args.queries, args.noise)
+    print(f"corpus={len(vectors)} dimension={vectors.shape[1]} queries={len(queries)} k={args.k}")
+
+    truth = None
+    for index_type in INDEX_TYPES:
+        start = time.perf_counter()
+        index = build_index(vectors, index_type)
+        build_seconds = time.perf_counter() - start
+        if index is None:
+            print(f"{index_type:<8} skipped: too few vectors to train")
+            continue
+        index = configure_search(index)
+        results, latency = timed_search(index, queries, args.k)
+        if truth is None:
+            truth = results
+        recall = np.mean([
+            len(set(found) & set(expected)) / args.k
+            for found, expected in zip(results, truth)
+        ])
+        size_mb = faiss.serialize_index(index).nbytes / 1e6
+        print(
+            f"{index_type:<8} recall@{args.k}={recall:.3f} latency={latency * 1e3:.3f}ms "
+            f"build={build_seconds:.2f}s size={size_mb:.1f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Ingestion throughput benchmark.
+
+Builds a fresh vector store from a directory of PDFs with a local fake
+embedding model (injected latency per request) and reports chunks per
+second, first with a serial configuration (one parse worker, one request in
+flight) and then with the configured pipeline settings.
+
+    python -m benchmarks.bench_ingestion --data-dir ./LEGAL-DATA --latency 0.2
+"""
+import argparse
+import tempfile
+import time
+
+from app.config import settings
+from app.services.embedding import embed_and_save_documents
+from benchmarks.fakes import FakeEmbeddings
+
+
+def run(data_dir: str, latency: float, parse_workers: int, max_in_flight: int) -> dict:
+    settings.INGEST_PARSE_WORKERS = parse_workers
+    settings.INGEST_MAX_IN_FLIGHT = max_in_flight
+    embeddings = FakeEmbeddings(latency=latency)
+    with tempfile.TemporaryDirectory() as store_path:
+        settings.VECTOR_STORE_PATH = store_path
+        start = time.perf_counter()
+        chunks = embed_and_save_documents(data_dir, embeddings=embeddings)
+        elapsed = time.perf_counter() - start
+    return {
+        "chunks": chunks,
+        "seconds": elapsed,
+        "chunks_per_second": chunks / elapsed if elapsed else 0.0,
+        "embedding_requests": embeddings.calls,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestion pipeline throughput benchmark")
+    parser.add_argument("--data-dir", default="./LEGAL-DATA")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake embedding latency per request")
+    parser.add_argument("--parse-workers", type=int, default=settings.INGEST_PARSE_WORKERS)
+    parser.add_argument("--max-in-flight", type=int, default=settings.INGEST_MAX_IN_FLIGHT)
+    parser.add_argument("--skip-serial", action="store_true", help="Only run the pipelined configuration")
+    args = parser.parse_args()
+
+    configs = [("pipelined", args.parse_workers, args.max_in_flight)]
+    if not args.skip_serial:
+        configs.insert(0, ("serial", 1, 1))
+
+    for label, parse_workers, max_in_flight in configs:
+        result = run(args.data_dir, args.latency, parse_workers, max_in_flight)
+        print(
+            f"{label:<10} workers={parse_workers} in_flight={max_in_flight} "
+            f"chunks={result['chunks']} time={result['seconds']:.2f}s "
+            f"throughput={result['chunks_per_second']:.1f} chunks/s "
+            f"requests={result['embedding_requests']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
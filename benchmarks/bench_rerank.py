@@ -0,0 +1,151 @@
+"""
+Quality/latency benchmark for the reranking stage.
+
+Chunks the PDFs of a local fixture corpus (LEGAL-DATA by default) with the
+ingestion chunker, indexes them for hybrid retrieval with deterministic
+fake embeddings, and asks questions built from the key words of randomly
+picked chunks, whose answer is that chunk. Each retrieval mode is scored on:
+
+- hit rate: share of queries whose chunk is among the passages returned
+- MRR: mean reciprocal rank of that chunk (0 if missing)
+- passages and context tokens sent to the LLM per query
+- reranking latency per query (mean and p95)
+
+The fake embeddings make vector hits noise, so the candidates come mostly
+from BM25; that is the harder case for the reranker, which has to pull the
+right chunk up from a noisy fused list.
+
+    python -m benchmarks.bench_rerank
+    python -m benchmarks.bench_rerank --data-dir LEGAL-DATA --files COI.pdf ipc_act.pdf --queries 300
+    python -m benchmarks.bench_rerank --cross-encoder
+"""
+import argparse
+import os
+import random
+import re
+import shutil
+import statistics
+import tempfile
+import time
+
+from langchain_community.vectorstores import FAISS
+
+from app.config import settings
+from app.services.bm25 import BM25Index, write_bm25_index
+from app.services.context_packing import count_tokens
+from app.services.embedding import load_and_split_pdf
+from app.services.rerank import CrossEncoderReranker, LexicalReranker
+from app.services.retrieval import HybridRetriever, RerankingRetriever
+from benchmarks.fakes import FakeEmbeddings
+
+_WORD = re.compile(r"[A-Za-z]{4,}")
+
+
+def load_chunks(args):
+    files = args.files or sorted(f for f in os.listdir(args.data_dir) if f.lower().endswith(".pdf"))
+    chunks = []
+    for filename in files:
+        split, _ = load_and_split_pdf(os.path.join(args.data_dir, filename))
+        chunks.extend(split.values())
+    return chunks
+
+
+def make_queries(chunks, count: int, words: int):
+    """(query, chunk text) pairs: words from a window of the chunk, in order."""
+    rng = random.Random(0)
+    queries = []
+    while len(queries) < count:
+        chunk = rng.choice(chunks)
+        tokens = _WORD.findall(chunk.page_content)
+        if len(tokens) < 3 * words:
+            continue
+        start = rng.randrange(len(tokens) - 3 * words + 1)
+        window = tokens[start:start + 3 * words]
+        picks = sorted(rng.sample(range(len(window)), words))
+        queries.append((" ".join(window[i] for i in picks), chunk.page_content))
+    return queries
+
+
+def evaluate(name, retriever, queries):
+    hits, reciprocal_ranks, passages, tokens, latencies = [], [], [], [], []
+    for query, expected in queries:
+        start = time.perf_counter()
+        documents = retriever.invoke(query)
+        latencies.append(time.perf_counter() - start)
+        texts = [doc.page_content for doc in documents]
+        rank = texts.index(expected) + 1 if expected in texts else 0
+        hits.append(rank > 0)
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+        passages.append(len(texts))
+        tokens.append(sum(count_tokens(text) for text in texts))
+    latencies.sort()
+    print(
+        f"{name:<14} hit={statistics.mean(hits):.3f} mrr={statistics.mean(reciprocal_ranks):.3f} "
+        f"passages={statistics.mean(passages):.2f} tokens={statistics.mean(tokens):.0f} "
+        f"retrieval={statistics.mean(latencies) * 1e3:.2f}ms "
+        f"p95={latencies[int(0.95 * (len(latencies) - 1))] * 1e3:.2f}ms"
+    )
+
+
+def time_reranker(name, reranker, candidates, queries):
+    latencies = []
+    for query, _ in queries:
+        texts = [doc.page_content for doc in candidates.invoke(query)]
+        start = time.perf_counter()
+        reranker.score(query, texts)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    print(
+        f"{name:<14} rerank mean={statistics.mean(latencies) * 1e3:.2f}ms "
+        f"p95={latencies[int(0.95 * (len(latencies) - 1))] * 1e3:.2f}ms "
+        f"candidates={settings.RERANK_CANDIDATES}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reranking quality/latency benchmark")
+    parser.add_argument("--data-dir", default="./LEGAL-DATA")
+    parser.add_argument("--files", nargs="*", help="PDFs of the data directory to use (default: all)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--query-words", type=int, default=6)
+    parser.add_argument("--candidates", type=int, default=settings.RERANK_CANDIDATES)
+    parser.add_argument("--cross-encoder", action="store_true", help="Also benchmark RERANK_MODEL (needs sentence-transformers)")
+    args = parser.parse_args()
+    settings.RERANK_CANDIDATES = args.candidates
+
+    start = time.perf_counter()
+    chunks = load_chunks(args)
+    vectors = FAISS.from_documents(chunks, FakeEmbeddings(latency=0.0))
+    directory = tempfile.mkdtemp(prefix="bench_rerank_")
+    write_bm25_index(vectors, directory)
+    keyword_index = BM25Index(directory)
+    queries = make_queries(chunks, args.queries, args.query_words)
+    print(
+        f"chunks={len(chunks)} queries={len(queries)} candidates={args.candidates} "
+        f"setup={time.perf_counter() - start:.1f}s"
+    )
+
+    def hybrid(k):
+        return HybridRetriever(
+            vector_store=vectors,
+            keyword_index=keyword_index,
+            k=k,
+            fetch_k=max(settings.HYBRID_FETCH_K, k)
+        )
+
+    candidates = hybrid(args.candidates)
+    rerankers = {"lexical": LexicalReranker(keyword_index)}
+    if args.cross_encoder:
+        rerankers["cross-encoder"] = CrossEncoderReranker()
+
+    evaluate(f"fused top-{settings.RETRIEVAL_K}", hybrid(settings.RETRIEVAL_K), queries)
+    for name, reranker in rerankers.items():
+        # No timeout: the quality of the reranker itself is measured here
+        evaluate(name, RerankingRetriever(retriever=candidates, reranker=reranker, timeout=float("inf")), queries)
+    for name, reranker in rerankers.items():
+        time_reranker(name, reranker, candidates, queries)
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
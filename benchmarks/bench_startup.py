@@ -0,0 +1,116 @@
+"""
+Worker startup benchmark for the vector store.
+
+Loads a saved store (or a synthetic one) in several fresh worker processes,
+first copied onto the heap from the pickle and then memory-mapped with the
+SQLite docstore, and reports per worker the load time and resident memory
+split into private (anonymous) and shared (file-backed) pages. Private
+memory is what multiplies with the number of workers.
+
+    python -m benchmarks.bench_startup --synthetic 100000 --workers 4
+    python -m benchmarks.bench_startup --store-path ./my_vector_store
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from app.config import settings
+from app.services.vector_index import load_vector_store, save_search_index, save_vector_store
+from benchmarks.fakes import FakeEmbeddings
+
+
+def build_synthetic_store(store_path: str, count: int, dimension: int) -> None:
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((count, dimension)).astype(np.float32)
+    index = faiss.IndexFlatL2(dimension)
+    index.add(vectors)
+    ids = [f"chunk-{i}" for i in range(count)]
+    text = "Section 1. Lorem ipsum legal text for benchmarking purposes. " * 15
+    docstore = InMemoryDocstore({
+        doc_id: Document(page_content=text, metadata={"source": f"act-{i % 50}.pdf", "page": i % 300})
+        for i, doc_id in enumerate(ids)
+    })
+    store = FAISS(FakeEmbeddings(size=dimension, latency=0), index, docstore, dict(enumerate(ids)))
+    save_vector_store(store, store_path)
+    save_search_index(store, store_path)
+
+
+def rss_kb() -> dict:
+    fields = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in ("RssAnon", "RssFile"):
+                fields[name] = int(value.split()[0])
+    return fields
+
+
+def worker(store_path: str, dimension: int, mmap: bool, results) -> None:
+    before = rss_kb()
+    start = time.perf_counter()
+    store = load_vector_store(store_path, FakeEmbeddings(size=dimension, latency=0), mmap=mmap)
+    loaded = time.perf_counter() - start
+    # One search, as the first request would, to fault in what it touches
+    store.similarity_search_by_vector(np.ones(dimension, dtype=np.float32).tolist(), k=settings.RETRIEVAL_K)
+    after = rss_kb()
+    results.put({
+        "seconds": loaded,
+        "private_mb": (after["RssAnon"] - before["RssAnon"]) / 1024,
+        "shared_mb": (after["RssFile"] - before["RssFile"]) / 1024,
+    })
+
+
+def run(store_path: str, dimension: int, mmap: bool, workers: int) -> list:
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(store_path, dimension, mmap, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    measurements = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return measurements
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vector store worker startup benchmark")
+    parser.add_argument("--store-path", default=settings.VECTOR_STORE_PATH)
+    parser.add_argument("--synthetic", type=int, default=0, help="Use a synthetic store of N chunks")
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store_path = args.store_path
+        dimension = args.dimension
+        if args.synthetic:
+            store_path = tmp_dir
+            build_synthetic_store(store_path, args.synthetic, dimension)
+        else:
+            dimension = faiss.read_index(os.path.join(store_path, "index.faiss")).d
+
+        for label, mmap in (("pickle", False), ("mmap", True)):
+            measurements = run(store_path, dimension, mmap, args.workers)
+            seconds = np.mean([m["seconds"] for m in measurements])
+            private = np.mean([m["private_mb"] for m in measurements])
+            shared = np.mean([m["shared_mb"] for m in measurements])
+            print(
+                f"{label:<7} workers={args.workers} load={seconds * 1e3:.1f}ms "
+                f"private={private:.1f}MB/worker shared={shared:.1f}MB/worker "
+                f"total_private={private * args.workers:.1f}MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
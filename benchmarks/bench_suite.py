@@ -0,0 +1,439 @@
+"""
+Reproducible offline benchmark suite for the RAG pipeline.
+
+Builds a vector store from a directory of PDFs (LEGAL-DATA, or synthetic
+statutes generated with reportlab) with deterministic fake embeddings, and
+serves it through the app's own retriever and chat pipeline with a fake LLM
+backend. Nothing leaves the machine and every input is derived from the
+seed, so two runs differ only by the code under test and the hardware.
+
+Measured:
+
+- ingestion: chunks per second into a fresh store, and the time to find an
+  unchanged corpus up to date
+- index load: in-process load time of the store, BM25 and section indexes,
+  and the load time and private/shared memory of a fresh worker process
+- retrieval: queries per second, sequential, concurrent and batched
+- chat: end-to-end latency percentiles, throughput and per-stage timings of
+  `get_chat_response` at each concurrency level
+- memory: resident and peak memory of this process after each phase
+
+Results are written as JSON, with the commit, environment and settings they
+were measured with; `--compare` prints the change of every metric against an
+earlier results file.
+
+    python -m benchmarks.bench_suite
+    python -m benchmarks.bench_suite --synthetic 40 --sections 60 --concurrency 1 8 32
+    python -m benchmarks.bench_suite --data-dir LEGAL-DATA --llm-latency 0.5
+    python -m benchmarks.bench_suite --compare benchmark-results/<commit>.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+from app import dependencies
+from app.config import settings
+from app.services.bm25 import BM25Index
+from app.services.chatbot import get_chat_response
+from app.services.embedding import embed_and_save_documents
+from app.services.llm_router import build_llm_router
+from app.services.retrieval import retrieve_batch
+from app.services.section_index import SectionIndex
+from app.services.vector_index import load_vector_store
+from benchmarks import bench_startup
+from benchmarks.bench_async_chat import new_memory
+from benchmarks.bench_rerank import make_queries
+from benchmarks.fakes import FakeEmbeddings
+
+# Settings that change what is measured, recorded with the results
+RECORDED_SETTINGS = (
+    "CHUNKING_STRATEGY", "CHUNK_SIZE", "VECTOR_INDEX_TYPE", "VECTOR_STORE_MMAP",
+    "HYBRID_RETRIEVAL_ENABLED", "RETRIEVAL_K", "RERANKER", "RERANK_CANDIDATES",
+    "CONTEXT_PACKING_ENABLED", "CONTEXT_TOKEN_BUDGET", "INGEST_PARSE_WORKERS",
+    "INGEST_EMBEDDING_BATCH_SIZE", "INGEST_MAX_IN_FLIGHT", "LLM_CONCURRENCY",
+)
+
+_SUBJECTS = (
+    "public servant", "tenant", "employer", "landlord", "company", "guardian",
+    "trustee", "contractor", "police officer", "magistrate", "registrar", "assessee",
+)
+_ACTS = (
+    "obtains", "transfers", "conceals", "destroys", "withholds", "encumbers",
+    "disposes of", "misappropriates", "alters", "pledges", "forfeits", "assigns",
+)
+_OBJECTS = (
+    "movable property", "immovable property", "wages", "security deposit",
+    "electronic record", "share capital", "agricultural land", "tax return",
+    "valuable security", "public document", "trust property", "insurance claim",
+)
+_TOPICS = (
+    "Definitions", "Registration", "Offences", "Penalties", "Appeals", "Powers of inspection",
+    "Compensation", "Procedure", "Exemptions", "Rules", "Tenancy", "Wages and bonus",
+)
+
+
+def write_synthetic_statute(path: str, number: int, sections: int, rng: random.Random) -> None:
+    """Write a statute-shaped PDF: act title, chapters and numbered sections."""
+    doc = SimpleDocTemplate(path, pagesize=letter, invariant=True)
+    styles = getSampleStyleSheet()
+    story = [Paragraph(f"THE SYNTHETIC STATUTES {number} ACT, {1950 + number % 70}", styles['Title'])]
+    story.append(Spacer(1, 12))
+
+    for section in range(1, sections + 1):
+        if section % 10 == 1:
+            chapter = section // 10 + 1
+            story.append(Paragraph(f"CHAPTER {chapter}", styles['Heading2']))
+            story.append(Paragraph(rng.choice(_TOPICS).upper(), styles['Heading3']))
+        subject, act, item = rng.choice(_SUBJECTS), rng.choice(_ACTS), rng.choice(_OBJECTS)
+        clauses = [
+            f"({i}) Whoever, being a {rng.choice(_SUBJECTS)}, {rng.choice(_ACTS)} any "
+            f"{rng.choice(_OBJECTS)} without the consent of the {rng.choice(_SUBJECTS)} shall be "
+            f"punished with imprisonment for a term which may extend to {rng.randint(1, 10)} years, "
+            f"or with fine which may extend to {rng.randint(1, 100) * 1000} rupees, or with both."
+            for i in range(1, rng.randint(2, 5))
+        ]
+        story.append(Paragraph(
+            f"{section}. {subject.capitalize()} who {act} {item}.—" + " ".join(clauses),
+            styles['Normal']
+        ))
+        story.append(Spacer(1, 6))
+    doc.build(story)
+
+
+def generate_corpus(directory: str, files: int, sections: int, seed: int) -> None:
+    rng = random.Random(seed)
+    for number in range(1, files + 1):
+        write_synthetic_statute(os.path.join(directory, f"synthetic_act_{number:03d}.pdf"), number, sections, rng)
+
+
+def memory_mb() -> dict:
+    """Resident, peak resident, private and shared memory of this process."""
+    fields = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in ("VmRSS", "VmHWM", "RssAnon", "RssFile"):
+                fields[name] = int(value.split()[0]) / 1024
+    return {
+        "rss_mb": fields.get("VmRSS", 0.0),
+        "peak_rss_mb": fields.get("VmHWM", 0.0),
+        "private_mb": fields.get("RssAnon", 0.0),
+        "shared_mb": fields.get("RssFile", 0.0),
+    }
+
+
+def percentiles(latencies) -> dict:
+    """Mean and percentiles of latencies in seconds, in milliseconds."""
+    latencies = sorted(latencies)
+
+    def at(p):
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1e3
+
+    return {
+        "mean_ms": statistics.mean(latencies) * 1e3,
+        "p50_ms": statistics.median(latencies) * 1e3,
+        "p95_ms": at(0.95),
+        "p99_ms": at(0.99),
+    }
+
+
+def directory_mb(path: str) -> float:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    ) / (1024 * 1024)
+
+
+def use_fake_embeddings(embeddings) -> None:
+    """Serve the app's stores and retrievers with the fake embeddings."""
+    # The getters look get_embeddings up when called, so this reaches them all
+    dependencies.get_embeddings = lambda: embeddings
+    for getter in (
+        dependencies.get_vector_store,
+        dependencies.get_category_vector_store,
+        dependencies.get_keyword_index,
+        dependencies.get_retriever,
+    ):
+        getter.cache_clear()
+
+
+def bench_ingestion(data_dir: str, store_path: str, args) -> dict:
+    embeddings = FakeEmbeddings(size=args.dimension, latency=args.embedding_latency)
+    start = time.perf_counter()
+    chunks = embed_and_save_documents(data_dir, embeddings=embeddings)
+    elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    embed_and_save_documents(data_dir, embeddings=embeddings)
+    unchanged = time.perf_counter() - start
+    return {
+        "files": len([f for f in os.listdir(data_dir) if f.lower().endswith(".pdf")]),
+        "chunks": chunks,
+        "seconds": elapsed,
+        "chunks_per_second": chunks / elapsed if elapsed else 0.0,
+        "embedding_requests": embeddings.calls,
+        "unchanged_seconds": unchanged,
+        "store_mb": directory_mb(store_path),
+    }
+
+
+def bench_index_load(store_path: str, args) -> dict:
+    embeddings = FakeEmbeddings(size=args.dimension, latency=0.0)
+    loads = {"vector_store": [], "keyword_index": [], "section_index": []}
+    for _ in range(args.load_repeats):
+        start = time.perf_counter()
+        load_vector_store(store_path, embeddings)
+        loads["vector_store"].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        BM25Index.load(store_path)
+        loads["keyword_index"].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        SectionIndex.load(store_path)
+        loads["section_index"].append(time.perf_counter() - start)
+    results = {f"{name}_ms": statistics.median(seconds) * 1e3 for name, seconds in loads.items()}
+
+    # A fresh process, as a new API worker would start
+    for label, mmap in (("pickle", False), ("mmap", True)):
+        worker, = bench_startup.run(store_path, args.dimension, mmap, workers=1)
+        results[f"worker_{label}"] = {
+            "load_ms": worker["seconds"] * 1e3,
+            "private_mb": worker["private_mb"],
+            "shared_mb": worker["shared_mb"],
+        }
+    return results
+
+
+def sample_chunks(vector_store, count: int, rng: random.Random):
+    ids = list(vector_store.index_to_docstore_id.values())
+    return [vector_store.docstore.search(doc_id) for doc_id in rng.sample(ids, min(count, len(ids)))]
+
+
+async def bench_retrieval(retriever, queries, embeddings, concurrency: int) -> dict:
+    start = time.perf_counter()
+    latencies = []
+    for query in queries:
+        began = time.perf_counter()
+        retriever.invoke(query)
+        latencies.append(time.perf_counter() - began)
+    sequential = time.perf_counter() - start
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(query):
+        async with semaphore:
+            return await retriever.ainvoke(query)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(bounded(query) for query in queries))
+    concurrent = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectors = await embeddings.aembed_queries(queries)
+    retrieve_batch(retriever, queries, vectors)
+    batched = time.perf_counter() - start
+    return {
+        "queries": len(queries),
+        "sequential_qps": len(queries) / sequential,
+        "sequential_latency": percentiles(latencies),
+        "concurrency": concurrency,
+        "concurrent_qps": len(queries) / concurrent,
+        "batch_qps": len(queries) / batched,
+    }
+
+
+async def bench_chat(retriever, llm, queries, total: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    stages = {}
+
+    async def one(query):
+        async with semaphore:
+            began = time.perf_counter()
+            response = await get_chat_response(
+                query=query,
+                category="Criminal Law",
+                language="English",
+                retriever=retriever,
+                llm=llm,
+                memory=new_memory()
+            )
+            for stage, duration in response.get("timings", {}).items():
+                stages.setdefault(stage, []).append(duration)
+            return time.perf_counter() - began, response.get("llm_calls", 0)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(queries[i % len(queries)]) for i in range(total)))
+    wall = time.perf_counter() - start
+    return {
+        "requests": total,
+        "throughput_rps": total / wall,
+        "latency": percentiles([latency for latency, _ in results]),
+        "llm_calls_per_request": statistics.mean(calls for _, calls in results),
+        "stage_mean_ms": {stage: statistics.mean(durations) for stage, durations in sorted(stages.items())},
+    }
+
+
+async def bench_serving(retriever, llm, embeddings, queries, args) -> dict:
+    results = {
+        "retrieval": await bench_retrieval(retriever, queries[:args.queries], embeddings, max(args.concurrency)),
+        "chat": {},
+    }
+    for concurrency in args.concurrency:
+        results["chat"][f"c{concurrency}"] = await bench_chat(retriever, llm, queries, args.requests, concurrency)
+    return results
+
+
+def git_revision() -> dict:
+    def git(*command):
+        try:
+            return subprocess.run(
+                ["git", *command], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+
+    return {
+        "commit": git("rev-parse", "HEAD") or "unknown",
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def compare(baseline: dict, current: dict) -> None:
+    """Print every metric of both runs with its relative change."""
+    print(f"baseline {baseline['meta']['commit'][:12]} -> current {current['meta']['commit'][:12]}")
+    before, after = flatten(baseline["results"]), flatten(current["results"])
+    for name in sorted(set(before) | set(after)):
+        old, new = before.get(name), after.get(name)
+        change = f"{(new - old) / old * 100:+7.1f}%" if old and new is not None else "        "
+        old_text = f"{old:.3f}" if old is not None else "-"
+        new_text = f"{new:.3f}" if new is not None else "-"
+        print(f"  {name:<58} {old_text:>12} {new_text:>12} {change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline RAG pipeline benchmark suite")
+    parser.add_argument("--data-dir", help="Benchmark the PDFs of this directory instead of synthetic statutes")
+    parser.add_argument("--synthetic", type=int, default=12, help="Number of synthetic statute PDFs")
+    parser.add_argument("--sections", type=int, default=40, help="Sections per synthetic statute")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--embedding-latency", type=float, default=0.05, help="Fake embedding latency per request")
+    parser.add_argument("--query-embedding-latency", type=float, default=0.0,
+                        help="Fake embedding latency per query at retrieval and chat time")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Fake LLM latency per call")
+    parser.add_argument("--load-repeats", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200, help="Retrieval queries")
+    parser.add_argument("--query-words", type=int, default=6)
+    parser.add_argument("--requests", type=int, default=64, help="Chat requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--output", help="Results file (default: benchmark-results/<commit>.json)")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    revision = git_revision()
+    work_dir = tempfile.mkdtemp(prefix="bench_suite_")
+    data_dir = args.data_dir
+    if data_dir is None:
+        data_dir = os.path.join(work_dir, "data")
+        os.makedirs(data_dir)
+        generate_corpus(data_dir, args.synthetic, args.sections, args.seed)
+    store_path = os.path.join(work_dir, "store")
+    settings.VECTOR_STORE_PATH = store_path
+    # Nothing outside the suite's own store is read or written
+    settings.EMBEDDING_CACHE_ENABLED = False
+    settings.ANSWER_CACHE_ENABLED = False
+
+    results = {"memory": {"start": memory_mb()}}
+    try:
+        results["ingestion"] = bench_ingestion(data_dir, store_path, args)
+        results["memory"]["after_ingestion"] = memory_mb()
+        results["index_load"] = bench_index_load(store_path, args)
+
+        embeddings = FakeEmbeddings(size=args.dimension, latency=args.query_embedding_latency)
+        use_fake_embeddings(embeddings)
+        retriever = dependencies.get_retriever()
+        chunks = sample_chunks(dependencies.get_vector_store(), 500, random.Random(args.seed))
+        queries = [query for query, _ in make_queries(chunks, max(args.queries, args.requests), args.query_words)]
+        results["memory"]["after_load"] = memory_mb()
+
+        llm = build_llm_router([{
+            "provider": "fake",
+            "name": "fake",
+            "response": "Under the provision cited, the act is punishable with imprisonment or fine.",
+            "latency": args.llm_latency,
+            "tiers": ["default", "fast"],
+        }])
+        # One event loop: the upstream concurrency limits are bound to it
+        results.update(asyncio.run(bench_serving(retriever, llm, embeddings, queries, args)))
+        results["memory"]["end"] = memory_mb()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            **revision,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "corpus": args.data_dir or "synthetic",
+            "args": vars(args),
+            "settings": {name: getattr(settings, name) for name in RECORDED_SETTINGS},
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join("benchmark-results", f"{revision['commit'][:12]}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    ingestion, retrieval = results["ingestion"], results["retrieval"]
+    print(
+        f"ingestion chunks={ingestion['chunks']} throughput={ingestion['chunks_per_second']:.1f} chunks/s "
+        f"unchanged={ingestion['unchanged_seconds']:.2f}s store={ingestion['store_mb']:.1f}MB"
+    )
+    print(
+        f"index load vector_store={results['index_load']['vector_store_ms']:.1f}ms "
+        f"keyword_index={results['index_load']['keyword_index_ms']:.1f}ms"
+    )
+    print(
+        f"retrieval sequential={retrieval['sequential_qps']:.1f} qps batch={retrieval['batch_qps']:.1f} qps"
+    )
+    for label, chat in results["chat"].items():
+        print(
+            f"chat {label:<5} throughput={chat['throughput_rps']:.1f} req/s "
+            f"p50={chat['latency']['p50_ms']:.0f}ms p99={chat['latency']['p99_ms']:.0f}ms"
+        )
+    print(f"peak memory={results['memory']['end']['peak_rss_mb']:.0f}MB; results in {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Offline evaluation of the local category-relevance classifier against the
+LLM gate it replaces.
+
+Every labelled query is checked against every legal category (relevant only
+for its own category). For each pair the script records the local score and
+decision, and, unless --skip-llm is given, the LLM's answer. It then reports
+accuracy, how many pairs were decided locally, and latency for the local
+classifier, the LLM gate and the combination served by the API.
+
+Needs a built vector store (with relevance prototypes) and the API keys in
+.env, since queries are embedded and judged by the real services.
+
+    python -m benchmarks.eval_relevance
+    python -m benchmarks.eval_relevance --labels queries.jsonl --skip-llm
+
+A labels file has one {"query": ..., "category": ...} object per line, where
+category is the one category the query belongs to.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from app.config import settings
+from app.dependencies import get_embeddings, get_llm
+from app.services.chatbot import _ask_category_relevance
+from app.services.relevance import RelevanceClassifier
+
+# Questions users ask of each category, used when no labels file is given
+DEFAULT_QUERIES = {
+    "Know Your Rights": [
+        "What fundamental rights does the Constitution guarantee?",
+        "Can the police detain me without telling me the reason?",
+        "Is the right to privacy a fundamental right in India?",
+        "What is the minimum wage I am entitled to as a labourer?",
+        "Can I be forced to work overtime without extra pay?",
+        "What does Article 21 protect?",
+    ],
+    "Criminal Law": [
+        "What is the punishment for murder?",
+        "Is theft a bailable offence?",
+        "What is the difference between culpable homicide and murder?",
+        "How do I file an FIR for assault?",
+        "What is the punishment for cheating someone of money?",
+        "Can a minor be tried for a criminal offence?",
+    ],
+    "Cyber Law": [
+        "Someone hacked my social media account, what can I do?",
+        "Is sharing someone's photos online without consent a crime?",
+        "What is the penalty for online identity theft?",
+        "Is copying software without a licence illegal?",
+        "How do I report online banking fraud?",
+    ],
+    "Property Law": [
+        "How is ancestral property divided among heirs?",
+        "What documents are needed to register a sale deed?",
+        "Can my landlord evict me without notice?",
+        "What is adverse possession?",
+        "How do I transfer property through a gift deed?",
+    ],
+    "Consumer Law": [
+        "The shop refuses to replace a defective phone, what can I do?",
+        "How do I file a complaint in a consumer court?",
+        "Can I get a refund for a cancelled flight?",
+        "Is misleading advertising punishable?",
+    ],
+}
+
+
+def load_labels(path):
+    if path is None:
+        return [(query, category) for category, queries in DEFAULT_QUERIES.items() for query in queries]
+    with open(path) as f:
+        return [(row["query"], row["category"]) for row in map(json.loads, f) if row]
+
+
+def percentiles(values):
+    values = sorted(values)
+    if not values:
+        return "n/a"
+    p50 = statistics.median(values)
+    p99 = values[min(len(values) - 1, int(len(values) * 0.99))]
+    return f"p50={p50:9.3f}ms p99={p99:9.3f}ms"
+
+
+def accuracy(pairs):
+    pairs = list(pairs)
+    if not pairs:
+        return "n/a"
+    correct = sum(prediction == label for prediction, label in pairs)
+    return f"{correct / len(pairs):6.1%} ({correct}/{len(pairs)})"
+
+
+async def evaluate(classifier, llm, labels, skip_llm):
+    results = []
+    for query, true_category in labels:
+        start = time.perf_counter()
+        vector = await classifier.embeddings.aembed_query(query)
+        embed_ms = (time.perf_counter() - start) * 1000
+        for category in settings.LEGAL_CATEGORIES:
+            start = time.perf_counter()
+            score = classifier.score(vector, category)
+            local_ms = (time.perf_counter() - start) * 1000
+            llm_decision = llm_ms = None
+            if not skip_llm:
+                start = time.perf_counter()
+                llm_decision = await _ask_category_relevance(query, category, llm)
+                llm_ms = (time.perf_counter() - start) * 1000
+            results.append({
+                "query": query,
+                "category": category,
+                "label": category == true_category,
+                "score": score,
+                "embed_ms": embed_ms,
+                "local_ms": local_ms,
+                "llm": llm_decision,
+                "llm_ms": llm_ms,
+            })
+    return results
+
+
+def decide(score, accept, reject):
+    if score is None or reject < score < accept:
+        return None
+    return score >= accept
+
+
+def report(results, accept, reject, skip_llm):
+    decided = [(decide(r["score"], accept, reject), r) for r in results]
+    local = [(decision, r["label"]) for decision, r in decided if decision is not None]
+    print(f"\naccept={accept:.2f} reject={reject:.2f}")
+    print(f"  decided locally   {len(local) / len(results):6.1%} ({len(local)}/{len(results)})")
+    print(f"  local accuracy    {accuracy(local)}")
+    if skip_llm:
+        return
+    combined = [
+        (decision if decision is not None else r["llm"], r["label"]) for decision, r in decided
+    ]
+    combined_ms = [
+        r["local_ms"] + (r["llm_ms"] if decision is None else 0.0) for decision, r in decided
+    ]
+    print(f"  LLM accuracy      {accuracy((r['llm'], r['label']) for r in results)}")
+    print(f"  combined accuracy {accuracy(combined)}")
+    print(f"  combined latency  {percentiles(combined_ms)} (excluding the query embedding)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the local relevance classifier against the LLM gate")
+    parser.add_argument("--store", default=settings.VECTOR_STORE_PATH, help="Vector store directory")
+    parser.add_argument("--labels", help="JSON lines file of {query, category}")
+    parser.add_argument("--skip-llm", action="store_true", help="Only evaluate the local classifier")
+    parser.add_argument("--accept", type=float, default=settings.RELEVANCE_ACCEPT_THRESHOLD)
+    parser.add_argument("--reject", type=float, default=settings.RELEVANCE_REJECT_THRESHOLD)
+    args = parser.parse_args()
+
+    classifier = RelevanceClassifier.load(args.store, get_embeddings())
+    if classifier is None:
+        raise SystemExit(f"No relevance prototypes in {args.store}; rebuild the vector store first")
+
+    labels = load_labels(args.labels)
+    results = asyncio.run(evaluate(classifier, get_llm(), labels, args.skip_llm))
+
+    print(f"{len(labels)} queries x {len(settings.LEGAL_CATEGORIES)} categories = {len(results)} pairs")
+    print(f"query embedding   {percentiles([r['embed_ms'] for r in results])}")
+    print(f"local classifier  {percentiles([r['local_ms'] for r in results])}")
+    if not args.skip_llm:
+        print(f"LLM gate          {percentiles([r['llm_ms'] for r in results])}")
+
+    report(results, args.accept, args.reject, args.skip_llm)
+    # Neighbouring thresholds, to help tune RELEVANCE_*_THRESHOLD
+    for accept, reject in ((0.9, 0.1), (0.8, 0.2), (0.6, 0.3), (0.5, 0.5)):
+        if (accept, reject) != (args.accept, args.reject):
+            report(results, accept, reject, args.skip_llm)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import asyncio
+import hashlib
+import time
+from typing import List
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+import numpy as np
+
+# The fake chat model doubles as the LLM router's local backend
+from app.services.fake_llm import FakeChatModel  # noqa: F401
+
+
+class FakeRetriever(BaseRetriever):
+    """Retriever that returns canned legal snippets after an injected latency."""
+
+    latency: float = 0.05
+    k: int = 4
+
+    def _documents(self) -> List[Document]:
+        return [
+            Document(
+                page_content=f"Section {i}: sample provision text for benchmarking.",
+                metadata={"source": f"fixture_{i}.pdf"},
+            )
+            for i in range(self.k)
+        ]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        time.sleep(self.latency)
+        return self._documents()
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        await asyncio.sleep(self.latency)
+        return self._documents()
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Deterministic embeddings derived from a hash of the text, with an
+    injected per-request latency standing in for the remote API.
+    """
+
+    def __init__(self, size: int = 768, latency: float = 0.2):
+        self.size = size
+        self.latency = latency
+        self.calls = 0
+
+    def _vector(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.size).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        time.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        return await self.aembed_documents(texts)